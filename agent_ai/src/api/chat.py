@@ -1,6 +1,8 @@
 
 from typing import List
+import json
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from core.schema_http import (
     RequestHTTPChat, ResponseHTTPChat,
     RequestHTTPVote, ResponseHTTPVote,
@@ -11,18 +13,20 @@ from core.schema_http import (
 from core.utils import genereta_id
 import pdb
 from inference.graphs.bata_graph import PDFChatAgent
+from inference.scheduler import ConversationScheduler
 from langchain_core.messages import HumanMessage
 from core.utils import extract_text_content,extract_word_content,extract_excel_content
 
-from core.schema_services import AzureServices
+from core.container import services
 
 
 chat_router = APIRouter()
 
-# Instancias de servicios
-pdf_extractor = AzureServices.PdfProcessor()
-cosmos_db = AzureServices.CosmosDBClient()
+# Instancias de servicios (clientes compartidos del contenedor)
+pdf_extractor = services.pdf_processor
+cosmos_db = services.cosmos
 pdf_chat_agent = PDFChatAgent()
+conversation_scheduler = ConversationScheduler()
 
 @chat_router.post("/message", response_model=ResponseHTTPChat)
 async def endpoint_message(request: RequestHTTPChat):
@@ -33,17 +37,55 @@ async def endpoint_message(request: RequestHTTPChat):
     if pdf_chat_agent is None:
         raise HTTPException(status_code=500, detail="pdf_chat_agent no está inicializado")
 
-    #human_msg = HumanMessage(content=request.query)
-    new_state, message_id = await pdf_chat_agent.invoke_flow(
-        user_input=request.query,
-        pdf_text=None,
+    # Los turnos de una conversación se serializan y los mensajes que llegan
+    # mientras se responde un turno (ej. varios mensajes cortos de WhatsApp) se
+    # responden juntos en el siguiente.
+    async def run_turn(user_input: str):
+        return await pdf_chat_agent.invoke_flow(
+            user_input=user_input,
+            pdf_text=None,
+            conversation_id=request.conversation_id,
+            conversation_name=request.conversation_name,
+            user_id=request.user_id
+        )
+
+    (new_state, message_id), is_primary = await conversation_scheduler.submit(
         conversation_id=request.conversation_id,
-        conversation_name=request.conversation_name,
-        user_id=request.user_id
+        message=request.query,
+        run=run_turn
     )
     final_msg = new_state["messages"][-1]
 
-    return {"id": message_id, "text": final_msg.content}
+    return {"id": message_id, "text": final_msg.content, "coalesced": not is_primary}
+
+@chat_router.post("/message/stream")
+async def endpoint_message_stream(request: RequestHTTPChat):
+    """
+    Variante en streaming (Server-Sent Events) de /message.
+    Envía los tokens del LLM y avisos de progreso ('Buscando en el catálogo…')
+    a medida que el grafo los produce; el último evento ('end') trae el id y
+    el texto final, una vez guardado el intercambio en Cosmos.
+    """
+
+    if pdf_chat_agent is None:
+        raise HTTPException(status_code=500, detail="pdf_chat_agent no está inicializado")
+
+    async def event_stream():
+        async with conversation_scheduler.serialize(request.conversation_id):
+            async for event in pdf_chat_agent.stream_flow(
+                user_input=request.query,
+                pdf_text=None,
+                conversation_id=request.conversation_id,
+                conversation_name=request.conversation_name,
+                user_id=request.user_id
+            ):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @chat_router.post("/vote", response_model=ResponseHTTPVote)
 async def endpoint_vote(request: RequestHTTPVote):
@@ -138,13 +180,14 @@ async def upload_attachment(
         unread_files = [res.get('file_name') for res in response_info.get('unread_files')]
         resultado_texto += f"\nDocumentos no almacenados en base de conocimientos: {unread_files}"
 
-    new_state, message_id = await pdf_chat_agent.invoke_flow(
-        user_input=message,
-        pdf_text=resultado_texto,
-        conversation_id=conversation_id,
-        conversation_name=conversation_name,
-        user_id=user_id
-    )
+    async with conversation_scheduler.serialize(conversation_id):
+        new_state, message_id = await pdf_chat_agent.invoke_flow(
+            user_input=message,
+            pdf_text=resultado_texto,
+            conversation_id=conversation_id,
+            conversation_name=conversation_name,
+            user_id=user_id
+        )
 
     return {
         "id": message_id,
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from core.metrics import metrics
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/", response_model=dict)
+async def read_metrics():
+    """
+    Retorna los contadores y latencias (p50/p95) acumulados por el proceso.
+    """
+    return metrics.snapshot()
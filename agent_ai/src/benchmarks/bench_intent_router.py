@@ -0,0 +1,57 @@
+"""
+Benchmark del clasificador de intención del fast path (inference.intent).
+
+Clasifica una muestra de mensajes típicos de WhatsApp y reporta la latencia del
+clasificador y la fracción de turnos que evitarían el modelo grande. Con --file
+se puede usar una muestra propia (un mensaje por línea).
+
+Uso:
+    python -m benchmarks.bench_intent_router
+    python -m benchmarks.bench_intent_router --file mensajes.txt
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+
+from inference.intent import intent_classifier
+
+SAMPLE_MESSAGES = [
+    "Hola", "Buenas tardes", "hola, busco zapatos para mujer", "para hombre", "zapatos",
+    "sí", "dale", "busco tenis blancos talla 38", "tienen sandalias cómodas para playa?",
+    "gracias!", "es para mi hija", "ofertas", "¿Hacen envíos a Cali?", "qué dice el documento",
+    "lo nuevo para hombre", "quiero unas botas negras", "muchas gracias", "accesorios",
+    "cuánto cuesta el envío", "para mujer por favor",
+]
+
+
+def main(messages: list[str], runs: int):
+    results = [intent_classifier.classify(message) for message in messages]
+    timings = []
+    for _ in range(runs):
+        for message in messages:
+            start = time.perf_counter()
+            intent_classifier.classify(message)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    for message, result in zip(messages, results):
+        route = "fast" if result["fast_path"] else "LLM "
+        print(f"  [{route}] {result['intent']:15s} {result['score']:.2f}  {message}")
+
+    fast = sum(1 for result in results if result["fast_path"])
+    print(f"\nIntenciones: {dict(Counter(result['intent'] for result in results))}")
+    print(f"Turnos por el fast path: {fast}/{len(results)} ({fast / len(results):.0%})")
+    print(f"Clasificador: p50 {statistics.median(timings):.3f}ms | máx {max(timings):.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del router de intención")
+    parser.add_argument("--file", help="Archivo con un mensaje por línea")
+    parser.add_argument("--runs", type=int, default=100)
+    args = parser.parse_args()
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            sample = [line.strip() for line in f if line.strip()]
+    else:
+        sample = SAMPLE_MESSAGES
+    main(sample, args.runs)
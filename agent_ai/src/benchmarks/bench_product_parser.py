@@ -0,0 +1,110 @@
+"""
+Benchmark del parser determinístico de listados (inference.catalog.parser).
+
+Para cada fixture `benchmarks/fixtures/<nombre>.html` con su `<nombre>.expected.json`
+mide el tiempo de parse_listing y su exactitud frente a los productos esperados
+(coincidencia por link o nombre y precio correcto). Con --llm compara además con
+la extracción por LLM (SmartScraperGraph) sobre el mismo HTML.
+
+Uso:
+    python -m benchmarks.bench_product_parser --runs 50
+    python -m benchmarks.bench_product_parser --llm
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+
+from inference.catalog.parser import parse_listing
+from inference.catalog.products import fold_text, normalize_products
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def _price_digits(price) -> str:
+    # '$ 99.900' y '99900' son el mismo precio
+    return re.sub(r"\D", "", str(price or ""))
+
+
+def accuracy(products: list[dict], expected: list[dict]) -> dict:
+    """
+    Compara los productos extraídos con los esperados y retorna recall de
+    productos y exactitud de precio sobre los productos encontrados.
+    """
+    by_link = {p.get("link"): p for p in products if p.get("link")}
+    by_name = {fold_text(p["name"]): p for p in products}
+    found = 0
+    price_ok = 0
+    for item in expected:
+        product = by_link.get(item.get("link")) or by_name.get(fold_text(item["name"]))
+        if product is None:
+            continue
+        found += 1
+        if _price_digits(product.get("price")) == _price_digits(item.get("price")):
+            price_ok += 1
+    return {
+        "recall": found / len(expected) if expected else 0.0,
+        "price_accuracy": price_ok / found if found else 0.0,
+        "extracted": len(products),
+        "expected": len(expected),
+    }
+
+
+def bench_parser(html: str, runs: int) -> tuple[list[dict], float, list[float]]:
+    timings = []
+    products, confidence = [], 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        products, confidence = parse_listing(html)
+        timings.append((time.perf_counter() - start) * 1000)
+    return products, confidence, timings
+
+
+def bench_llm(html: str) -> tuple[list[dict], float]:
+    # Import diferido: solo se necesita (y se paga) con --llm
+    from inference.catalog.scraper import catalog_scraper
+
+    start = time.perf_counter()
+    products = normalize_products(catalog_scraper._extract_with_llm(html))
+    return products, (time.perf_counter() - start) * 1000
+
+
+def main(runs: int, use_llm: bool):
+    fixtures = sorted(FIXTURES_DIR.glob("*.html"))
+    if not fixtures:
+        print(f"No hay fixtures en {FIXTURES_DIR}")
+        return
+
+    for fixture in fixtures:
+        html = fixture.read_text(encoding="utf-8")
+        expected_path = fixture.with_suffix(".expected.json")
+        expected = json.loads(expected_path.read_text(encoding="utf-8")) if expected_path.exists() else []
+
+        products, confidence, timings = bench_parser(html, runs)
+        result = accuracy(products, expected)
+        print(f"\n{fixture.name}")
+        print(
+            f"  parser: p50 {statistics.median(timings):.2f}ms | máx {max(timings):.2f}ms | "
+            f"confianza {confidence:.2f} | recall {result['recall']:.0%} | "
+            f"precio {result['price_accuracy']:.0%} | {result['extracted']}/{result['expected']} productos"
+        )
+
+        if use_llm:
+            llm_products, llm_ms = bench_llm(html)
+            llm_result = accuracy(llm_products, expected)
+            print(
+                f"  llm:    {llm_ms:.0f}ms | recall {llm_result['recall']:.0%} | "
+                f"precio {llm_result['price_accuracy']:.0%} | "
+                f"{llm_result['extracted']}/{llm_result['expected']} productos"
+            )
+            print(f"  speedup del parser: {llm_ms / statistics.median(timings):.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del parser de listados del catálogo")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--llm", action="store_true", help="Comparar con la extracción por LLM")
+    args = parser.parse_args()
+    main(args.runs, args.llm)
@@ -0,0 +1,98 @@
+"""
+Benchmark del arranque en frío del servicio (import de `main` en un proceso nuevo).
+
+Cada corrida lanza un intérprete limpio, bloquea las conexiones de red (cuenta
+los intentos en vez de conectarse) e importa la app. Reporta el tiempo de import,
+los intentos de red (deben ser 0) y qué módulos pesados quedaron cargados (deben
+cargarse solo al usarse). Con --importtime muestra los imports más lentos según
+`python -X importtime`.
+
+Uso (desde agent_ai/src, con las variables de entorno del servicio):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Módulos que no deberían cargarse al arrancar
+HEAVY_MODULES = ["IPython", "pandas", "docx", "langchain_community", "scrapegraphai", "playwright", "nest_asyncio"]
+
+CHILD_SCRIPT = """
+import json, socket, sys, time
+attempts = []
+def _blocked(*args, **kwargs):
+    attempts.append(repr(args[1:] or args)[:120])
+    raise OSError("red bloqueada durante el benchmark de arranque")
+socket.socket.connect = _blocked
+socket.socket.connect_ex = _blocked
+socket.create_connection = _blocked
+socket.getaddrinfo = _blocked
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "network_attempts": attempts,
+    "heavy_loaded": [m for m in HEAVY if m in sys.modules],
+}))
+"""
+
+
+def run_child(extra_args: list[str]) -> subprocess.CompletedProcess:
+    script = f"HEAVY = {HEAVY_MODULES!r}\n" + CHILD_SCRIPT
+    return subprocess.run(
+        [sys.executable, *extra_args, "-c", script],
+        capture_output=True, text=True, cwd=os.getcwd(), env=os.environ.copy()
+    )
+
+
+def top_imports(limit: int) -> list[tuple[int, str]]:
+    completed = run_child(["-X", "importtime"])
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        try:
+            rows.append((int(parts[1].strip()), parts[2].rstrip()))
+        except ValueError:
+            continue
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main(runs: int, importtime: bool, limit: int):
+    results = []
+    for _ in range(runs):
+        completed = run_child([])
+        if completed.returncode != 0:
+            print(completed.stderr[-2000:])
+            raise SystemExit("El import de main falló; revisa las dependencias y variables de entorno del servicio")
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    timings = [result["seconds"] * 1000 for result in results]
+    print(f"Import de main ({runs} corridas): p50 {statistics.median(timings):.0f}ms | "
+          f"mín {min(timings):.0f}ms | máx {max(timings):.0f}ms")
+    attempts = results[-1]["network_attempts"]
+    print(f"Intentos de red al importar: {len(attempts)}")
+    for attempt in attempts[:10]:
+        print(f"  {attempt}")
+    heavy = results[-1]["heavy_loaded"]
+    print(f"Módulos pesados cargados: {', '.join(heavy) if heavy else 'ninguno'}")
+
+    if importtime:
+        print("\nImports más lentos (acumulado, µs):")
+        for micros, module in top_imports(limit):
+            print(f"  {micros:>9}  {module.strip()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del arranque en frío del servicio")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="Muestra los imports más lentos")
+    parser.add_argument("--limit", type=int, default=15)
+    args = parser.parse_args()
+    main(args.runs, args.importtime, args.limit)
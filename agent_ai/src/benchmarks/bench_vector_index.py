@@ -0,0 +1,107 @@
+"""
+Benchmark de la búsqueda semántica de productos (inference.catalog.vector_index).
+
+Construye un catálogo sintético con embeddings aleatorios (sin llamar a Azure
+OpenAI) y mide la latencia del top-k en float32 y en int8, además de cuántos
+embeddings se recalculan al reindexar con un porcentaje de productos modificados.
+
+Uso:
+    python -m benchmarks.bench_vector_index --products 5000 --dims 1536
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+
+from core.embedding_cache import EmbeddingCache
+from inference.catalog.index import ProductIndex
+from inference.catalog.vector_index import ProductVectorIndex
+
+SOURCE = "https://www.bata.com/co/benchmark"
+
+
+class FakeEmbeddings:
+    """
+    Embeddings determinísticos por texto, con la misma interfaz async de langchain.
+    """
+
+    def __init__(self, dims: int):
+        self.dims = dims
+        self.calls = 0
+
+    def _embed(self, text: str) -> list[float]:
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        return rng.standard_normal(self.dims).astype(np.float32).tolist()
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += len(texts)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+class BenchVectorIndex(ProductVectorIndex):
+    def __init__(self, store: ProductIndex, quantize: bool, fake: FakeEmbeddings):
+        super().__init__(store, cache=EmbeddingCache(":memory:"), quantize=quantize)
+        self.fake = fake
+
+    @property
+    def embeddings(self):
+        return self.fake
+
+
+def make_products(n: int, version: int = 0, changed_ratio: float = 0.0) -> list[dict]:
+    changed = int(n * changed_ratio)
+    return [
+        {
+            "name": f"Producto {i}" + (f" v{version}" if i < changed else ""),
+            "colors": ["Negro"],
+            "description": f"Zapato de prueba número {i}",
+            "price": "$ 99.900",
+            "link": f"https://www.bata.com/co/producto-{i}.html",
+        }
+        for i in range(n)
+    ]
+
+
+async def bench(n: int, dims: int, runs: int, quantize: bool):
+    fake = FakeEmbeddings(dims)
+    index = BenchVectorIndex(ProductIndex(":memory:"), quantize=quantize, fake=fake)
+
+    start = time.perf_counter()
+    await index.update_source(SOURCE, make_products(n))
+    build = time.perf_counter() - start
+
+    queries = [f"consulta {i}" for i in range(runs)]
+    timings = []
+    for query in queries:
+        await index._embed_query(query)
+        start = time.perf_counter()
+        await index.search(SOURCE, query, limit=20)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    fake.calls = 0
+    await index.update_source(SOURCE, make_products(n, version=1, changed_ratio=0.05))
+    label = "int8" if quantize else "float32"
+    print(
+        f"{label:8s} construcción {build:.2f}s | búsqueda p50 {statistics.median(timings):.3f}ms | "
+        f"máx {max(timings):.3f}ms | reindexar con 5% cambiados: {fake.calls} embeddings"
+    )
+
+
+async def main(n: int, dims: int, runs: int):
+    print(f"{n} productos, {dims} dimensiones, {runs} consultas")
+    for quantize in (False, True):
+        await bench(n, dims, runs, quantize)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del índice semántico de productos")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.dims, args.runs))
@@ -0,0 +1,126 @@
+"""
+Simulación del router de deployments (core.llm_router) con endpoints falsos.
+
+Cada endpoint falso responde con una latencia configurable, una cola lenta
+(probabilidad de tardar `tail_seconds`) y tasas de 429 y de error. Se comparan
+las latencias de un solo deployment contra el router con balanceo, hedge,
+failover y circuit breaker, y se imprime el reparto y las métricas del router.
+
+Uso:
+    python -m benchmarks.fake_llm_router --calls 300 --concurrency 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from core.llm_router import Deployment, LLMRouter
+from core.metrics import metrics
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status_code: int, retry_after: float = 1.0):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": {"retry-after": str(retry_after)}})()
+
+
+class FakeResponse:
+    def __init__(self, content: str, total_tokens: int):
+        self.content = content
+        self.usage_metadata = {"total_tokens": total_tokens}
+
+
+class FakeChatEndpoint:
+    """
+    Endpoint de chat falso con la interfaz que usa el router (ainvoke / bind_tools).
+    """
+
+    def __init__(self, name: str, latency: float, tail_prob: float = 0.0, tail_seconds: float = 0.0,
+                 throttle_prob: float = 0.0, error_prob: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.tail_prob = tail_prob
+        self.tail_seconds = tail_seconds
+        self.throttle_prob = throttle_prob
+        self.error_prob = error_prob
+
+    def bind_tools(self, tools: list) -> "FakeChatEndpoint":
+        return self
+
+    async def ainvoke(self, messages, config=None, **kwargs) -> FakeResponse:
+        roll = random.random()
+        if roll < self.throttle_prob:
+            await asyncio.sleep(0.01)
+            raise FakeHTTPError(429, retry_after=0.5)
+        if roll < self.throttle_prob + self.error_prob:
+            await asyncio.sleep(0.05)
+            raise FakeHTTPError(500)
+        delay = self.tail_seconds if random.random() < self.tail_prob else random.uniform(0.7, 1.3) * self.latency
+        await asyncio.sleep(delay)
+        return FakeResponse(f"respuesta de {self.name}", total_tokens=800)
+
+
+def make_endpoints() -> list[FakeChatEndpoint]:
+    return [
+        FakeChatEndpoint("eastus", latency=0.3, tail_prob=0.08, tail_seconds=3.0, throttle_prob=0.05),
+        FakeChatEndpoint("swedencentral", latency=0.4, tail_prob=0.05, tail_seconds=3.0),
+        FakeChatEndpoint("flaky", latency=0.2, error_prob=0.6),
+    ]
+
+
+async def run(target, calls: int, concurrency: int) -> tuple[list[float], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one() -> float:
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await target.ainvoke([{"role": "user", "content": "hola"}])
+            except Exception:
+                failures += 1
+            return (time.perf_counter() - start) * 1000
+
+    latencies = await asyncio.gather(*[one() for _ in range(calls)])
+    return list(latencies), failures
+
+
+def report(label: str, latencies: list[float], failures: int):
+    ordered = sorted(latencies)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"{label:28s} p50 {statistics.median(ordered):7.0f}ms | p95 {p95:7.0f}ms | "
+          f"máx {ordered[-1]:7.0f}ms | fallidas {failures}")
+
+
+async def main(calls: int, concurrency: int):
+    endpoints = make_endpoints()
+
+    single = LLMRouter([Deployment("solo", endpoints[0])], hedge_min_samples=10**9)
+    report("Un deployment (sin router)", *await run(single, calls, concurrency))
+
+    metrics_before = set(metrics.snapshot()["counters"])
+    router = LLMRouter(
+        [Deployment(e.name, e, tpm_limit=200_000, breaker_failures=3, breaker_cooldown_seconds=2) for e in endpoints],
+        hedge_min_samples=20,
+        hedge_min_delay_seconds=0.3
+    )
+    report("Router (3 deployments)", *await run(router, calls, concurrency))
+
+    counters = metrics.snapshot()["counters"]
+    print("\nMétricas del router:")
+    for name, value in sorted(counters.items()):
+        if name.startswith("llm.router.") and (name not in metrics_before or not name.startswith("llm.router.solo")):
+            print(f"  {name}: {value:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulación del router LLM con endpoints falsos")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main(args.calls, args.concurrency))
@@ -0,0 +1,62 @@
+"""
+Prueba de carga para /api/chat/message.
+
+Lanza N conversaciones en paralelo contra un servidor en ejecución y compara el
+tiempo total con la latencia de una sola conversación. Con el turno del agente
+en un camino no bloqueante, N conversaciones deberían terminar en ~1 latencia
+de LLM (no en N).
+
+Uso:
+    python -m benchmarks.load_test_chat --url http://localhost:8000 --n 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import aiohttp
+
+
+async def send_message(session: aiohttp.ClientSession, url: str, query: str) -> float:
+    """
+    Envía un mensaje en una conversación nueva y retorna la latencia en segundos.
+    """
+    conversation_id = f"loadtest-{uuid.uuid4()}"
+    payload = {
+        "user_id": "loadtest",
+        "conversation_id": conversation_id,
+        "conversation_name": "loadtest",
+        "query": query,
+    }
+    start = time.perf_counter()
+    async with session.post(f"{url}/api/chat/message", json=payload) as response:
+        response.raise_for_status()
+        await response.json()
+    return time.perf_counter() - start
+
+
+async def main(url: str, n: int, query: str):
+    timeout = aiohttp.ClientTimeout(total=300)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        # 1) Línea base: una sola conversación
+        single = await send_message(session, url, query)
+        print(f"Latencia de 1 conversación: {single:.2f}s")
+
+        # 2) N conversaciones simultáneas
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*[send_message(session, url, query) for _ in range(n)])
+        wall = time.perf_counter() - start
+
+    print(f"{n} conversaciones concurrentes: {wall:.2f}s en total")
+    print(f"Latencia p50: {statistics.median(latencies):.2f}s | máx: {max(latencies):.2f}s")
+    print(f"Tiempo total / latencia individual: {wall / single:.2f}x (serializado sería ~{n}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del endpoint de chat")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--query", default="Hola, ¿qué zapatos para mujer tienen?")
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.n, args.query))
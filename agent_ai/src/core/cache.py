@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+import threading
+import time
+
+from core.metrics import metrics
+
+
+_MISSING = object()
+
+
+class LRUTTLCache:
+    """
+    Caché en memoria acotada por cantidad de entradas (LRU) y por tiempo de vida (TTL).
+
+    Cada caché reporta en `metrics` los contadores '<name>.hits', '<name>.misses'
+    y '<name>.evictions'.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._get(key)
+        if value is _MISSING:
+            metrics.incr(f"{self.name}.misses")
+            return default
+        metrics.incr(f"{self.name}.hits")
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Igual que get() pero sin contar hit/miss (para actualizaciones write-through).
+        """
+        value = self._get(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                metrics.incr(f"{self.name}.evictions")
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._get(key) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                metrics.incr(f"{self.name}.evictions")
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
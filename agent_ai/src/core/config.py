@@ -1,8 +1,13 @@
 from dotenv import load_dotenv, find_dotenv
+import json
 import os
 
 load_dotenv(find_dotenv())
 
+# Directorio de los datos locales del servicio (cachés en disco); por defecto
+# agent_ai/src/data, sin depender del directorio desde el que se lance el proceso
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
 class Settings():
     class AzureServices():
         def __init__(self):
@@ -11,12 +16,22 @@ class Settings():
             self.azure_openai_endpoint: str = os.getenv("AZURE_OPENAI_ENDPOINT")
             self.model_gpt4o_name: str = os.getenv("MODEL_GPT4o_NAME")
             self.model_embeddings_name: str = os.getenv("EMBEDDING_NAME")
+            # Límite de tokens por minuto del deployment principal (opcional, para el router)
+            self.azure_openai_tpm: int = int(os.getenv("AZURE_OPENAI_TPM", "0")) or None
+            # Deployments adicionales para el router, en JSON: [{"name", "endpoint", "api_key",
+            # "deployment", "api_version" (opcional), "tpm" (opcional)}, ...]
+            self.azure_openai_deployments: list = json.loads(os.getenv("AZURE_OPENAI_DEPLOYMENTS", "[]"))
+            # Deployment pequeño (opcional) para los turnos simples del fast path
+            self.model_fast_name: str = os.getenv("MODEL_FAST_NAME")
             self.azure_search_endpoint: str = os.getenv("AZURE_AI_SEARCH_ENDPOINT")
             self.azure_search_key: str = os.getenv("AZURE_AI_SEARCH_API_KEY")
+            # Índice con los documentos de las conversaciones (retrieval_tool)
+            self.azure_search_index_name: str = os.getenv("AZURE_AI_SEARCH_INDEX_NAME", "geo-gpk")
             self.document_intelligence_endpoint: str = os.getenv("AZURE_FORM_RECOGNIZER_ENDPOINT")
             self.document_intelligence_key: str = os.getenv("AZURE_FORM_RECOGNIZER_API_KEY")
             self.document_intelligence_api_version: str = os.getenv("AZURE_FORM_RECOGNIZER_API_VERSION")
             self.tavily_api_key: str = os.getenv("TAVILY_API_KEY")
+            self.openai_api_key: str = os.getenv("OPENAI_APIKEY")
 
     class DBServices:
         """
@@ -36,6 +51,7 @@ class Settings():
             self.azure_cosmos_db_container_name_inventory = os.getenv("AZURE_COSMOSDB_CONTAINER_NAME_INVENTORY")
             self.azure_cosmos_db_container_name = os.getenv("AZURE_COSMOSDB_CONTAINER_NAME_ORDERS")
             self.azure_cosmos_db_container_name_message_pairs = os.getenv("AZURE_COSMOSDB_CONTAINER_NAME_MESSAGE_PAIRS")
+            self.azure_cosmos_db_container_name_summaries = os.getenv("AZURE_COSMOSDB_CONTAINER_NAME_SUMMARIES", "conversation_summaries")
             
             # Claves y configuración de Azure Blob Storage
             self.azure_blob_storage_connection_string = os.getenv("AZURE_BLOB_STORAGE_CONNECTION_STRING")
@@ -45,10 +61,98 @@ class Settings():
             self.azure_datalake_connection_string = os.getenv("AZURE_DATALAKE_CONNECTION_STRING")
             self.azure_datalake_filesystem_name = os.getenv("AZURE_DATALAKE_FILESYSTEM_NAME")
             
+    class AgentServices:
+        """
+        Parámetros de rendimiento del agente conversacional (concurrencia,
+        límites y tiempos). Todos se pueden sobrescribir por variables de entorno.
+        """
+
+        def __init__(self):
+            # Máximo de llamadas simultáneas al LLM por proceso
+            self.llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+            # Pool HTTP (keep-alive) compartido por los clientes de Azure OpenAI
+            self.llm_http_max_connections: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+            self.llm_http_max_keepalive: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+            # Presupuesto de tokens del historial enviado al LLM y del resumen acumulado
+            self.context_max_tokens: int = int(os.getenv("CONTEXT_MAX_TOKENS", "4000"))
+            self.summary_max_tokens: int = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+            # Máximo de intercambios leídos de Cosmos (posteriores al último resumen)
+            self.history_max_turns: int = int(os.getenv("HISTORY_MAX_TURNS", "50"))
+            # Caché en proceso del historial reciente por conversación
+            self.history_cache_max_conversations: int = int(os.getenv("HISTORY_CACHE_MAX_CONVERSATIONS", "1000"))
+            self.history_cache_ttl_seconds: int = int(os.getenv("HISTORY_CACHE_TTL_SECONDS", "900"))
+            # Presupuesto total de un turno (Cosmos + LLM + tools); al agotarse se responde
+            # con un mensaje de respaldo. Las tools dejan libre la reserva para la respuesta final.
+            self.turn_timeout_seconds: float = float(os.getenv("TURN_TIMEOUT_SECONDS", "40"))
+            self.turn_answer_reserve_seconds: float = float(os.getenv("TURN_ANSWER_RESERVE_SECONDS", "8"))
+            # Embeddings de documentos: textos y tokens por lote, lotes simultáneos y
+            # reintentos ante 429
+            self.embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+            self.embedding_batch_max_tokens: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "60000"))
+            self.embedding_max_concurrency: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+            self.embedding_max_retries: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+            # Caché en disco de embeddings por hash de (modelo + texto), acotada en MB (LRU)
+            self.embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+            self.embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(DATA_DIR, "embedding_cache.db"))
+            self.embedding_cache_max_mb: int = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+            # Ejecución de tools: timeout por llamada y llamadas simultáneas por proceso
+            self.search_tool_timeout_seconds: float = float(os.getenv("SEARCH_TOOL_TIMEOUT_SECONDS", "15"))
+            self.retrieval_tool_timeout_seconds: float = float(os.getenv("RETRIEVAL_TOOL_TIMEOUT_SECONDS", "15"))
+            self.scrape_tool_timeout_seconds: float = float(os.getenv("SCRAPE_TOOL_TIMEOUT_SECONDS", "60"))
+            self.tool_max_concurrency: int = int(os.getenv("TOOL_MAX_CONCURRENCY", "16"))
+            self.scrape_tool_max_concurrency: int = int(os.getenv("SCRAPE_TOOL_MAX_CONCURRENCY", "4"))
+            # Presupuesto de tokens del resultado de cada tool dentro del prompt
+            self.tool_result_max_tokens: int = int(os.getenv("TOOL_RESULT_MAX_TOKENS", "1500"))
+            # Pool de navegadores headless para el scraping del catálogo
+            self.scraper_browser_pool_size: int = int(os.getenv("SCRAPER_BROWSER_POOL_SIZE", "3"))
+            self.scraper_navigation_timeout_seconds: float = float(os.getenv("SCRAPER_NAVIGATION_TIMEOUT_SECONDS", "20"))
+            # Confianza mínima del parser HTML para no recurrir a la extracción con LLM
+            self.scraper_min_parser_confidence: float = float(os.getenv("SCRAPER_MIN_PARSER_CONFIDENCE", "0.8"))
+            # Caché de productos por URL del catálogo (TTL + ventana stale-while-revalidate)
+            self.catalog_cache_ttl_seconds: float = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "3600"))
+            self.catalog_cache_stale_seconds: float = float(os.getenv("CATALOG_CACHE_STALE_SECONDS", "21600"))
+            self.scrape_tool_max_products: int = int(os.getenv("SCRAPE_TOOL_MAX_PRODUCTS", "20"))
+            # Índice local del catálogo y su indexador periódico
+            self.catalog_index_path: str = os.getenv("CATALOG_INDEX_PATH", os.path.join(DATA_DIR, "catalog_index.db"))
+            self.catalog_indexer_enabled: bool = os.getenv("CATALOG_INDEXER_ENABLED", "true").lower() == "true"
+            # Arranque rápido (autoscaling): sin navegador precalentado y con la primera
+            # pasada del indexador diferida; el servicio no sale a la red al iniciar
+            self.fast_startup: bool = os.getenv("FAST_STARTUP", "false").lower() == "true"
+            self.catalog_indexer_startup_delay_seconds: float = float(os.getenv("CATALOG_INDEXER_STARTUP_DELAY_SECONDS", "120"))
+            # Calentamiento de conexiones al iniciar (TLS + metadatos de Cosmos, Search y
+            # Azure OpenAI); en arranque rápido corre en segundo plano
+            self.startup_warmup_enabled: bool = os.getenv("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+            self.startup_warmup_timeout_seconds: float = float(os.getenv("STARTUP_WARMUP_TIMEOUT_SECONDS", "15"))
+            self.catalog_index_interval_seconds: float = float(os.getenv("CATALOG_INDEX_INTERVAL_SECONDS", "21600"))
+            self.catalog_index_max_age_seconds: float = float(os.getenv("CATALOG_INDEX_MAX_AGE_SECONDS", "86400"))
+            # Búsqueda semántica de productos (embeddings en memoria, opcionalmente en int8)
+            self.catalog_vector_search_enabled: bool = os.getenv("CATALOG_VECTOR_SEARCH_ENABLED", "true").lower() == "true"
+            self.catalog_vector_quantize: bool = os.getenv("CATALOG_VECTOR_QUANTIZE", "false").lower() == "true"
+            self.catalog_vector_query_cache_size: int = int(os.getenv("CATALOG_VECTOR_QUERY_CACHE_SIZE", "1000"))
+            # Router de deployments: hedge tras el p95 y circuit breaker por deployment
+            self.llm_hedge_percentile: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+            self.llm_hedge_min_samples: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+            self.llm_hedge_min_delay_seconds: float = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1.0"))
+            self.llm_breaker_failures: int = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+            self.llm_breaker_cooldown_seconds: float = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+            # Fast path: saludos y turnos que solo definen género/categoría no usan el modelo grande
+            self.fast_path_enabled: bool = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+            # Caché semántica de respuestas a preguntas generales (sin tools ni documentos)
+            self.response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+            self.response_cache_similarity: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+            self.response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+            self.response_cache_max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+            self.response_cache_min_chars: int = int(os.getenv("RESPONSE_CACHE_MIN_CHARS", "12"))
+            # Precarga especulativa del catálogo mientras se espera la confirmación del cliente
+            self.catalog_prefetch_enabled: bool = os.getenv("CATALOG_PREFETCH_ENABLED", "true").lower() == "true"
+            self.catalog_prefetch_max_inflight: int = int(os.getenv("CATALOG_PREFETCH_MAX_INFLIGHT", "4"))
+            self.catalog_prefetch_ttl_seconds: float = float(os.getenv("CATALOG_PREFETCH_TTL_SECONDS", "300"))
+
     def __init__(self):
         self.app_name: str = "CHAT GPK"
         self.admin_email: str = "admin@example.com"
         self.ai_services: Settings.AzureServices = Settings.AzureServices()
         self.db_services: Settings.DBServices = Settings.DBServices()
+        self.agent_services: Settings.AgentServices = Settings.AgentServices()
 
 settings = Settings()
\ No newline at end of file
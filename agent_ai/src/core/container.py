@@ -0,0 +1,153 @@
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from azure.cosmos.aio import CosmosClient
+
+from core.config import settings
+from core.metrics import metrics
+from core.schema_services import AzureServices
+
+
+class ServiceContainer:
+    """
+    Clientes de Azure compartidos por todo el proceso.
+
+    Cada servicio se construye una sola vez, al primer acceso, y todos los módulos
+    usan la misma instancia: un solo CosmosClient (pool de conexiones) para el
+    historial y el inventario, un AzureAiSearch y el cliente de Azure OpenAI del
+    LLMRegistry. Su ciclo de vida lo maneja el lifespan de FastAPI: warmup() al
+    iniciar (TLS y cachés de metadatos) y close() al apagar.
+    """
+
+    def __init__(self):
+        self._services: dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                if name not in self._services:
+                    self._services[name] = factory()
+                service = self._services[name]
+        return service
+
+    @property
+    def cosmos_client(self) -> CosmosClient:
+        return self._get("cosmos_client", lambda: CosmosClient(
+            settings.db_services.azure_cosmos_db_endpoint,
+            settings.db_services.azure_cosmos_db_api_key
+        ))
+
+    @property
+    def cosmos(self) -> "AzureServices.CosmosDBClient":
+        return self._get("cosmos", lambda: AzureServices.CosmosDBClient(client=self.cosmos_client))
+
+    @property
+    def inventory(self) -> "AzureServices.AsyncInventoryManager":
+        return self._get("inventory", lambda: AzureServices.AsyncInventoryManager(client=self.cosmos_client))
+
+    @property
+    def search(self) -> "AzureServices.AzureAiSearch":
+        return self._get("search", AzureServices.AzureAiSearch)
+
+    @property
+    def pdf_processor(self) -> "AzureServices.PdfProcessor":
+        return self._get("pdf_processor", lambda: AzureServices.PdfProcessor(azure_ai_search_service=self.search))
+
+    @property
+    def openai(self) -> "AzureServices.AzureOpenAI":
+        return AzureServices.LLMRegistry.get_openai_service()
+
+    async def warmup(self, timeout: Optional[float] = None) -> dict:
+        """
+        Calienta en paralelo las conexiones de los servicios. Un fallo no impide el
+        arranque: se registra y el servicio se conecta en el primer request.
+        Retorna {servicio: ms o "error: ..."}.
+        """
+        timeout = timeout or settings.agent_services.startup_warmup_timeout_seconds
+        steps = {
+            "cosmos": lambda: self.cosmos.warmup(),
+            "search": lambda: self.search.warmup(settings.ai_services.azure_search_index_name),
+            "openai": lambda: self.openai.warmup(),
+        }
+
+        async def run(name: str, step: Callable) -> Any:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(step(), timeout=timeout)
+            except Exception as e:
+                logging.warning("No se pudo calentar %s: %s", name, str(e) or type(e).__name__)
+                metrics.incr(f"startup.warmup.{name}.errors")
+                return f"error: {str(e) or type(e).__name__}"
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            metrics.observe(f"startup.warmup.{name}_ms", elapsed_ms)
+            return elapsed_ms
+
+        results = dict(zip(steps, await asyncio.gather(*[run(name, step) for name, step in steps.items()])))
+        logging.info("Warmup de servicios: %s", results)
+        return results
+
+    async def close(self):
+        """
+        Cierra los clientes construidos (el CosmosClient compartido al final).
+        """
+        with self._lock:
+            services, self._services = self._services, {}
+        closers = {"search": services["search"].close} if "search" in services else {}
+        closers["openai"] = AzureServices.LLMRegistry.close
+        if "cosmos_client" in services:
+            closers["cosmos_client"] = services["cosmos_client"].close
+        for name, close in closers.items():
+            try:
+                await close()
+            except Exception as e:
+                logging.warning("Error cerrando %s: %s", name, str(e))
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        """
+        Lifespan de FastAPI: warmup de conexiones, navegador headless e indexador
+        del catálogo al iniciar; todo se detiene y cierra al apagar.
+        """
+        # Imports diferidos: el contenedor no depende del scraper
+        from inference.catalog.scraper import browser_pool
+        from inference.catalog.indexer import catalog_indexer
+
+        agent_settings = settings.agent_services
+        warmup_task = None
+        if agent_settings.startup_warmup_enabled:
+            if agent_settings.fast_startup:
+                # Arranque rápido: el servicio acepta requests mientras se calienta
+                warmup_task = asyncio.create_task(self.warmup())
+            else:
+                await self.warmup()
+        # Lanzar el navegador headless antes del primer scrape (evita el arranque en frío).
+        # Si falla, el pool se vuelve a intentar iniciar en el primer scrape. En arranque
+        # rápido se omite: el navegador se lanza en el primer scrape.
+        if not agent_settings.fast_startup:
+            try:
+                await browser_pool.start()
+            except Exception as e:
+                logging.warning("No se pudo iniciar el pool de navegadores: %s", str(e))
+        # Indexación periódica del catálogo en segundo plano
+        if agent_settings.catalog_indexer_enabled:
+            catalog_indexer.start(
+                initial_delay=agent_settings.catalog_indexer_startup_delay_seconds if agent_settings.fast_startup else 0.0
+            )
+        print("Aplicación iniciada")
+        try:
+            yield
+        finally:
+            if warmup_task is not None and not warmup_task.done():
+                warmup_task.cancel()
+            await catalog_indexer.stop()
+            await browser_pool.close()
+            await self.close()
+
+
+services = ServiceContainer()
@@ -0,0 +1,109 @@
+from collections import defaultdict
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import logging
+import time
+
+from core.metrics import metrics
+
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """
+    Se agotó el presupuesto de tiempo del turno (no solo el timeout de la etapa).
+    """
+
+
+class Deadline:
+    """
+    Presupuesto de tiempo de un turno, compartido por todas sus etapas (Cosmos,
+    LLM, tools). Viaja en el estado del grafo: cada etapa corre con el tiempo que
+    queda (acotado por su propio timeout, si tiene) y registra cuánto consumió.
+
+    Las etapas concurrentes (tools en paralelo) se cuentan por separado, así que la
+    suma de los tiempos puede superar el total del turno.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+        self.exceeded_stages: list[str] = []
+        self._stages: dict[str, float] = defaultdict(float)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def timeout(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Tiempo disponible para una etapa: lo que queda del turno menos `reserve`
+        (tiempo guardado para etapas posteriores), acotado por `cap`.
+        """
+        available = max(0.0, self.remaining() - reserve)
+        return min(cap, available) if cap is not None else available
+
+    async def run(self, stage: str, awaitable: Awaitable[T], cap: Optional[float] = None, reserve: float = 0.0) -> T:
+        """
+        Ejecuta `awaitable` con el tiempo disponible. Si se agota lanza
+        DeadlineExceeded cuando el límite fue el del turno, o asyncio.TimeoutError
+        cuando fue el `cap` propio de la etapa.
+        """
+        timeout = self.timeout(cap, reserve)
+        start = time.monotonic()
+        try:
+            if timeout <= 0:
+                if asyncio.iscoroutine(awaitable):
+                    awaitable.close()
+                raise asyncio.TimeoutError()
+            return await asyncio.wait_for(awaitable, timeout=timeout)
+        except asyncio.TimeoutError:
+            if cap is not None and timeout >= cap:
+                raise
+            self.exceeded_stages.append(stage)
+            raise DeadlineExceeded(f"Sin presupuesto de tiempo para '{stage}'")
+        finally:
+            self.record(stage, time.monotonic() - start)
+
+    def record(self, stage: str, seconds: float):
+        self._stages[stage] += seconds
+
+    def report(self) -> dict:
+        """
+        {"elapsed_ms", "budget_ms", "stages": {etapa: {"ms", "share"}}}; share es la
+        fracción del tiempo total del turno.
+        """
+        elapsed = self.elapsed()
+        return {
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "budget_ms": round(self.budget_seconds * 1000, 1),
+            "stages": {
+                stage: {"ms": round(seconds * 1000, 1), "share": round(seconds / elapsed, 3) if elapsed else 0.0}
+                for stage, seconds in self._stages.items()
+            }
+        }
+
+    def log(self, label: str):
+        report = self.report()
+        for stage, values in report["stages"].items():
+            metrics.observe(f"turn.stage.{stage}_ms", values["ms"])
+        metrics.observe("turn.ms", report["elapsed_ms"])
+        if self.exceeded_stages:
+            metrics.incr("turn.deadline_exceeded")
+        shares = ", ".join(
+            f"{stage} {values['ms']:.0f} ms ({values['share']:.0%})"
+            for stage, values in sorted(report["stages"].items(), key=lambda item: -item[1]["ms"])
+        )
+        logging.info(
+            "Turno %s: %.0f ms de %.0f ms | %s%s",
+            label, report["elapsed_ms"], report["budget_ms"], shares or "sin etapas",
+            f" | presupuesto agotado en: {', '.join(self.exceeded_stages)}" if self.exceeded_stages else ""
+        )
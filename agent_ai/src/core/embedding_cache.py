@@ -0,0 +1,126 @@
+from typing import Optional
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from core.config import settings
+from core.metrics import metrics
+
+
+class EmbeddingCache:
+    """
+    Caché persistente de embeddings direccionada por contenido (SQLite en disco).
+
+    La clave es sha256(modelo + texto), sin usuario ni conversación: el mismo chunk
+    subido en otra conversación (el mismo catálogo PDF o lista de precios) reutiliza
+    su embedding sin llamar a la API. Es el único almacén de embeddings del proceso:
+    lo comparten los documentos (EmbeddingBatcher) y los productos del catálogo
+    (ProductVectorIndex). El tamaño total se acota con `max_bytes`: al superarlo se
+    eliminan las entradas usadas hace más tiempo (LRU) hasta bajar al 90 % del límite.
+
+    La base se abre en el primer uso, no al importar el módulo.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        agent_settings = settings.agent_services
+        self.path = path or agent_settings.embedding_cache_path
+        self.max_bytes = max_bytes or agent_settings.embedding_cache_max_mb * 1024 * 1024
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+        metrics.gauge("embedding_cache.bytes", self._total_bytes)
+        return conn
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """
+        Retorna los embeddings guardados para `keys` (los que existan) y marca su uso.
+        """
+        found = {}
+        now = time.time()
+        conn = self._connection()
+        with self._lock, conn:
+            # Por lotes para no superar el límite de parámetros de SQLite
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update({key: np.frombuffer(vector, dtype=np.float32).tolist() for key, vector in rows})
+                if rows:
+                    conn.execute(
+                        f"UPDATE embedding_cache SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                        [now] + [key for key, _ in rows]
+                    )
+        return found
+
+    def put_many(self, vectors: dict[str, list[float]]) -> None:
+        now = time.time()
+        conn = self._connection()
+        with self._lock, conn:
+            for key, vector in vectors.items():
+                blob = np.asarray(vector, dtype=np.float32).tobytes()
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO embedding_cache (key, vector, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), now)
+                ).rowcount
+                if inserted:
+                    self._total_bytes += len(blob)
+            if self._total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+        metrics.gauge("embedding_cache.bytes", self._total_bytes)
+
+    def _evict(self, target_bytes: int) -> None:
+        # Se llama con el lock tomado y dentro de la transacción de put_many
+        conn = self._conn
+        evicted = 0
+        while self._total_bytes > target_bytes:
+            rows = conn.execute(
+                "SELECT key, size FROM embedding_cache ORDER BY last_used LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                if self._total_bytes <= target_bytes:
+                    break
+                victims.append(key)
+                self._total_bytes -= size
+            conn.executemany("DELETE FROM embedding_cache WHERE key = ?", [(key,) for key in victims])
+            evicted += len(victims)
+        metrics.incr("embedding_cache.evictions", evicted)
+
+
+embedding_cache = EmbeddingCache()
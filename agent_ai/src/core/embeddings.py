@@ -0,0 +1,132 @@
+from typing import Any, Optional
+import asyncio
+import logging
+import random
+import time
+
+from core.config import settings
+from core.embedding_cache import EmbeddingCache
+from core.http_errors import retry_after, status_code
+from core.metrics import metrics
+
+
+class EmbeddingBatcher:
+    """
+    Calcula embeddings de muchos textos en lotes concurrentes, sin bloquear el
+    event loop.
+
+    - Lotes de hasta `batch_size` textos y `max_batch_tokens` tokens (límites de
+      entrada de la API de embeddings).
+    - Máximo `max_concurrency` lotes en vuelo por proceso (el batcher se comparte).
+    - Un 429 pausa todos los lotes durante el retry-after indicado por Azure y el
+      lote se reintenta con backoff exponencial, hasta `max_retries` veces.
+    - Con `cache` (EmbeddingCache) solo se envían a la API los textos que no estén
+      en caché para `model_name`; los textos repetidos se calculan una vez.
+    """
+
+    def __init__(
+        self,
+        embeddings: Any,
+        cache: Optional[EmbeddingCache] = None,
+        model_name: str = "",
+        batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_seconds: float = 1.0
+    ):
+        agent_settings = settings.agent_services
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+        self.batch_size = batch_size or agent_settings.embedding_batch_size
+        self.max_batch_tokens = max_batch_tokens or agent_settings.embedding_batch_max_tokens
+        self.max_retries = max_retries if max_retries is not None else agent_settings.embedding_max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency or agent_settings.embedding_max_concurrency)
+        self._paused_until = 0.0
+
+    def batches(self, texts: list[str], token_counts: Optional[list[int]] = None) -> list[list[int]]:
+        """
+        Agrupa los índices de `texts` en lotes que respetan ambos límites.
+        """
+        token_counts = token_counts or [len(text) // 4 + 1 for text in texts]
+        batches, current, current_tokens = [], [], 0
+        for i, tokens in enumerate(token_counts):
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: list[str], token_counts: Optional[list[int]] = None) -> list[list[float]]:
+        """
+        Retorna los embeddings en el mismo orden de `texts`.
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return await self._embed_all(texts, token_counts)
+
+        keys = [EmbeddingCache.key(self.model_name, text) for text in texts]
+        found = await asyncio.to_thread(self.cache.get_many, list(set(keys)))
+        # Un solo cálculo por texto distinto que no esté en caché
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in found and key not in missing:
+                missing[key] = i
+        if missing:
+            indexes = list(missing.values())
+            computed = await self._embed_all(
+                [texts[i] for i in indexes],
+                [token_counts[i] for i in indexes] if token_counts else None
+            )
+            new_vectors = dict(zip(missing, computed))
+            await asyncio.to_thread(self.cache.put_many, new_vectors)
+            found.update(new_vectors)
+
+        hits = len(texts) - len(missing)
+        metrics.incr("embeddings.cache_hits", hits)
+        metrics.incr("embeddings.cache_misses", len(missing))
+        total = metrics.counter("embeddings.cache_hits") + metrics.counter("embeddings.cache_misses")
+        metrics.gauge("embeddings.cache_hit_rate", round(metrics.counter("embeddings.cache_hits") / total, 4))
+        return [found[key] for key in keys]
+
+    async def _embed_all(self, texts: list[str], token_counts: Optional[list[int]] = None) -> list[list[float]]:
+        vectors: list = [None] * len(texts)
+
+        async def run(batch: list[int]):
+            for i, vector in zip(batch, await self._embed_batch([texts[i] for i in batch])):
+                vectors[i] = vector
+
+        await asyncio.gather(*[run(batch) for batch in self.batches(texts, token_counts)])
+        metrics.incr("embeddings.texts", len(texts))
+        return vectors
+
+    async def _embed_batch(self, batch: list[str]) -> list[list[float]]:
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                start = time.perf_counter()
+                try:
+                    vectors = await self.embeddings.aembed_documents(batch)
+                    metrics.incr("embeddings.batches")
+                    metrics.observe("embeddings.batch_ms", (time.perf_counter() - start) * 1000)
+                    return vectors
+                except Exception as e:
+                    if status_code(e) != 429 or attempt >= self.max_retries:
+                        metrics.incr("embeddings.errors")
+                        raise
+                    attempt += 1
+                    backoff = self.retry_base_seconds * 2 ** (attempt - 1) * (1 + random.random() / 2)
+                    wait = max(retry_after(e, backoff), backoff)
+                    # Todos los lotes esperan: seguir enviando solo alargaría el throttling
+                    self._paused_until = max(self._paused_until, time.monotonic() + wait)
+                    metrics.incr("embeddings.throttled")
+                    logging.warning("Embeddings limitados (429); reintento %s en %.1fs", attempt, wait)
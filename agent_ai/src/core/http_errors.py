@@ -0,0 +1,43 @@
+from typing import Optional
+import asyncio
+
+
+# Errores de transporte de los SDK (openai, httpx) que no traen status HTTP
+TRANSIENT_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "TimeoutException", "TransportError"}
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """
+    Status HTTP de un error de los SDK (openai, httpx, azure), si lo trae.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+
+def retry_after(error: Exception, default: float) -> float:
+    """
+    Segundos del header retry-after de la respuesta (o `default`).
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", default))
+    except (TypeError, ValueError):
+        return default
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    True si el error es del servicio y no de la petición: 429, 5xx, timeouts y
+    errores de conexión. Un 4xx (petición inválida, filtro de contenido, contexto
+    demasiado largo) fallaría igual al reintentar o en otro deployment.
+    """
+    status = status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return (
+        isinstance(error, (asyncio.TimeoutError, ConnectionError))
+        or any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+    )
@@ -0,0 +1,390 @@
+from collections import deque
+from typing import Any, Deque, Optional
+import asyncio
+import logging
+import time
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from core.http_errors import is_transient, retry_after, status_code
+from core.metrics import metrics, _percentile
+
+
+class _FirstTokenSignal(AsyncCallbackHandler):
+    """
+    Marca el momento del primer token que la llamada principal envía por streaming.
+    """
+
+    def __init__(self):
+        self.at: Optional[float] = None
+        self._event = asyncio.Event()
+
+    @property
+    def received(self) -> bool:
+        return self._event.is_set()
+
+    async def wait(self):
+        await self._event.wait()
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.at is None:
+            self.at = time.perf_counter()
+            self._event.set()
+
+
+def _callback_handlers(config: Optional[dict]) -> list:
+    callbacks = (config or {}).get("callbacks")
+    if callbacks is None:
+        return []
+    return list(getattr(callbacks, "handlers", callbacks))
+
+
+def _is_streaming(config: Optional[dict]) -> bool:
+    """
+    True si algún callback consume los tokens (el handler del stream_mode "messages"
+    de LangGraph): es la misma condición con la que el modelo decide hacer streaming.
+    """
+    return any(hasattr(handler, "tap_output_aiter") for handler in _callback_handlers(config))
+
+
+def _with_handler(config: Optional[dict], handler: Any) -> dict:
+    callbacks = (config or {}).get("callbacks")
+    if callbacks is None or isinstance(callbacks, list):
+        callbacks = (callbacks or []) + [handler]
+    else:
+        # CallbackManager de LangGraph: se copia para no modificar el del grafo
+        callbacks = callbacks.copy()
+        callbacks.add_handler(handler, inherit=False)
+    return {**(config or {}), "callbacks": callbacks}
+
+
+class Deployment:
+    """
+    Estado de un deployment (o endpoint) de chat para el router.
+
+    - Tokens consumidos en el último minuto frente a su límite de TPM.
+    - Latencias recientes (EWMA para elegir, p95 para decidir el hedge) y, para
+      las llamadas con streaming, tiempos al primer token.
+    - Circuit breaker: tras `breaker_failures` errores seguidos queda abierto
+      `breaker_cooldown_seconds`; pasado ese tiempo recibe una llamada de prueba
+      (half-open) y un éxito lo cierra.
+    - Un 429 lo saca de la rotación durante el retry-after indicado por Azure.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        tpm_limit: Optional[int] = None,
+        breaker_failures: int = 3,
+        breaker_cooldown_seconds: float = 30.0,
+        max_samples: int = 200
+    ):
+        self.name = name
+        self.model = model
+        self.tpm_limit = tpm_limit
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown_seconds = breaker_cooldown_seconds
+        self.inflight = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.throttled_until = 0.0
+        self.ewma_ms: Optional[float] = None
+        self._tokens: Deque[tuple[float, int]] = deque()
+        self._latencies: Deque[float] = deque(maxlen=max_samples)
+        self._first_token_latencies: Deque[float] = deque(maxlen=max_samples)
+
+    def tokens_last_minute(self, now: float) -> int:
+        while self._tokens and now - self._tokens[0][0] > 60:
+            self._tokens.popleft()
+        return sum(tokens for _, tokens in self._tokens)
+
+    def headroom(self, now: float) -> float:
+        """
+        Fracción libre del TPM (1.0 si no tiene límite configurado).
+        """
+        if not self.tpm_limit:
+            return 1.0
+        return max(0.0, 1 - self.tokens_last_minute(now) / self.tpm_limit)
+
+    def fits(self, tokens: int, now: float) -> bool:
+        return not self.tpm_limit or self.tokens_last_minute(now) + tokens <= self.tpm_limit
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.open_until and now >= self.throttled_until
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        return _percentile(sorted(self._latencies), q)
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def first_token_percentile(self, q: float) -> Optional[float]:
+        if not self._first_token_latencies:
+            return None
+        return _percentile(sorted(self._first_token_latencies), q)
+
+    @property
+    def first_token_samples(self) -> int:
+        return len(self._first_token_latencies)
+
+    def record_first_token(self, latency_ms: float):
+        self._first_token_latencies.append(latency_ms)
+
+    def begin_call(self, tokens: int):
+        """
+        Reserva los tokens estimados y cuenta la llamada en curso. Si el breaker
+        estaba abierto, esta es la llamada de prueba (half-open): se vuelve a
+        cerrar el paso a las demás hasta conocer su resultado.
+        """
+        self._tokens.append((time.monotonic(), tokens))
+        self.inflight += 1
+        if self.consecutive_failures >= self.breaker_failures:
+            self.open_until = time.monotonic() + self.breaker_cooldown_seconds
+
+    def end_call(self):
+        self.inflight -= 1
+
+    def record_success(self, latency_ms: float, estimated_tokens: int, actual_tokens: Optional[int]):
+        self._latencies.append(latency_ms)
+        self.ewma_ms = latency_ms if self.ewma_ms is None else 0.8 * self.ewma_ms + 0.2 * latency_ms
+        if actual_tokens is not None and actual_tokens != estimated_tokens:
+            # Corrige la reserva hecha con la estimación por el consumo real
+            self._tokens.append((time.monotonic(), actual_tokens - estimated_tokens))
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.breaker_failures:
+            if not self.is_open:
+                metrics.incr(f"llm.router.{self.name}.breaker_opened")
+                logging.warning(
+                    "Circuit breaker abierto para el deployment %s (%s errores seguidos)",
+                    self.name, self.consecutive_failures
+                )
+            self.open_until = time.monotonic() + self.breaker_cooldown_seconds
+
+    def record_throttle(self, retry_after_seconds: float):
+        self.throttled_until = time.monotonic() + retry_after_seconds
+
+
+class LLMRouter:
+    """
+    Reparte las llamadas de chat entre varios deployments de Azure OpenAI.
+
+    Cada llamada va al deployment con mejor puntaje entre los disponibles (breaker
+    cerrado, sin 429 vigente y con TPM suficiente): latencia EWMA × (1 + llamadas en
+    curso) / headroom de TPM. Si la llamada no termina antes del p95 de ese deployment
+    se lanza una copia (hedge) en el siguiente y gana la primera que responda. Con
+    streaming el hedge solo compite antes del primer token: se lanza según el p95 del
+    tiempo al primer token y se cancela en cuanto la principal empieza a enviar texto
+    (el cliente ya está viendo esa respuesta). Si
+    falla (429, 5xx, timeout o error de conexión) se reintenta en el siguiente
+    deployment. Los demás errores (4xx) se propagan sin reintentar ni contar para
+    el breaker: son de la petición, no del deployment.
+
+    Los modelos son inyectables (cualquier objeto con `ainvoke(messages, config=None)`
+    y, para tools, `bind_tools`), de modo que se puede probar con endpoints falsos.
+    El hedge se ejecuta sin callbacks para no duplicar tokens en el streaming.
+    """
+
+    def __init__(
+        self,
+        deployments: list[Deployment],
+        hedge_percentile: float = 95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay_seconds: float = 1.0,
+        throttle_default_seconds: float = 10.0,
+        models: Optional[dict[str, Any]] = None
+    ):
+        if not deployments:
+            raise ValueError("El router necesita al menos un deployment")
+        self.deployments = deployments
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay_seconds = hedge_min_delay_seconds
+        self.throttle_default_seconds = throttle_default_seconds
+        self._models = models or {deployment.name: deployment.model for deployment in deployments}
+
+    def bind_tools(self, tools: list) -> "LLMRouter":
+        """
+        Router con `tools` enlazadas en cada deployment; comparte el estado
+        (TPM, latencias, breakers) con este router.
+        """
+        return LLMRouter(
+            self.deployments,
+            hedge_percentile=self.hedge_percentile,
+            hedge_min_samples=self.hedge_min_samples,
+            hedge_min_delay_seconds=self.hedge_min_delay_seconds,
+            throttle_default_seconds=self.throttle_default_seconds,
+            models={name: model.bind_tools(tools) for name, model in self._models.items()}
+        )
+
+    @staticmethod
+    def estimate_tokens(messages: Any) -> int:
+        """
+        Estimación barata del consumo de una llamada (~4 caracteres por token + salida).
+        """
+        items = messages if isinstance(messages, list) else [messages]
+        chars = sum(len(str(getattr(item, "content", item))) for item in items)
+        return chars // 4 + 500
+
+    def rank(self, estimated_tokens: int) -> list[Deployment]:
+        now = time.monotonic()
+        available = [d for d in self.deployments if d.is_available(now)]
+        if not available:
+            # Todos abiertos o limitados: se intenta primero el que se libera antes
+            metrics.incr("llm.router.no_available")
+            return sorted(self.deployments, key=lambda d: max(d.open_until, d.throttled_until))
+
+        def score(deployment: Deployment) -> tuple[bool, float]:
+            latency = deployment.ewma_ms or 0.0
+            return (
+                not deployment.fits(estimated_tokens, now),
+                latency * (1 + deployment.inflight) / max(deployment.headroom(now), 0.05)
+            )
+
+        return sorted(available, key=score)
+
+    async def ainvoke(self, messages: Any, config: Optional[dict] = None, **kwargs) -> Any:
+        estimated_tokens = self.estimate_tokens(messages)
+        candidates = self.rank(estimated_tokens)
+        last_error: Optional[Exception] = None
+        while candidates:
+            primary = candidates.pop(0)
+            try:
+                return await self._invoke_with_hedge(primary, candidates, messages, estimated_tokens, config, kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    metrics.incr("llm.router.client_errors")
+                    raise
+                last_error = e
+                if candidates:
+                    metrics.incr("llm.router.failovers")
+                    logging.warning("Deployment %s falló (%s); se reintenta en otro", primary.name, str(e))
+        raise last_error
+
+    def _hedge_delay(self, deployment: Deployment, streaming: bool = False) -> Optional[float]:
+        if streaming:
+            samples, percentile = deployment.first_token_samples, deployment.first_token_percentile
+        else:
+            samples, percentile = deployment.samples, deployment.latency_percentile
+        if samples < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay_seconds, percentile(self.hedge_percentile) / 1000)
+
+    async def _invoke_with_hedge(
+        self,
+        primary: Deployment,
+        candidates: list[Deployment],
+        messages: Any,
+        estimated_tokens: int,
+        config: Optional[dict],
+        kwargs: dict
+    ) -> Any:
+        first_token = _FirstTokenSignal() if _is_streaming(config) else None
+        primary_task = self._start(
+            primary, messages, estimated_tokens,
+            _with_handler(config, first_token) if first_token is not None else config,
+            kwargs, first_token
+        )
+        tasks = {primary_task}
+        watcher: Optional[asyncio.Task] = None
+        try:
+            delay = self._hedge_delay(primary, streaming=first_token is not None)
+            if delay is None or not candidates:
+                return await primary_task
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary_task.result()
+            if first_token is not None and first_token.received:
+                # La principal ya está enviando texto: no se reemplaza a mitad de respuesta
+                metrics.incr("llm.router.hedges_skipped")
+                return await primary_task
+
+            backup = candidates.pop(0)
+            metrics.incr("llm.router.hedges")
+            # La copia corre sin callbacks: el streaming solo muestra la llamada principal
+            hedge_task = self._start(backup, messages, estimated_tokens, {**(config or {}), "callbacks": []}, kwargs)
+            tasks.add(hedge_task)
+            if first_token is not None:
+                watcher = asyncio.create_task(first_token.wait())
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks | ({watcher} if watcher is not None else set()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if watcher is not None and watcher in done:
+                    watcher = None
+                    if hedge_task in tasks and primary_task in tasks:
+                        hedge_task.cancel()
+                        tasks.discard(hedge_task)
+                        metrics.incr("llm.router.hedges_cancelled")
+                for task in done & tasks:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            metrics.incr("llm.router.hedge_wins")
+                        return task.result()
+            raise primary_task.exception()
+        finally:
+            for task in tasks | ({watcher} if watcher is not None else set()):
+                if not task.done():
+                    task.cancel()
+
+    def _start(
+        self,
+        deployment: Deployment,
+        messages: Any,
+        estimated_tokens: int,
+        config: Optional[dict],
+        kwargs: dict,
+        first_token: Optional[_FirstTokenSignal] = None
+    ) -> asyncio.Task:
+        # La reserva es síncrona para que las llamadas siguientes ya la vean al elegir.
+        # Se libera al terminar la tarea, aunque se cancele antes de empezar a correr
+        deployment.begin_call(estimated_tokens)
+        task = asyncio.create_task(self._call(deployment, messages, estimated_tokens, config, kwargs, first_token))
+        task.add_done_callback(lambda _: deployment.end_call())
+        return task
+
+    async def _call(
+        self,
+        deployment: Deployment,
+        messages: Any,
+        estimated_tokens: int,
+        config: Optional[dict],
+        kwargs: dict,
+        first_token: Optional[_FirstTokenSignal] = None
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            response = await self._models[deployment.name].ainvoke(messages, config=config, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if status_code(e) == 429:
+                metrics.incr(f"llm.router.{deployment.name}.throttled")
+                deployment.record_throttle(retry_after(e, self.throttle_default_seconds))
+            elif is_transient(e):
+                metrics.incr(f"llm.router.{deployment.name}.errors")
+                deployment.record_failure()
+            raise
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        usage = getattr(response, "usage_metadata", None) or {}
+        deployment.record_success(latency_ms, estimated_tokens, usage.get("total_tokens"))
+        if first_token is not None and first_token.at is not None:
+            deployment.record_first_token((first_token.at - start) * 1000)
+        metrics.incr(f"llm.router.{deployment.name}.calls")
+        metrics.observe(f"llm.router.{deployment.name}.ms", latency_ms)
+        metrics.gauge(f"llm.router.{deployment.name}.headroom", round(deployment.headroom(time.monotonic()), 3))
+        return response
@@ -0,0 +1,77 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict
+import threading
+
+
+def _percentile(ordered: list, q: float) -> float:
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Metrics:
+    """
+    Registro de métricas en memoria del proceso.
+
+    - Contadores (incr): eventos acumulados (hits de caché, llamadas ahorradas, etc.).
+    - Observaciones (observe): valores como latencias en ms; se conservan las
+      últimas `max_samples` muestras para calcular percentiles.
+    - Gauges (gauge): último valor de una magnitud (tasa de hits, entradas en caché...).
+    """
+
+    def __init__(self, max_samples: int = 1000):
+        self._max_samples = max_samples
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._samples: Dict[str, Deque[float]] = {}
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self._max_samples)
+            self._samples[name].append(value)
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def percentile(self, name: str, q: float) -> float:
+        """
+        Percentil `q` (0-100) de las muestras de `name`, 0.0 si no hay muestras.
+        """
+        with self._lock:
+            values = sorted(self._samples.get(name, []))
+        if not values:
+            return 0.0
+        return _percentile(values, q)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            samples = {name: list(values) for name, values in self._samples.items()}
+
+        observations = {}
+        for name, values in samples.items():
+            ordered = sorted(values)
+            if not ordered:
+                continue
+            observations[name] = {
+                "count": len(ordered),
+                "avg": round(sum(ordered) / len(ordered), 3),
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "max": ordered[-1],
+            }
+        return {"counters": counters, "gauges": gauges, "observations": observations}
+
+
+metrics = Metrics()
@@ -6,6 +6,9 @@ from fastapi import UploadFile
 class ResponseHTTPChat(BaseModel):
     id: str
     text: str
+    # True si el mensaje se combinó con otro de la misma conversación; la
+    # respuesta ya fue entregada a la solicitud principal y no debe reenviarse.
+    coalesced: bool = False
 class ResponseHTTPStartConversation(BaseModel):
     user_id: str
     conversation_id: str
@@ -57,13 +60,13 @@ import logging
 from datetime import datetime
 
 # IMPORTANTE: Ajusta la siguiente línea para importar tu clase AsyncInventoryManager
-from core.schema_services import AzureServices
+from core.container import services
 # Suponemos que la clase AsyncInventoryManager está definida así:
 # class AsyncInventoryManager:
 #     ...
 
 # Instancia del administrador de inventario
-inventory_manager = AzureServices.AsyncInventoryManager()  # O bien: AsyncInventoryManager()
+inventory_manager = services.inventory  # CosmosClient compartido (core.container)
 
 # Definición de modelos Pydantic para las solicitudes y respuestas
 
@@ -4,7 +4,14 @@ from azure.core.credentials import AzureKeyCredential
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
 import pdb
 import asyncio
+import threading
+import time
+import httpx
 from core.config import settings
+from core.metrics import metrics
+from core.llm_router import Deployment, LLMRouter
+from core.embeddings import EmbeddingBatcher
+from core.embedding_cache import embedding_cache
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
 import tiktoken
@@ -15,7 +22,6 @@ from io import BytesIO
 from azure.search.documents.indexes.aio import SearchIndexClient
 # from azure.search.documents import SearchClient
 from azure.search.documents.aio import SearchClient
-import pandas as pd
 from azure.search.documents.indexes.models import (
     SearchIndex,
     SimpleField,
@@ -49,23 +55,155 @@ class AzureServices:
             api_key: str = settings.ai_services.azure_openai_api_key
             api_version: str = settings.ai_services.openai_api_version
             azure_endpoint: str = settings.ai_services.azure_openai_endpoint
+
+            # Pools HTTP con keep-alive compartidos por los tres clientes, para
+            # reutilizar conexiones TLS entre turnos en lugar de abrir nuevas.
+            limits = httpx.Limits(
+                max_connections=settings.agent_services.llm_http_max_connections,
+                max_keepalive_connections=settings.agent_services.llm_http_max_keepalive
+            )
+            self.http_client: httpx.Client = httpx.Client(limits=limits)
+            self.http_async_client: httpx.AsyncClient = httpx.AsyncClient(limits=limits)
+
             self._client_AzureOpenAI: AzureOpenAI = AzureOpenAI(
                 api_key = api_key, 
                 api_version = api_version,  
                 azure_endpoint = azure_endpoint,
+                http_client = self.http_client
             )
             self.model_ai: AzureChatOpenAI = AzureChatOpenAI(
                 api_key = api_key, 
                 openai_api_version = api_version,
                 azure_endpoint = azure_endpoint,
-                azure_deployment = settings.ai_services.model_gpt4o_name
+                azure_deployment = settings.ai_services.model_gpt4o_name,
+                http_client = self.http_client,
+                http_async_client = self.http_async_client
             )
+            # Modelo pequeño opcional para el fast path (None si no hay deployment)
+            self.model_fast: Optional[AzureChatOpenAI] = AzureChatOpenAI(
+                api_key = api_key, 
+                openai_api_version = api_version,
+                azure_endpoint = azure_endpoint,
+                azure_deployment = settings.ai_services.model_fast_name,
+                http_client = self.http_client,
+                http_async_client = self.http_async_client
+            ) if settings.ai_services.model_fast_name else None
             self.model_embeddings: AzureOpenAIEmbeddings = AzureOpenAIEmbeddings(
                 api_key = api_key, 
                 openai_api_version = api_version,
                 azure_endpoint = azure_endpoint,
-                azure_deployment = settings.ai_services.model_embeddings_name
+                azure_deployment = settings.ai_services.model_embeddings_name,
+                http_client = self.http_client,
+                http_async_client = self.http_async_client
             )
+
+        async def warmup(self):
+            """
+            Abre la conexión TLS con el endpoint en el pool keep-alive (sin consumir tokens).
+            """
+            await self.http_async_client.get(settings.ai_services.azure_openai_endpoint, timeout=10)
+
+        async def close(self):
+            await self.http_async_client.aclose()
+            self.http_client.close()
+
+    class LLMRegistry:
+        """
+        Registro de modelos compartido por todo el proceso.
+
+        Construye una sola vez el cliente de Azure OpenAI, el router de deployments
+        y el modelo con tools enlazadas (bind_tools), y los reutiliza en cada turno.
+        Cada reutilización suma a la métrica 'llm.registry.saved_ms' el tiempo de
+        construcción evitado.
+        """
+        _openai_service: Optional["AzureServices.AzureOpenAI"] = None
+        _router: Optional[LLMRouter] = None
+        _tool_models: Dict[tuple, Any] = {}
+        _build_ms: Dict[Any, float] = {}
+        _lock = threading.RLock()
+
+        @classmethod
+        def get_openai_service(cls) -> "AzureServices.AzureOpenAI":
+            if cls._openai_service is None:
+                with cls._lock:
+                    if cls._openai_service is None:
+                        start = time.perf_counter()
+                        cls._openai_service = AzureServices.AzureOpenAI()
+                        cls._build_ms["openai_service"] = (time.perf_counter() - start) * 1000
+                        metrics.observe("llm.registry.build_ms", cls._build_ms["openai_service"])
+                        logging.info("Cliente Azure OpenAI construido en %.1f ms", cls._build_ms["openai_service"])
+            return cls._openai_service
+
+        @classmethod
+        def get_router(cls) -> LLMRouter:
+            """
+            Router de chat sobre el deployment principal (MODEL_GPT4o_NAME) y los
+            adicionales de AZURE_OPENAI_DEPLOYMENTS; todos comparten el pool HTTP.
+            """
+            if cls._router is None:
+                with cls._lock:
+                    if cls._router is None:
+                        service = cls.get_openai_service()
+                        agent_settings = settings.agent_services
+                        breaker = {
+                            "breaker_failures": agent_settings.llm_breaker_failures,
+                            "breaker_cooldown_seconds": agent_settings.llm_breaker_cooldown_seconds
+                        }
+                        deployments = [
+                            Deployment("default", service.model_ai, settings.ai_services.azure_openai_tpm, **breaker)
+                        ]
+                        for config in settings.ai_services.azure_openai_deployments:
+                            model = AzureChatOpenAI(
+                                api_key = config["api_key"],
+                                openai_api_version = config.get("api_version", settings.ai_services.openai_api_version),
+                                azure_endpoint = config["endpoint"],
+                                azure_deployment = config["deployment"],
+                                http_client = service.http_client,
+                                http_async_client = service.http_async_client
+                            )
+                            deployments.append(Deployment(config["name"], model, config.get("tpm"), **breaker))
+                        cls._router = LLMRouter(
+                            deployments,
+                            hedge_percentile=agent_settings.llm_hedge_percentile,
+                            hedge_min_samples=agent_settings.llm_hedge_min_samples,
+                            hedge_min_delay_seconds=agent_settings.llm_hedge_min_delay_seconds
+                        )
+                        logging.info("Router LLM con deployments: %s", [d.name for d in deployments])
+            return cls._router
+
+        @classmethod
+        async def close(cls):
+            """
+            Cierra el pool HTTP compartido y olvida los modelos construidos.
+            """
+            with cls._lock:
+                service, cls._openai_service = cls._openai_service, None
+                cls._router = None
+                cls._tool_models = {}
+            if service is not None:
+                await service.close()
+
+        @classmethod
+        def get_tool_model(cls, tools: list):
+            """
+            Retorna el modelo de chat con `tools` enlazadas, construyéndolo solo la
+            primera vez para esa combinación de tools.
+            """
+            key = tuple(getattr(tool, "__name__", getattr(tool, "name", str(tool))) for tool in tools)
+            model = cls._tool_models.get(key)
+            if model is not None:
+                metrics.incr("llm.registry.reuses")
+                metrics.incr("llm.registry.saved_ms", cls._build_ms[key])
+                return model
+
+            with cls._lock:
+                if key not in cls._tool_models:
+                    start = time.perf_counter()
+                    cls._tool_models[key] = cls.get_router().bind_tools(list(tools))
+                    # El ahorro por turno incluye construir los clientes y enlazar las tools
+                    cls._build_ms[key] = cls._build_ms["openai_service"] + (time.perf_counter() - start) * 1000
+                    metrics.incr("llm.registry.builds")
+            return cls._tool_models[key]
             
     class BlobStorage:
         """
@@ -103,7 +241,8 @@ class AzureServices:
                 download_stream = blob_client.download_blob()
                 excel_content = download_stream.readall()
                 
-                # Leer el contenido Excel en un DataFrame
+                # Leer el contenido Excel en un DataFrame (pandas se importa solo aquí)
+                import pandas as pd
                 df = pd.read_excel(BytesIO(excel_content))
                 
                 # Convertir el DataFrame a JSONL (una línea por registro)
@@ -325,7 +464,7 @@ class AzureServices:
                 return []
 
     class AsyncInventoryManager:
-        def __init__(self):
+        def __init__(self, client: Optional[CosmosClient] = None):
             """
             Inicializa la conexión a Cosmos DB para el inventario de restaurantes.
             """
@@ -334,7 +473,8 @@ class AzureServices:
             self.database_name = settings.db_services.azure_cosmos_db_name_inventory
             self.container_name = settings.db_services.azure_cosmos_db_container_name_inventory#"inventory"  # Nuevo contenedor
 
-            self.client = CosmosClient(self.endpoint, self.key)
+            # El CosmosClient (pool de conexiones) se comparte si se recibe uno
+            self.client = client or CosmosClient(self.endpoint, self.key)
             self.database = self.client.get_database_client(self.database_name)
             self.container = self.database.get_container_client(self.container_name)
 
@@ -395,10 +535,11 @@ class AzureServices:
 
 
     class CosmosDBClient:
-        def __init__(self):
+        def __init__(self, client: Optional[CosmosClient] = None):
             """
             Inicializa la conexión a Azure Cosmos DB.
             
+            :param client: CosmosClient compartido (si no se indica se crea uno propio).
             :param endpoint: URL del endpoint de Cosmos DB.
             :param key: Clave de autenticación para Cosmos DB.
             :param database_name: Nombre de la base de datos a utilizar.
@@ -409,17 +550,49 @@ class AzureServices:
             self.database_name: str = settings.db_services.azure_cosmos_db_name
             self.container_name: str = settings.db_services.azure_cosmos_db_container_name
             self.container_name_message_pairs: str = settings.db_services.azure_cosmos_db_container_name_message_pairs
+            self.container_name_summaries: str = settings.db_services.azure_cosmos_db_container_name_summaries
 
             try:
-                self.client = CosmosClient(self.endpoint, self.key)
+                self.client = client or CosmosClient(self.endpoint, self.key)
                 self.database = self.client.get_database_client(self.database_name)
                 self.container = self.database.get_container_client(self.container_name)
                 self.container_message_pairs=self.database.get_container_client(self.container_name_message_pairs)
+                self.container_summaries=self.database.get_container_client(self.container_name_summaries)
                 logging.info("Conexión a Cosmos DB establecida correctamente.")
             except CosmosHttpResponseError as e:
                 logging.exception("Error al conectar con Cosmos DB: %s", str(e))
                 raise
 
+        async def warmup(self):
+            """
+            Crea el contenedor de resúmenes si no existe y lee las propiedades de los
+            contenedores: abre la conexión TLS y llena la caché de metadatos del SDK
+            (cuenta, colecciones y rangos de partición) antes del primer request.
+            """
+            await self.ensure_summaries_container()
+            await asyncio.gather(
+                self.container.read(),
+                self.container_message_pairs.read(),
+                self.container_summaries.read()
+            )
+
+        async def ensure_summaries_container(self):
+            """
+            Crea el contenedor de resúmenes (partición /conversation_id) si no existe.
+            Sin él los resúmenes acumulados no se guardarían.
+            """
+            try:
+                self.container_summaries = await self.database.create_container_if_not_exists(
+                    id=self.container_name_summaries,
+                    partition_key=PartitionKey(path="/conversation_id")
+                )
+            except CosmosHttpResponseError as e:
+                logging.error(
+                    "No se pudo crear el contenedor de resúmenes '%s'; los resúmenes no se guardarán: %s",
+                    self.container_name_summaries, str(e)
+                )
+                raise
+
         async def query_documents(self, query: str) -> list[dict]:
             try:
                 items = []
@@ -442,6 +615,42 @@ class AzureServices:
                 logging.error(f"Error en create_document: {str(e)}")
                 return None
 
+        async def get_conversation_summary(self, conversation_id: str) -> Optional[dict]:
+            """
+            Recupera el resumen acumulado de una conversación (id = conversation_id).
+
+            :param conversation_id: ID de la conversación.
+            :return: Documento del resumen o None si aún no existe.
+            """
+            try:
+                return await self.container_summaries.read_item(
+                    item=conversation_id,
+                    partition_key=conversation_id
+                )
+            except CosmosResourceNotFoundError:
+                return None
+            except CosmosHttpResponseError as e:
+                logging.error(f"Error en get_conversation_summary: {str(e)}")
+                return None
+
+        async def upsert_conversation_summary(self, document: dict) -> Optional[dict]:
+            """
+            Crea o reemplaza el resumen acumulado de una conversación.
+            """
+            try:
+                return await self.container_summaries.upsert_item(body=document)
+            except CosmosResourceNotFoundError:
+                # Arranque sin warmup (FAST_STARTUP o warmup fallido): se crea y se reintenta
+                try:
+                    await self.ensure_summaries_container()
+                    return await self.container_summaries.upsert_item(body=document)
+                except CosmosHttpResponseError as e:
+                    logging.error(f"Error en upsert_conversation_summary: {str(e)}")
+                    return None
+            except CosmosHttpResponseError as e:
+                logging.error(f"Error en upsert_conversation_summary: {str(e)}")
+                return None
+
         async def get_documents_by_thread_id(self, conversation_id: str) -> List[dict]:
             """
             Recupera todos los documentos que coinciden con el thread_id proporcionado.
@@ -772,109 +981,168 @@ class AzureServices:
             return prompts
 
     class AzureAiSearch:
+        """
+        Cliente de Azure AI Search con conexiones persistentes.
+
+        Mantiene un SearchClient por índice y un único SearchIndexClient durante toda
+        la vida del proceso (cada uno con su pool de conexiones keep-alive), en lugar
+        de abrir y cerrar un cliente en cada llamada. El esquema de cada índice se
+        asegura (create_or_update) una sola vez por proceso y el resultado queda en
+        caché; close() libera todos los clientes.
+        """
         def __init__(self):
             self.search_endpoint: str = settings.ai_services.azure_search_endpoint
             self.search_key: str = settings.ai_services.azure_search_key
             self.search_credential = AzureKeyCredential(self.search_key)
+            self._search_clients: Dict[str, SearchClient] = {}
+            self._index_client: Optional[SearchIndexClient] = None
+            # Índices cuyo esquema ya se verificó o creó en este proceso
+            self._ensured_indexes: set = set()
+            self._ensure_lock: Optional[asyncio.Lock] = None
+
+        def get_search_client(self, index_name: str) -> SearchClient:
+            client = self._search_clients.get(index_name)
+            if client is None:
+                client = SearchClient(
+                    endpoint=self.search_endpoint,
+                    index_name=index_name,
+                    credential=self.search_credential
+                )
+                self._search_clients[index_name] = client
+            return client
 
-        async def create_upload_index(self, docs: List[dict] = None, fields: List[SearchField] = None, vector_search: VectorSearch = None, semantic_config: SemanticConfiguration = None, index_name: str = "index_name"):
-            async with SearchIndexClient(
-                endpoint=self.search_endpoint,
-                credential=self.search_credential
-            ) as index_client:
-
-                if not fields:
-                    fields = [
-                        SimpleField(name="id", type=SearchFieldDataType.String, key=True),
-                        SearchableField(name="file_name", type=SearchFieldDataType.String, filterable=True),
-                        SearchableField(name="page_content", type=SearchFieldDataType.String, filterable=True),
-                        SimpleField(name="last_update", type=SearchFieldDataType.DateTimeOffset, filterable=True),
-                        SimpleField(name="count_tokens", type=SearchFieldDataType.Int64, filterable=True),
-                        SearchField(
-                            name="content_vector",
-                            type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
-                            searchable=True,
-                            vector_search_dimensions=1536,
-                            vector_search_profile_name="myHnswProfile",
-                        ),
-                        SearchField(
-                            name="user_id",
-                            type=SearchFieldDataType.String,
-                            filterable=True
-                        ),
-                        SearchField(
-                            name="conversation_id",
-                            type=SearchFieldDataType.String,
-                            filterable=True
-                        )
-                    ]
-
-                if not vector_search:
-                    vector_search = VectorSearch(
-                        algorithms=[HnswAlgorithmConfiguration(name="myHnsw")],
-                        profiles=[
-                            VectorSearchProfile(
-                                name="myHnswProfile",
-                                algorithm_configuration_name="myHnsw"
-                            )
-                        ],
-                    )
+        def get_index_client(self) -> SearchIndexClient:
+            if self._index_client is None:
+                self._index_client = SearchIndexClient(
+                    endpoint=self.search_endpoint,
+                    credential=self.search_credential
+                )
+            return self._index_client
 
-                if not semantic_config:
-                    semantic_config = SemanticConfiguration(
-                        name="my-semantic-config",
-                        prioritized_fields=SemanticPrioritizedFields(
-                            title_field=SemanticField(field_name="file_name"),
-                        ),
+        async def warmup(self, index_name: str) -> bool:
+            """
+            Abre las conexiones (índice y documentos) y consulta el esquema del índice
+            antes del primer request. Retorna si el índice existe.
+            """
+            exists = await self.index_exists(index_name)
+            if exists:
+                await self.get_search_client(index_name).get_document_count()
+            return exists
+
+        async def close(self):
+            clients = list(self._search_clients.values())
+            if self._index_client is not None:
+                clients.append(self._index_client)
+            self._search_clients = {}
+            self._index_client = None
+            self._ensured_indexes = set()
+            for client in clients:
+                try:
+                    await client.close()
+                except Exception as e:
+                    logging.warning("Error cerrando cliente de Azure AI Search: %s", str(e))
+
+        def build_index(self, index_name: str, fields: List[SearchField] = None, vector_search: VectorSearch = None, semantic_config: SemanticConfiguration = None) -> SearchIndex:
+            if not fields:
+                fields = [
+                    SimpleField(name="id", type=SearchFieldDataType.String, key=True),
+                    SearchableField(name="file_name", type=SearchFieldDataType.String, filterable=True),
+                    SearchableField(name="page_content", type=SearchFieldDataType.String, filterable=True),
+                    SimpleField(name="last_update", type=SearchFieldDataType.DateTimeOffset, filterable=True),
+                    SimpleField(name="count_tokens", type=SearchFieldDataType.Int64, filterable=True),
+                    SearchField(
+                        name="content_vector",
+                        type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
+                        searchable=True,
+                        vector_search_dimensions=1536,
+                        vector_search_profile_name="myHnswProfile",
+                    ),
+                    SearchField(
+                        name="user_id",
+                        type=SearchFieldDataType.String,
+                        filterable=True
+                    ),
+                    SearchField(
+                        name="conversation_id",
+                        type=SearchFieldDataType.String,
+                        filterable=True
                     )
+                ]
 
-                semantic_search = SemanticSearch(configurations=[semantic_config])
+            if not vector_search:
+                vector_search = VectorSearch(
+                    algorithms=[HnswAlgorithmConfiguration(name="myHnsw")],
+                    profiles=[
+                        VectorSearchProfile(
+                            name="myHnswProfile",
+                            algorithm_configuration_name="myHnsw"
+                        )
+                    ],
+                )
 
-                try:
-                    index = SearchIndex(
-                        name=index_name,
-                        fields=fields,
-                        vector_search=vector_search,
-                        semantic_search=semantic_search,
-                    )
+            if not semantic_config:
+                semantic_config = SemanticConfiguration(
+                    name="my-semantic-config",
+                    prioritized_fields=SemanticPrioritizedFields(
+                        title_field=SemanticField(field_name="file_name"),
+                    ),
+                )
 
-                    result = await index_client.create_or_update_index(index)
-                    print(f"Index {result.name} created/updated")
-                    logging.info(f"Index {result.name} created/updated")
+            return SearchIndex(
+                name=index_name,
+                fields=fields,
+                vector_search=vector_search,
+                semantic_search=SemanticSearch(configurations=[semantic_config]),
+            )
 
-                    if docs:
-                        async with SearchClient(
-                            endpoint=self.search_endpoint,
-                            index_name=index_name,
-                            credential=self.search_credential
-                        ) as search_client:
-                            resp = await search_client.upload_documents(docs)
-                            print(f"Uploaded {len(docs)} documents")
-                            logging.info(f"Uploaded {len(docs)} documents")
+        async def ensure_index(self, index_name: str, fields: List[SearchField] = None, vector_search: VectorSearch = None, semantic_config: SemanticConfiguration = None):
+            """
+            Crea o actualiza el esquema del índice solo la primera vez por proceso;
+            las llamadas siguientes (y las concurrentes) reutilizan el resultado.
+            """
+            if index_name in self._ensured_indexes:
+                metrics.incr("search.ensure_index.cached")
+                return
+            if self._ensure_lock is None:
+                self._ensure_lock = asyncio.Lock()
+            async with self._ensure_lock:
+                if index_name in self._ensured_indexes:
+                    metrics.incr("search.ensure_index.cached")
+                    return
+                index = self.build_index(index_name, fields, vector_search, semantic_config)
+                result = await self.get_index_client().create_or_update_index(index)
+                self._ensured_indexes.add(index_name)
+                metrics.incr("search.ensure_index.calls")
+                print(f"Index {result.name} created/updated")
+                logging.info(f"Index {result.name} created/updated")
 
-                except Exception as e:
-                    logging.exception("Error al crear o actualizar el índice: %s", str(e))
+        async def create_upload_index(self, docs: List[dict] = None, fields: List[SearchField] = None, vector_search: VectorSearch = None, semantic_config: SemanticConfiguration = None, index_name: str = "index_name"):
+            try:
+                await self.ensure_index(index_name, fields, vector_search, semantic_config)
+
+                if docs:
+                    resp = await self.get_search_client(index_name).upload_documents(docs)
+                    print(f"Uploaded {len(docs)} documents")
+                    logging.info(f"Uploaded {len(docs)} documents")
+
+            except Exception as e:
+                logging.exception("Error al crear o actualizar el índice: %s", str(e))
 
         async def get_all_document_ids(self, index_name: str, conversation_id: str) -> List[str]:
             try:
-                async with SearchClient(
-                    endpoint=self.search_endpoint,
-                    index_name=index_name,
-                    credential=self.search_credential
-                ) as search_client:
-                    document_ids = []
-
-                    results = await search_client.search(
-                        search_text="*",
-                        filter=f"conversation_id eq '{conversation_id}'",
-                        select="id",
-                        top=10000
-                    )
+                document_ids = []
+
+                results = await self.get_search_client(index_name).search(
+                    search_text="*",
+                    filter=f"conversation_id eq '{conversation_id}'",
+                    select="id",
+                    top=10000
+                )
 
-                    async for result in results:
-                        document_ids.append(result["id"])
+                async for result in results:
+                    document_ids.append(result["id"])
 
-                    return document_ids
+                return document_ids
 
             except Exception as e:
                 logging.warning(f"Error retrieving document IDs from index '{index_name}': {str(e)}")
@@ -899,34 +1167,27 @@ class AzureServices:
             return list(new_hash_ids), already_existing_hash_ids, to_delete_hashes_ids
 
         async def index_exists(self, index_name: str) -> bool:
-            async with SearchIndexClient(
-                endpoint=self.search_endpoint,
-                credential=self.search_credential
-            ) as index_client:
-                try:
-                    await index_client.get_index(index_name)
-                    return True
-                except ResourceNotFoundError:
-                    return False
-                except Exception as e:
-                    logging.exception(f"Error consultando existencia del índice '{index_name}': {str(e)}")
-                    raise
+            # Un índice asegurado en este proceso existe: no hace falta consultarlo
+            if index_name in self._ensured_indexes:
+                return True
+            try:
+                await self.get_index_client().get_index(index_name)
+                return True
+            except ResourceNotFoundError:
+                return False
+            except Exception as e:
+                logging.exception(f"Error consultando existencia del índice '{index_name}': {str(e)}")
+                raise
     
         async def delete_documents_by_ids(self, index_name: str, document_ids: List[str]) -> bool:
-            async with SearchClient(
-                endpoint=self.search_endpoint,
-                index_name=index_name,
-                credential=self.search_credential
-            ) as search_client:
-
-                documents_to_delete = [{"id": doc_id} for doc_id in document_ids]
+            documents_to_delete = [{"id": doc_id} for doc_id in document_ids]
 
-                try:
-                    result = await search_client.delete_documents(documents=documents_to_delete)
-                    return True if result else False
-                except Exception as e:
-                    logging.exception(f"Error al eliminar documentos: {str(e)}")
-                    return False
+            try:
+                result = await self.get_search_client(index_name).delete_documents(documents=documents_to_delete)
+                return True if result else False
+            except Exception as e:
+                logging.exception(f"Error al eliminar documentos: {str(e)}")
+                return False
                 
         async def search_documents_in_index(self, index_name: str, search_text: str, conversation_id: str) -> List[dict]:
             """
@@ -937,36 +1198,37 @@ class AzureServices:
             :param conversation_id: ID de la conversación.
             :return: Lista de diccionarios con los resultados de la búsqueda.
             """
-            # search_client = SearchClient(
-            #     endpoint=self.search_endpoint,
-            #     index_name=index_name,
-            #     credential=self.search_credential
-            # )
             documents = []
-            async with SearchClient(
-                endpoint=self.search_endpoint,
-                index_name=index_name,
-                credential=self.search_credential
-            ) as search_client:
-                
-                results = await search_client.search(search_text=search_text, filter=f"conversation_id eq '{conversation_id}'", top=6, select=['file_name', 'page_content'])
-                
-                async for result in results:
-                    documents.append(result)
+            results = await self.get_search_client(index_name).search(search_text=search_text, filter=f"conversation_id eq '{conversation_id}'", top=6, select=['file_name', 'page_content'])
+            
+            async for result in results:
+                documents.append(result)
             
 
             logging.info(f"Se encontraron {len(documents)} documentos en la búsqueda.")
             return documents
     class PdfProcessor:
-        def __init__(self):
+        def __init__(self, azure_ai_search_service: Optional["AzureServices.AzureAiSearch"] = None):
             self.document_intelligence_service = AzureServices.AzureDocumentIntelligence()
-            self.azure_ai_search_service =  AzureServices.AzureAiSearch()
-            self.azure_openai_service =  AzureServices.AzureOpenAI()
+            self.azure_ai_search_service =  azure_ai_search_service or AzureServices.AzureAiSearch()
+            self.azure_openai_service =  AzureServices.LLMRegistry.get_openai_service()
+            # Embeddings por lotes concurrentes (compartido por todas las cargas del proceso),
+            # con caché en disco por contenido: un archivo ya subido en otra conversación
+            # no vuelve a pasar por la API de embeddings
+            self.embedding_batcher = EmbeddingBatcher(
+                self.azure_openai_service.model_embeddings,
+                cache=embedding_cache if settings.agent_services.embedding_cache_enabled else None,
+                model_name=settings.ai_services.model_embeddings_name or ""
+            )
             
         async def main(self, user_id,conversation_id, files_obj:list=None):
             """
             Analiza el contenido de un documento PDF proporcionado como un objeto de archivo en memoria.
 
+            Los archivos se leen en paralelo (Document Intelligence corre en un hilo) y
+            los embeddings de los chunks nuevos se calculan por lotes concurrentes, sin
+            bloquear el event loop. Se registran los tiempos de cada documento.
+
             param file_obj: Objeto de archivo en memoria para analizar (BytesIO, por ejemplo).
             return: Lista con el texto extraído de cada página.
             """
@@ -974,22 +1236,18 @@ class AzureServices:
             if files_obj is None:
                 raise ValueError("Debe proporcionarse 'file_obj'.")
 
+            start = time.perf_counter()
             read_files = []
             unread_files = []
-            for file in files_obj:
-                
-                if file.get("doc_type") in ["pdf"]:
-                    
-                    extracted_content = self.document_intelligence_service.analyze_read(file_obj=file.get("content"))
-                else:
-                    extracted_content = file.get("content")
-                
+            extracted = await asyncio.gather(*[self._extract_content(file) for file in files_obj])
+            for file, (extracted_content, extract_ms) in zip(files_obj, extracted):
                 response_message = f"Archivo {file.get('file_name')} procesado correctamente" if extracted_content else f"No se pudo extraer el contenido del archivo {file.get('file_name')}"
                 if extracted_content:
                     read_files.append({
                         "file_name": file.get("file_name"),
                         "message": response_message,
-                        "content": extracted_content
+                        "content": extracted_content,
+                        "timings": {"extract_ms": extract_ms}
                     })
                 else:
                     unread_files.append({
@@ -1005,56 +1263,103 @@ class AzureServices:
             
             if count_tokens > max_tokens_input_model:
                 # Si es demasiado "grande" para ser procesada por el llm:    
-                ## Chunkear 
-                chunks = self.chunk_extracted_texts(user_id=user_id,extracted_files=read_files)
+                ## Chunkear (por documento, para medir cada uno por separado)
+                chunks_by_file = []
+                for res in read_files:
+                    chunk_start = time.perf_counter()
+                    chunks_by_file.append(self.chunk_extracted_texts(user_id=user_id, extracted_files=[res]))
+                    res["timings"]["chunk_ms"] = round((time.perf_counter() - chunk_start) * 1000, 1)
+                chunks = [doc for file_chunks in chunks_by_file for doc in file_chunks]
                 
                 ## Validar qué documentos son nuevos y cuáles ya están en el indice o deben eliminarse?
                 hash_ids_list = [doc.metadata.get("id") for doc in chunks]
-                new_hash_ids, already_existing_hash_ids, to_delete_hashes_ids = await self.azure_ai_search_service.process_hash_ids(conversation_id=conversation_id, index_name="geo-gpk", hash_ids_list=hash_ids_list)
+                new_hash_ids, already_existing_hash_ids, to_delete_hashes_ids = await self.azure_ai_search_service.process_hash_ids(conversation_id=conversation_id, index_name=settings.ai_services.azure_search_index_name, hash_ids_list=hash_ids_list)
                 index_info = {
                     "num_added": len(new_hash_ids),
                     "num_skipped": len(already_existing_hash_ids),
                     "num_deleted": len(to_delete_hashes_ids)
                     }
                 print(f"\033[32mResultado esperado del proceso de verificacion de hashes:\n{index_info}\033[0m")
-                docs = [doc if doc.metadata.get("id") in new_hash_ids else None for doc in chunks]
+                new_hash_ids = set(new_hash_ids)
                 
                 if len(to_delete_hashes_ids) > 0:
-                    asyncio.create_task(self.azure_ai_search_service.delete_documents_by_ids(index_name="geo-gpk", document_ids=to_delete_hashes_ids))
-                if len(docs)>0:
-                    ldocs = [
-                            {
-                                "id":doc.metadata.get("id"),
-                                "user_id": user_id,
-                                "conversation_id":conversation_id,
-                                "file_name":doc.metadata.get("file_name"),
-                                "page_content":doc.page_content,
-                                "content_vector": self.azure_openai_service.model_embeddings.embed_query(doc.page_content),
-                                "last_update": datetime.now(),
-                                "count_tokens": len(encoder.encode(doc.page_content))
-                            } for doc in docs if doc is not None
-                        ]
-                else:
-                    ldocs = []
+                    asyncio.create_task(self.azure_ai_search_service.delete_documents_by_ids(index_name=settings.ai_services.azure_search_index_name, document_ids=to_delete_hashes_ids))
+
+                ## Embeddings de los chunks nuevos: cada documento en paralelo y, dentro
+                ## de cada uno, por lotes (el batcher limita los lotes en vuelo)
+                embedded = await asyncio.gather(*[
+                    self._embed_chunks([doc for doc in file_chunks if doc.metadata.get("id") in new_hash_ids], encoder)
+                    for file_chunks in chunks_by_file
+                ])
+                ldocs = []
+                for res, file_chunks, (file_docs, embed_ms) in zip(read_files, chunks_by_file, embedded):
+                    res["timings"].update({"embed_ms": embed_ms, "chunks": len(file_chunks), "new_chunks": len(file_docs)})
+                    ldocs.extend(
+                        {
+                            "id":doc.metadata.get("id"),
+                            "user_id": user_id,
+                            "conversation_id":conversation_id,
+                            "file_name":doc.metadata.get("file_name"),
+                            "page_content":doc.page_content,
+                            "content_vector": vector,
+                            "last_update": datetime.now(),
+                            "count_tokens": tokens
+                        } for doc, vector, tokens in file_docs
+                    )
                 
-                _ = await self.azure_ai_search_service.create_upload_index(docs=ldocs, index_name="geo-gpk")
-                # asyncio.create_task(self.azure_ai_search_service.create_upload_index(docs=ldocs, index_name="geo-gpk"))
+                upload_start = time.perf_counter()
+                _ = await self.azure_ai_search_service.create_upload_index(docs=ldocs, index_name=settings.ai_services.azure_search_index_name)
+                metrics.observe("pdf.ingest.upload_ms", (time.perf_counter() - upload_start) * 1000)
+                # asyncio.create_task(self.azure_ai_search_service.create_upload_index(docs=ldocs, index_name=settings.ai_services.azure_search_index_name))
             else:
                 # Si es lo suficientemente "pequeña" para ser procesada por el llm:    
                 ## Insertar en prompt directamente para reducir tiempos ¿?
                 pass
+
+            for res in read_files:
+                timings = res["timings"]
+                timings["total_ms"] = round(sum(v for k, v in timings.items() if k.endswith("_ms")), 1)
+                for name, value in timings.items():
+                    metrics.observe(f"pdf.ingest.{name}", value)
+                logging.info("Documento %s ingerido: %s", res.get("file_name"), timings)
+                print(f"\033[32mDocumento {res.get('file_name')} ingerido: {timings}\033[0m")
+            metrics.observe("pdf.ingest.request_ms", (time.perf_counter() - start) * 1000)
                 
             response = {
                 "user_id": user_id,
                 "read_files": [
                                 {
                                 "file_name":res.get("file_name"),
-                                "message":res.get("message")
+                                "message":res.get("message"),
+                                "timings":res.get("timings")
                                 } for res in read_files
                                ],
                 "unread_files": [res.get("file_name") for res in unread_files]
             }
             return text_content , response
+
+        async def _extract_content(self, file: dict) -> Tuple[Any, float]:
+            """
+            Retorna (contenido, ms). Los PDF se analizan con Document Intelligence en
+            un hilo: la llamada del SDK es bloqueante.
+            """
+            start = time.perf_counter()
+            if file.get("doc_type") in ["pdf"]:
+                extracted_content = await asyncio.to_thread(
+                    self.document_intelligence_service.analyze_read, file_obj=file.get("content")
+                )
+            else:
+                extracted_content = file.get("content")
+            return extracted_content, round((time.perf_counter() - start) * 1000, 1)
+
+        async def _embed_chunks(self, docs: list, encoder) -> Tuple[list, float]:
+            """
+            Retorna ([(doc, vector, tokens)], ms) para los chunks de un documento.
+            """
+            start = time.perf_counter()
+            token_counts = [len(encoder.encode(doc.page_content)) for doc in docs]
+            vectors = await self.embedding_batcher.embed([doc.page_content for doc in docs], token_counts)
+            return list(zip(docs, vectors, token_counts)), round((time.perf_counter() - start) * 1000, 1)
         
         def chunk_extracted_texts(
             self,
@@ -1109,5 +1414,5 @@ class AzureServices:
             return splitted_docs
         
     def __init__(self):
-        self.service_azure_open_ai = AzureServices.AzureOpenAI()
+        self.service_azure_open_ai = AzureServices.LLMRegistry.get_openai_service()
 
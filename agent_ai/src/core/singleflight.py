@@ -0,0 +1,84 @@
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import asyncio
+import functools
+import inspect
+
+from core.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave en una sola ejecución.
+
+    La primera llamada con una clave lanza la tarea; las que llegan mientras sigue
+    en curso esperan esa misma tarea y reciben su resultado (o su excepción).
+    Cuando termina, la clave se libera y la siguiente llamada vuelve a ejecutar.
+
+    Métricas: '<name>.executions' (ejecuciones reales) y '<name>.saved'
+    (llamadas que se ahorraron al compartir una ejecución en curso).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+            metrics.incr(f"{self.name}.executions")
+        else:
+            metrics.incr(f"{self.name}.saved")
+        # shield: si un llamador se cancela (p. ej. por timeout) no cancela a los demás
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Evitar "Task exception was never retrieved" si todos los llamadores se cancelaron
+        if not task.cancelled():
+            task.exception()
+
+
+def normalize_arg(value: Any) -> Hashable:
+    """
+    Normaliza un argumento para la clave: textos sin mayúsculas ni espacios extra,
+    colecciones como tuplas.
+    """
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), normalize_arg(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(normalize_arg(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def singleflight(name: Optional[str] = None):
+    """
+    Decorador para funciones async: las llamadas concurrentes con argumentos
+    equivalentes (ver normalize_arg) comparten una sola ejecución.
+
+    Conserva la firma y el docstring de la función (necesarios para bind_tools).
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        group = SingleFlight(f"singleflight.{name or func.__name__}")
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((arg, normalize_arg(value)) for arg, value in bound.arguments.items())
+            return await group.do(key, lambda: func(*args, **kwargs))
+
+        wrapper.singleflight = group
+        return wrapper
+
+    return decorator
@@ -1,13 +1,13 @@
 from datetime import datetime
 from pytz import timezone
-from docx import Document
-import pandas as pd
 import timeit
 import uuid
-import tiktoken
 import pdb
 import io
 
+# python-docx, pandas y tiktoken se importan al usarse: son pesados y solo los
+# necesitan la carga de archivos y el conteo de tokens, no el arranque del servicio.
+
 
 def genereta_id() -> str: 
     now = datetime.now()
@@ -31,6 +31,7 @@ def timeit_decorator(func):
 
 def count_tokens(texts=None, model_reference="cl100k_base"):   
     if texts:
+        import tiktoken
         encoding = tiktoken.get_encoding(model_reference)
         count = encoding.encode(texts)
         return count
@@ -93,6 +94,8 @@ def extract_word_content(content: bytes) -> str:
     Returns:
         str: Texto extraído del archivo Word.
     """
+    from docx import Document
+
     # Convertir los bytes en un stream de memoria
     stream = io.BytesIO(content)
     # Abrir el documento usando python-docx
@@ -117,6 +120,8 @@ def extract_excel_content(content: bytes) -> str:
     Returns:
         str: Un string en formato JSONL con los registros del Excel.
     """
+    import pandas as pd
+
     try:
         # Crear un objeto BytesIO a partir de los bytes del archivo Excel
         excel_io = io.BytesIO(content)
@@ -0,0 +1,125 @@
+from typing import Awaitable, Callable, Optional
+import asyncio
+import logging
+import time
+
+from core.config import settings
+from core.metrics import metrics
+from inference.catalog.scraper import catalog_scraper
+from inference.catalog.index import product_index
+from inference.catalog.vector_index import product_vector_index
+
+
+class CatalogCache:
+    """
+    Caché de productos por URL del catálogo con TTL y stale-while-revalidate.
+
+    - Entrada fresca (edad < ttl): se retorna directamente.
+    - Entrada vencida pero dentro de la ventana stale (edad < ttl + stale): se
+      retorna de inmediato y se refresca en segundo plano (un solo refresh por URL).
+    - Sin entrada o demasiado vieja: se carga con `loader`; las cargas concurrentes
+      de la misma URL comparten la misma ejecución.
+
+    Métricas: catalog_cache.{hits,stale_hits,misses,refreshes,refresh_errors},
+    la edad servida en catalog_cache.staleness_s y el gauge catalog_cache.hit_rate.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Awaitable[list[dict]]],
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None
+    ):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds or settings.agent_services.catalog_cache_ttl_seconds
+        self.stale_seconds = stale_seconds or settings.agent_services.catalog_cache_stale_seconds
+        self._entries: dict[str, dict] = {}
+        self._loading: dict[str, asyncio.Task] = {}
+
+    async def get(self, source: str) -> list[dict]:
+        entry = self._entries.get(source)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < self.ttl_seconds:
+                self._record("hits", age)
+                return entry["products"]
+            if age < self.ttl_seconds + self.stale_seconds:
+                self._record("stale_hits", age)
+                self._load_in_background(source)
+                return entry["products"]
+
+        self._record("misses")
+        return await self._load(source)
+
+    async def refresh(self, source: str) -> list[dict]:
+        """
+        Fuerza la recarga de `source` (compartida con cargas ya en curso).
+        """
+        return await self._load(source)
+
+    def set(self, source: str, products: list[dict], fetched_at: Optional[float] = None):
+        self._entries[source] = {"products": products, "fetched_at": fetched_at or time.time()}
+        metrics.gauge("catalog_cache.entries", len(self._entries))
+
+    def age(self, source: str) -> Optional[float]:
+        entry = self._entries.get(source)
+        return None if entry is None else time.time() - entry["fetched_at"]
+
+    def is_fresh(self, source: str) -> bool:
+        age = self.age(source)
+        return age is not None and age < self.ttl_seconds
+
+    def _load_in_background(self, source: str):
+        task = self._get_or_start_load(source)
+        # Evitar "Task exception was never retrieved" en refrescos fallidos
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _load(self, source: str) -> list[dict]:
+        return await asyncio.shield(self._get_or_start_load(source))
+
+    def _get_or_start_load(self, source: str) -> asyncio.Task:
+        task = self._loading.get(source)
+        if task is None:
+            task = asyncio.create_task(self._fetch(source))
+            self._loading[source] = task
+            task.add_done_callback(lambda _: self._loading.pop(source, None))
+        return task
+
+    async def _fetch(self, source: str) -> list[dict]:
+        metrics.incr("catalog_cache.refreshes")
+        try:
+            products = await self.loader(source)
+        except Exception as e:
+            metrics.incr("catalog_cache.refresh_errors")
+            logging.exception("Error refrescando el catálogo %s: %s", source, str(e))
+            raise
+        self.set(source, products)
+        return products
+
+    def _record(self, outcome: str, age: Optional[float] = None):
+        metrics.incr(f"catalog_cache.{outcome}")
+        if age is not None:
+            metrics.observe("catalog_cache.staleness_s", age)
+        served = metrics.counter("catalog_cache.hits") + metrics.counter("catalog_cache.stale_hits")
+        total = served + metrics.counter("catalog_cache.misses")
+        metrics.gauge("catalog_cache.hit_rate", round(served / total, 4) if total else 0.0)
+
+
+async def scrape_and_index(source: str) -> list[dict]:
+    """
+    Scrapea `source` en vivo y actualiza el índice local (y el semántico) con el resultado.
+    """
+    products = await catalog_scraper.scrape(source)
+    # Una extracción vacía (página caída, cambio de HTML) no borra el índice existente
+    if products:
+        await asyncio.to_thread(product_index.replace_source, source, products)
+        if settings.agent_services.catalog_vector_search_enabled:
+            try:
+                await product_vector_index.update_source(source, products)
+            except Exception as e:
+                # Sin embeddings el catálogo sigue sirviéndose con la búsqueda léxica
+                logging.warning("No se pudieron calcular los embeddings de %s: %s", source, str(e))
+    return products
+
+
+catalog_cache = CatalogCache(loader=scrape_and_index)
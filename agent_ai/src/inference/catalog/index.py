@@ -0,0 +1,201 @@
+from typing import Optional
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from core.config import settings
+from inference.catalog.products import fold_text, tokenize
+
+
+def parse_price(price: Optional[str]) -> Optional[float]:
+    """
+    Convierte precios como '$ 129.900' o '129,900.00' a float (pesos colombianos).
+    """
+    if not price:
+        return None
+    text = re.sub(r"[^\d,\.]", "", str(price))
+    # En COP los separadores de miles son '.' o ','; se descartan los centavos ('129.900,00')
+    text = re.sub(r"[\.,]\d{2}$", "", text)
+    digits = text.replace(".", "").replace(",", "")
+    return float(digits) if digits else None
+
+
+class ProductIndex:
+    """
+    Índice local de productos del catálogo (SQLite + FTS5).
+
+    Guarda registros normalizados (name, sizes, colors, price, link, description)
+    por URL de origen y permite búsqueda de texto completo (bm25) con filtros por
+    talla, color y precio máximo. Pensado para responder en milisegundos sin
+    navegador ni LLM.
+
+    La base se abre (y se crea o migra) en el primer uso, no al importar el módulo.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.agent_services.catalog_index_path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_url TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    sizes TEXT,
+                    colors TEXT,
+                    price TEXT,
+                    price_value REAL,
+                    link TEXT,
+                    description TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_products_source ON products(source_url)")
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                    name, colors, description,
+                    source_url UNINDEXED, product_id UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sources (
+                    source_url TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL,
+                    product_count INTEGER NOT NULL
+                )
+            """)
+            # Los embeddings de productos viven en EmbeddingCache (core/embedding_cache.py)
+            conn.execute("DROP TABLE IF EXISTS embeddings")
+        return conn
+
+    def replace_source(self, source_url: str, products: list[dict]) -> None:
+        """
+        Reemplaza todos los productos de `source_url` (transacción atómica).
+        """
+        conn = self._connection()
+        with self._lock, conn:
+            conn.execute("DELETE FROM products WHERE source_url = ?", (source_url,))
+            conn.execute("DELETE FROM products_fts WHERE source_url = ?", (source_url,))
+            for product in products:
+                cursor = conn.execute(
+                    "INSERT INTO products (source_url, name, sizes, colors, price, price_value, link, description) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        source_url,
+                        product["name"],
+                        json.dumps(product.get("sizes") or [], ensure_ascii=False),
+                        json.dumps(product.get("colors") or [], ensure_ascii=False),
+                        product.get("price"),
+                        parse_price(product.get("price")),
+                        product.get("link"),
+                        product.get("description"),
+                    )
+                )
+                conn.execute(
+                    "INSERT INTO products_fts (name, colors, description, source_url, product_id) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        product["name"],
+                        " ".join(product.get("colors") or []),
+                        product.get("description") or "",
+                        source_url,
+                        cursor.lastrowid,
+                    )
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO sources (source_url, updated_at, product_count) VALUES (?, ?, ?)",
+                (source_url, time.time(), len(products))
+            )
+
+    def source_age(self, source_url: str) -> Optional[float]:
+        """
+        Segundos desde la última indexación de `source_url` (None si nunca se indexó).
+        """
+        conn = self._connection()
+        with self._lock:
+            row = conn.execute(
+                "SELECT updated_at FROM sources WHERE source_url = ?", (source_url,)
+            ).fetchone()
+        return None if row is None else time.time() - row["updated_at"]
+
+    def get_products(self, source_url: str) -> list[dict]:
+        conn = self._connection()
+        with self._lock:
+            rows = conn.execute(
+                "SELECT * FROM products WHERE source_url = ? ORDER BY id", (source_url,)
+            ).fetchall()
+        return [self._row_to_product(row) for row in rows]
+
+    def search(
+        self,
+        source_url: str,
+        query: Optional[str] = None,
+        sizes: Optional[list[str]] = None,
+        colors: Optional[list[str]] = None,
+        max_price: Optional[float] = None,
+        limit: int = 20
+    ) -> list[dict]:
+        """
+        Busca productos de `source_url`. Con `query` ordena por relevancia (bm25);
+        si ningún producto coincide, retorna el listado en su orden original.
+        Los filtros de talla/color/precio se aplican sobre los resultados.
+        """
+        rows = []
+        tokens = tokenize(query or "")
+        conn = self._connection()
+        with self._lock:
+            if tokens:
+                # Prefijos en OR: 'sandalias comodas' -> "sandal"* OR "comoda"*
+                match = " OR ".join(f'"{token[:6]}"*' for token in tokens)
+                rows = conn.execute(
+                    "SELECT p.* FROM products_fts f JOIN products p ON p.id = f.product_id "
+                    "WHERE products_fts MATCH ? AND f.source_url = ? ORDER BY bm25(products_fts)",
+                    (match, source_url)
+                ).fetchall()
+            if not rows:
+                rows = conn.execute(
+                    "SELECT * FROM products WHERE source_url = ? ORDER BY id", (source_url,)
+                ).fetchall()
+
+        products = [self._row_to_product(row) for row in rows]
+        if sizes:
+            wanted = {str(size).strip() for size in sizes}
+            products = [p for p in products if wanted & set(p["sizes"])]
+        if colors:
+            wanted = {fold_text(color) for color in colors}
+            products = [p for p in products if any(w in fold_text(c) for c in p["colors"] for w in wanted)]
+        if max_price is not None:
+            products = [p for p in products if p["price_value"] is None or p["price_value"] <= max_price]
+        return products[:limit]
+
+    @staticmethod
+    def _row_to_product(row: sqlite3.Row) -> dict:
+        return {
+            "name": row["name"],
+            "sizes": json.loads(row["sizes"] or "[]"),
+            "colors": json.loads(row["colors"] or "[]"),
+            "price": row["price"],
+            "price_value": row["price_value"],
+            "link": row["link"],
+            "description": row["description"],
+        }
+
+
+product_index = ProductIndex()
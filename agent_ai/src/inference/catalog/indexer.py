@@ -0,0 +1,92 @@
+from typing import Optional
+import asyncio
+import logging
+import time
+
+from core.config import settings
+from core.metrics import metrics
+from inference.catalog.cache import CatalogCache, catalog_cache
+from inference.catalog.index import ProductIndex, product_index
+from inference.catalog.sources import all_sources
+
+
+class CatalogIndexer:
+    """
+    Indexador en segundo plano: recorre periódicamente todas las URLs del catálogo
+    y guarda los productos normalizados en el índice local, de modo que scrape_tool
+    responda desde el índice y el scraping en vivo quede solo como respaldo.
+    """
+
+    def __init__(
+        self,
+        cache: CatalogCache,
+        index: ProductIndex,
+        interval_seconds: Optional[float] = None,
+        max_concurrency: int = 2
+    ):
+        self.cache = cache
+        self.index = index
+        self.interval_seconds = interval_seconds or settings.agent_services.catalog_index_interval_seconds
+        self.max_concurrency = max_concurrency
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, initial_delay: float = 0.0):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(initial_delay))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self, force: bool = False) -> dict:
+        """
+        Indexa las URLs cuya última indexación tenga más de un intervalo (o todas si force).
+        """
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        sources = []
+        for source in all_sources():
+            age = await asyncio.to_thread(self.index.source_age, source)
+            if force or age is None or age >= self.interval_seconds:
+                sources.append(source)
+
+        async def index_source(source: str) -> bool:
+            async with semaphore:
+                try:
+                    # El refresh de la caché scrapea, indexa y deja la caché caliente
+                    products = await self.cache.refresh(source)
+                    logging.info("Catálogo indexado: %s (%s productos)", source, len(products))
+                    return True
+                except Exception as e:
+                    logging.warning("No se pudo indexar %s: %s", source, str(e))
+                    return False
+
+        results = await asyncio.gather(*[index_source(source) for source in sources])
+        summary = {
+            "indexed": sum(results),
+            "failed": len(results) - sum(results),
+            "seconds": round(time.perf_counter() - start, 2)
+        }
+        metrics.incr("catalog_indexer.runs")
+        metrics.incr("catalog_indexer.indexed_sources", summary["indexed"])
+        metrics.incr("catalog_indexer.failed_sources", summary["failed"])
+        logging.info("Indexación del catálogo terminada: %s", summary)
+        return summary
+
+    async def _loop(self, initial_delay: float = 0.0):
+        if initial_delay:
+            await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logging.exception("Error en el indexador del catálogo: %s", str(e))
+            await asyncio.sleep(self.interval_seconds)
+
+
+catalog_indexer = CatalogIndexer(cache=catalog_cache, index=product_index)
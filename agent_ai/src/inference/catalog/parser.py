@@ -0,0 +1,142 @@
+from typing import Iterable, Optional
+import json
+
+from bs4 import BeautifulSoup
+
+from inference.catalog.products import normalize_product
+
+
+# Selectores de las tarjetas de producto del listado (Salesforce Commerce Cloud)
+TILE_SELECTORS = [".product-tile", "[data-pid]"]
+NAME_SELECTORS = [".pdp-link a", ".product-name", ".tile-body .link", "[itemprop=name]"]
+LINK_SELECTORS = [".pdp-link a[href]", ".image-container a[href]", "a.tile-link[href]", "a[href]"]
+PRICE_SELECTORS = [".price .sales .value", ".price .value", ".sales", ".price"]
+COLOR_SELECTORS = [".color-swatches [data-attr-value]", ".swatch-circle", ".color-value"]
+SIZE_SELECTORS = ["[data-attr='size'] [data-attr-value]", ".size-value"]
+
+# Fracción mínima de productos con nombre, link y precio para confiar en el parser
+MIN_COMPLETE_RATIO = 0.8
+
+
+def _select_text(tile, selectors: list[str]) -> Optional[str]:
+    for selector in selectors:
+        element = tile.select_one(selector)
+        if element is None:
+            continue
+        # SFCC expone el precio sin formato en el atributo 'content'
+        value = element.get("content") or element.get("title") or element.get_text(" ", strip=True)
+        if value:
+            return value.strip()
+    return None
+
+
+def _select_values(tile, selectors: list[str]) -> list[str]:
+    for selector in selectors:
+        elements = tile.select(selector)
+        values = [
+            (e.get("data-attr-value") or e.get("title") or e.get("aria-label") or e.get_text(" ", strip=True)).strip()
+            for e in elements
+        ]
+        values = [v for v in values if v]
+        if values:
+            return list(dict.fromkeys(values))
+    return []
+
+
+def _iter_json_ld(soup: BeautifulSoup) -> Iterable[dict]:
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except (json.JSONDecodeError, TypeError):
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            node = stack.pop(0)
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict):
+                if node.get("@type") == "Product":
+                    yield node
+                for key in ("@graph", "itemListElement", "item"):
+                    if key in node:
+                        stack.append(node[key])
+
+
+def _from_json_ld(soup: BeautifulSoup) -> list[dict]:
+    products = []
+    for node in _iter_json_ld(soup):
+        offers = node.get("offers") or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        product = normalize_product({
+            "name": node.get("name"),
+            "link": node.get("url") or offers.get("url"),
+            "price": offers.get("price") or offers.get("lowPrice"),
+            "colors": node.get("color"),
+            "sizes": node.get("size"),
+            "description": node.get("description"),
+        })
+        if product:
+            products.append(product)
+    return products
+
+
+def _from_tiles(soup: BeautifulSoup) -> list[dict]:
+    tiles = []
+    for selector in TILE_SELECTORS:
+        tiles = soup.select(selector)
+        if tiles:
+            break
+
+    products = []
+    for tile in tiles:
+        link_element = next((tile.select_one(s) for s in LINK_SELECTORS if tile.select_one(s) is not None), None)
+        product = normalize_product({
+            "name": _select_text(tile, NAME_SELECTORS),
+            "link": link_element.get("href") if link_element is not None else None,
+            "price": _select_text(tile, PRICE_SELECTORS),
+            "colors": _select_values(tile, COLOR_SELECTORS),
+            "sizes": _select_values(tile, SIZE_SELECTORS),
+        })
+        if product:
+            products.append(product)
+    return products
+
+
+def confidence(products: list[dict]) -> float:
+    """
+    Fracción de productos completos (nombre, link y precio). 0.0 si no hay productos.
+    """
+    if not products:
+        return 0.0
+    complete = sum(1 for p in products if p.get("name") and p.get("link") and p.get("price"))
+    return complete / len(products)
+
+
+def parse_listing(html: str) -> tuple[list[dict], float]:
+    """
+    Extrae los productos de un listado de Bata sin LLM: primero con datos
+    estructurados (JSON-LD) y, si no hay, con los selectores de las tarjetas.
+
+    :return: (productos normalizados, confianza entre 0 y 1)
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    best: list[dict] = []
+    for strategy in (_from_json_ld, _from_tiles):
+        products = strategy(soup)
+        if confidence(products) >= MIN_COMPLETE_RATIO:
+            return _dedupe(products), confidence(products)
+        if len(products) > len(best):
+            best = products
+    return _dedupe(best), confidence(best)
+
+
+def _dedupe(products: list[dict]) -> list[dict]:
+    seen = set()
+    unique = []
+    for product in products:
+        key = (product["name"].lower(), product["link"])
+        if key not in seen:
+            seen.add(key)
+            unique.append(product)
+    return unique
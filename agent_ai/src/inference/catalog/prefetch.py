@@ -0,0 +1,157 @@
+from typing import Optional
+import asyncio
+import logging
+import time
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from core.config import settings
+from core.metrics import metrics
+from inference.catalog.cache import CatalogCache, catalog_cache
+from inference.catalog.index import ProductIndex, product_index
+from inference.catalog.sources import resolve_source
+from inference.catalog.vector_index import ProductVectorIndex, product_vector_index
+from inference.intent import conversation_slots
+
+
+# Mensajes recientes del cliente en los que se buscan el género y la categoría
+DETECTION_WINDOW_MESSAGES = 3
+
+
+def detect_intent(messages: list[BaseMessage]) -> Optional[tuple[str, str]]:
+    """
+    Detecta (género, categoría) de la búsqueda pendiente a partir de los últimos
+    mensajes del cliente (el más reciente tiene prioridad). Los del asistente no
+    cuentan: listan opciones que el cliente no ha elegido.
+    """
+    recent = [m for m in messages if isinstance(m, HumanMessage)][-DETECTION_WINDOW_MESSAGES:]
+    slots = conversation_slots([m.content for m in recent if isinstance(m.content, str)])
+    if slots["gender"] and slots["category"]:
+        return slots["gender"], slots["category"]
+    return None
+
+
+def awaiting_confirmation(messages: list[BaseMessage]) -> bool:
+    """
+    True si la última respuesta del asistente le pregunta algo al cliente y en el
+    turno no se consultó el catálogo: tras una ronda de scrape_tool la URL ya está
+    caliente y precargarla otra vez solo se desperdicia.
+    """
+    if not messages or not isinstance(messages[-1], AIMessage) or messages[-1].tool_calls:
+        return False
+    if "?" not in str(messages[-1].content):
+        return False
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return True
+        if isinstance(message, ToolMessage) and message.name == "scrape_tool":
+            return False
+    return True
+
+
+class CatalogPrefetcher:
+    """
+    Precarga especulativa del catálogo mientras el bot espera la confirmación del
+    cliente (el system prompt pide confirmar antes de usar scrape_tool).
+
+    Cuando el asistente le pide confirmación al cliente (responde con una pregunta,
+    sin tool calls y sin haber consultado el catálogo en el turno) y en la
+    conversación ya se conocen género y categoría, se calienta en segundo plano la
+    URL correspondiente: scraping en vivo vía CatalogCache si el índice local no
+    está al día (la carga queda en curso y scrape_tool se une a ella) y la matriz
+    del índice semántico.
+
+    Límites: una precarga pendiente por conversación, `max_inflight` simultáneas
+    por proceso y `ttl_seconds` para reclamarla. Métricas: prefetch.{started,
+    skipped, used, wasted}, prefetch.lead_ms (ventaja ganada) y el gauge
+    prefetch.inflight.
+    """
+
+    def __init__(
+        self,
+        cache: CatalogCache,
+        index: ProductIndex,
+        vector_index: ProductVectorIndex,
+        max_inflight: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.cache = cache
+        self.index = index
+        self.vector_index = vector_index
+        self.max_inflight = max_inflight or settings.agent_services.catalog_prefetch_max_inflight
+        self.ttl_seconds = ttl_seconds or settings.agent_services.catalog_prefetch_ttl_seconds
+        self._pending: dict[str, dict] = {}
+
+    def schedule(self, conversation_id: str, messages: list[BaseMessage]) -> Optional[str]:
+        """
+        Inicia la precarga de la URL detectada en `messages`. Retorna la URL o None.
+        """
+        self._expire()
+        if not awaiting_confirmation(messages):
+            return None
+        intent = detect_intent(messages)
+        source = resolve_source(*intent) if intent else None
+        if source is None:
+            return None
+
+        pending = self._pending.get(conversation_id)
+        if pending is not None:
+            if pending["source"] == source:
+                return source
+            # El cliente cambió de idea antes de confirmar: la precarga anterior se pierde
+            self._discard(conversation_id)
+
+        if self._inflight() >= self.max_inflight:
+            metrics.incr("prefetch.skipped")
+            return None
+
+        task = asyncio.create_task(self._warm(source))
+        task.add_done_callback(lambda t: self._on_done(t))
+        self._pending[conversation_id] = {"source": source, "task": task, "started_at": time.perf_counter()}
+        metrics.incr("prefetch.started")
+        metrics.gauge("prefetch.inflight", self._inflight())
+        logging.info("Precarga del catálogo %s para la conversación %s", source, conversation_id)
+        return source
+
+    def claim(self, conversation_id: str, source: Optional[str]) -> bool:
+        """
+        Registra que scrape_tool pidió `source`. Retorna True si había una precarga
+        para esa URL (terminada o en curso; la carga en curso se comparte).
+        """
+        pending = self._pending.pop(conversation_id, None)
+        if pending is None:
+            return False
+        if pending["source"] != source:
+            metrics.incr("prefetch.wasted")
+            return False
+        metrics.incr("prefetch.used")
+        metrics.observe("prefetch.lead_ms", (time.perf_counter() - pending["started_at"]) * 1000)
+        return True
+
+    async def _warm(self, source: str):
+        age = await asyncio.to_thread(self.index.source_age, source)
+        if age is None or age >= settings.agent_services.catalog_index_max_age_seconds:
+            await self.cache.get(source)
+        if settings.agent_services.catalog_vector_search_enabled:
+            await self.vector_index.ensure_source(source)
+
+    def _on_done(self, task: asyncio.Task):
+        metrics.gauge("prefetch.inflight", self._inflight())
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning("Falló la precarga del catálogo: %s", str(task.exception()))
+
+    def _discard(self, conversation_id: str):
+        if self._pending.pop(conversation_id, None) is not None:
+            metrics.incr("prefetch.wasted")
+
+    def _expire(self):
+        now = time.perf_counter()
+        for conversation_id, pending in list(self._pending.items()):
+            if now - pending["started_at"] > self.ttl_seconds:
+                self._discard(conversation_id)
+
+    def _inflight(self) -> int:
+        return sum(1 for pending in self._pending.values() if not pending["task"].done())
+
+
+catalog_prefetcher = CatalogPrefetcher(cache=catalog_cache, index=product_index, vector_index=product_vector_index)
@@ -0,0 +1,137 @@
+from typing import Any, Optional
+import re
+import unicodedata
+
+from inference.catalog.sources import CATALOG_MAIN_URL
+
+
+BATA_BASE_URL = "https://www.bata.com"
+
+# Alias de campos que suelen aparecer en la extracción (español / inglés)
+FIELD_ALIASES = {
+    "name": ("name", "nombre", "product_name", "title", "titulo"),
+    "sizes": ("sizes", "size", "tallas", "talla"),
+    "colors": ("colors", "color", "colores"),
+    "price": ("price", "precio", "sale_price", "precio_oferta"),
+    "link": ("link", "url", "href", "enlace"),
+    "description": ("description", "descripcion", "descripción", "caracteristicas", "características"),
+}
+
+
+def _first(item: dict, aliases: tuple) -> Any:
+    for alias in aliases:
+        if item.get(alias) not in (None, "", []):
+            return item[alias]
+    return None
+
+
+def _as_list(value: Any) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in re.split(r"[,/|]", str(value)) if v.strip()]
+
+
+def absolute_link(link: Optional[str]) -> Optional[str]:
+    if not link:
+        return None
+    link = str(link).strip()
+    if link.startswith("http"):
+        return link
+    if link.startswith("/"):
+        return f"{BATA_BASE_URL}{link}"
+    return f"{CATALOG_MAIN_URL}{link}"
+
+
+def _find_items(raw: Any) -> list[dict]:
+    """
+    Busca la primera lista de productos (lista de dicts) dentro del resultado crudo.
+    """
+    if isinstance(raw, list):
+        if raw and all(isinstance(item, dict) for item in raw):
+            return raw
+        return []
+    if isinstance(raw, dict):
+        if _first(raw, FIELD_ALIASES["name"]) and not any(isinstance(v, list) and v and isinstance(v[0], dict) for v in raw.values()):
+            return [raw]
+        for value in raw.values():
+            items = _find_items(value)
+            if items:
+                return items
+    return []
+
+
+def normalize_product(item: dict) -> Optional[dict]:
+    name = _first(item, FIELD_ALIASES["name"])
+    if not name:
+        return None
+    price = _first(item, FIELD_ALIASES["price"])
+    description = _first(item, FIELD_ALIASES["description"])
+    return {
+        "name": str(name).strip(),
+        "sizes": _as_list(_first(item, FIELD_ALIASES["sizes"])),
+        "colors": _as_list(_first(item, FIELD_ALIASES["colors"])),
+        "price": str(price).strip() if price is not None else None,
+        "link": absolute_link(_first(item, FIELD_ALIASES["link"])),
+        "description": str(description).strip() if description else None,
+    }
+
+
+def normalize_products(raw: Any) -> list[dict]:
+    """
+    Convierte la salida de la extracción (cualquier forma de dict/list) en una lista
+    de productos con campos fijos: name, sizes, colors, price, link, description.
+    """
+    products = []
+    seen = set()
+    for item in _find_items(raw):
+        product = normalize_product(item)
+        if product is None:
+            continue
+        key = (product["name"].lower(), product["link"])
+        if key in seen:
+            continue
+        seen.add(key)
+        products.append(product)
+    return products
+
+
+def fold_text(text: str) -> str:
+    """
+    Minúsculas y sin tildes, para comparar textos en español.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", fold_text(text)) if len(t) > 2]
+
+
+def product_text(product: dict) -> str:
+    return " ".join(filter(None, [
+        product.get("name"),
+        " ".join(product.get("colors") or []),
+        product.get("description"),
+    ]))
+
+
+def rank_products(products: list[dict], query: str, limit: Optional[int] = None) -> list[dict]:
+    """
+    Ordena los productos por coincidencia de palabras con la query (los que no
+    coinciden quedan al final, en su orden original) y retorna los `limit` primeros.
+    """
+    query_tokens = set(tokenize(query or ""))
+    if not query_tokens:
+        return products[:limit] if limit else list(products)
+
+    def score(indexed: tuple[int, dict]) -> tuple[int, int]:
+        index, product = indexed
+        tokens = set(tokenize(product_text(product)))
+        # Coincidencia por prefijo para cubrir plurales simples (sandalia/sandalias)
+        hits = sum(1 for q in query_tokens if any(t.startswith(q[:5]) for t in tokens))
+        return (-hits, index)
+
+    ranked = [product for _, product in sorted(enumerate(products), key=score)]
+    return ranked[:limit] if limit else ranked
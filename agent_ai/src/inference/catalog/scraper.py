@@ -0,0 +1,172 @@
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+import asyncio
+import logging
+import time
+
+from core.config import settings
+from core.metrics import metrics
+from inference.catalog.products import normalize_products
+from inference.catalog.parser import parse_listing
+
+
+# Recursos que no aportan al contenido de los productos y solo alargan la carga
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+# Selector de las tarjetas de producto del listado de Bata
+PRODUCT_TILE_SELECTOR = ".product-tile, [data-pid]"
+# La extracción no depende de la query del cliente: se extrae el listado completo
+# (cacheable por URL) y luego se ordena según la query.
+EXTRACTION_PROMPT = (
+    "Extrae todos los productos del listado con su nombre, tallas disponibles, colores, "
+    "precio, link y una breve descripción de sus características."
+)
+
+
+class BrowserPool:
+    """
+    Pool de contextos de navegador headless (Playwright) lanzados por adelantado.
+
+    El navegador se abre una sola vez por proceso y se reparten `size` contextos;
+    las solicitudes que llegan con todos los contextos ocupados esperan en cola.
+    """
+
+    def __init__(self, size: Optional[int] = None, navigation_timeout_seconds: Optional[float] = None):
+        self.size = size or settings.agent_services.scraper_browser_pool_size
+        self.navigation_timeout_ms = 1000 * (
+            navigation_timeout_seconds or settings.agent_services.scraper_navigation_timeout_seconds
+        )
+        self._playwright = None
+        self._browser = None
+        self._contexts: asyncio.Queue = asyncio.Queue()
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def started(self) -> bool:
+        return self._browser is not None
+
+    async def start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.started:
+                return
+            # Import diferido: Playwright solo se carga si se usa el scraper
+            from playwright.async_api import async_playwright
+
+            start = time.perf_counter()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            for _ in range(self.size):
+                context = await self._browser.new_context(locale="es-CO")
+                await context.route("**/*", self._block_heavy_resources)
+                self._contexts.put_nowait(context)
+            logging.info("Pool de navegadores iniciado (%s contextos) en %.2fs", self.size, time.perf_counter() - start)
+
+    async def close(self):
+        if not self.started:
+            return
+        while not self._contexts.empty():
+            await self._contexts.get_nowait().close()
+        await self._browser.close()
+        await self._playwright.stop()
+        self._browser = None
+        self._playwright = None
+
+    @asynccontextmanager
+    async def context(self):
+        if not self.started:
+            await self.start()
+        wait_start = time.perf_counter()
+        context = await self._contexts.get()
+        metrics.observe("scraper.pool_wait_ms", (time.perf_counter() - wait_start) * 1000)
+        try:
+            yield context
+        finally:
+            self._contexts.put_nowait(context)
+
+    async def fetch_html(self, url: str) -> str:
+        """
+        Carga `url` en un contexto del pool y retorna el HTML renderizado.
+        """
+        start = time.perf_counter()
+        async with self.context() as context:
+            page = await context.new_page()
+            try:
+                await page.goto(url, wait_until="domcontentloaded", timeout=self.navigation_timeout_ms)
+                try:
+                    await page.wait_for_selector(PRODUCT_TILE_SELECTOR, timeout=5000)
+                except Exception:
+                    logging.warning("No se encontraron tarjetas de producto en %s", url)
+                html = await page.content()
+            finally:
+                await page.close()
+        metrics.observe("scraper.fetch_ms", (time.perf_counter() - start) * 1000)
+        return html
+
+    @staticmethod
+    async def _block_heavy_resources(route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+
+class CatalogScraper:
+    """
+    Servicio asíncrono de scraping del catálogo: descarga la página con el pool de
+    navegadores y extrae los productos con el parser determinístico de tarjetas
+    (parser.parse_listing). Solo si la confianza del parser es baja se usa
+    SmartScraperGraph sobre el HTML ya descargado (en un hilo, para no bloquear
+    el event loop). Retorna la lista de productos normalizada.
+    """
+
+    def __init__(self, pool: BrowserPool, min_parser_confidence: Optional[float] = None):
+        self.pool = pool
+        self.min_parser_confidence = (
+            min_parser_confidence or settings.agent_services.scraper_min_parser_confidence
+        )
+
+    async def scrape(self, source: str) -> list[dict]:
+        html = await self.pool.fetch_html(source)
+
+        start = time.perf_counter()
+        products, parser_confidence = await asyncio.to_thread(parse_listing, html)
+        metrics.observe("scraper.parse_ms", (time.perf_counter() - start) * 1000)
+        if parser_confidence >= self.min_parser_confidence:
+            metrics.incr("scraper.parser_hits")
+            return products
+
+        logging.warning(
+            "Parser con baja confianza en %s (%.2f, %s productos); se usa extracción con LLM",
+            source, parser_confidence, len(products)
+        )
+        metrics.incr("scraper.llm_fallbacks")
+        start = time.perf_counter()
+        result = await asyncio.to_thread(self._extract_with_llm, html)
+        metrics.observe("scraper.extract_ms", (time.perf_counter() - start) * 1000)
+        return normalize_products(result)
+
+    def _extract_with_llm(self, html: str) -> Any:
+        # Import diferido: scrapegraphai es pesado y solo se necesita al extraer
+        from scrapegraphai.graphs import SmartScraperGraph
+
+        graph_config = {
+            "llm": {
+                "api_key": settings.ai_services.openai_api_key,
+                "model": "openai/gpt-4o-mini",
+                "max_tokens": 10000
+            },
+            "verbose": False,
+            "headless": True
+        }
+        # Con HTML como source, SmartScraperGraph no abre otro navegador
+        smart_scraper_graph = SmartScraperGraph(
+            prompt=EXTRACTION_PROMPT,
+            source=html,
+            config=graph_config
+        )
+        return smart_scraper_graph.run()
+
+
+browser_pool = BrowserPool()
+catalog_scraper = CatalogScraper(browser_pool)
@@ -0,0 +1,47 @@
+from typing import Optional
+
+
+CATALOG_MAIN_URL = "https://www.bata.com/co/"
+
+# Páginas del ecommerce por (género, categoría)
+CATALOG_URLS = {
+    "mujer":{
+        # "mujer":"https://www.bata.com/co/mujer/",
+        "ofertas":"https://www.bata.com/co/ofertas/mujer/",
+        "tendencia":"https://www.bata.com/co/nuevo/mujer/",
+        "zapatos":"https://www.bata.com/co/mujer/zapatos/",
+        "accesorios":"https://www.bata.com/co/mujer/accesorios/"
+    },
+    "hombre":{
+        "ofertas":"https://www.bata.com/co/ofertas/hombre/",
+        "tendencia":"https://www.bata.com/co/nuevo/hombre/",
+        "zapatos":"https://www.bata.com/co/hombre/zapatos/",
+        "accesorios":"https://www.bata.com/co/hombre/accesorios/"
+    },
+    "niño":{
+        "ofertas":"https://www.bata.com/co/ofertas/ni%C3%B1os/",
+        "tendencia":"https://www.bata.com/co/nuevo/infantil/",
+        "zapatos":"https://www.bata.com/co/infantil/ni%C3%B1o/zapatos/",
+        "accesorios":"https://www.bata.com/co/infantil/ni%C3%B1o/"     
+    },
+    "niña":{
+        "ofertas":"https://www.bata.com/co/ofertas/ni%C3%B1os/",
+        "tendencia":"https://www.bata.com/co/nuevo/infantil/",
+        "zapatos":"https://www.bata.com/co/infantil/ni%C3%B1a/zapatos/",
+        "accesorios":"https://www.bata.com/co/infantil/ni%C3%B1a/accesorios/"     
+    }
+}
+
+
+def resolve_source(gender: str, category: str) -> Optional[str]:
+    """
+    Retorna la URL del catálogo para (género, categoría) o None si no existe.
+    """
+    return CATALOG_URLS.get(gender, {}).get(category)
+
+
+def all_sources() -> list[str]:
+    """
+    URLs únicas del catálogo (algunas se comparten entre niño y niña).
+    """
+    return sorted({url for categories in CATALOG_URLS.values() for url in categories.values()})
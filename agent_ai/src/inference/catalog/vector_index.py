@@ -0,0 +1,180 @@
+from typing import Optional
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from core.cache import LRUTTLCache
+from core.config import settings
+from core.embedding_cache import EmbeddingCache, embedding_cache
+from core.metrics import metrics
+from core.schema_services import AzureServices
+from inference.catalog.index import ProductIndex, product_index
+from inference.catalog.products import product_text
+
+
+class ProductVectorIndex:
+    """
+    Índice semántico de productos en memoria.
+
+    Cada URL del catálogo tiene una matriz NumPy (float32 normalizada, o int8 con
+    escala por fila si `quantize`) con los embeddings de sus productos; la búsqueda
+    es un producto punto + top-k (argpartition), de fuerza bruta: con unos miles de
+    productos por proceso toma menos de un milisegundo y no justifica un ANN.
+
+    Los embeddings se identifican por el hash del texto del producto y del modelo,
+    se guardan en la caché de embeddings del proceso (EmbeddingCache, la misma de
+    los documentos) y se reutilizan entre URLs y reinicios: al reindexar una URL
+    solo se calculan los de productos nuevos o modificados.
+    """
+
+    def __init__(self, store: ProductIndex, cache: Optional[EmbeddingCache] = None, quantize: Optional[bool] = None):
+        self.store = store
+        self.cache = cache
+        self.quantize = settings.agent_services.catalog_vector_quantize if quantize is None else quantize
+        self._sources: dict[str, dict] = {}
+        self._vectors: dict[str, np.ndarray] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._query_cache = LRUTTLCache(
+            "catalog_vectors.query_cache",
+            max_entries=settings.agent_services.catalog_vector_query_cache_size,
+            ttl_seconds=settings.agent_services.catalog_index_max_age_seconds
+        )
+
+    @property
+    def embeddings(self):
+        return AzureServices.LLMRegistry.get_openai_service().model_embeddings
+
+    @staticmethod
+    def content_hash(product: dict) -> str:
+        return EmbeddingCache.key(settings.ai_services.model_embeddings_name or "", product_text(product))
+
+    async def update_source(self, source: str, products: list[dict]) -> int:
+        """
+        Reconstruye la matriz de `source` con `products` y retorna cuántos
+        embeddings hubo que calcular (los demás se reutilizan).
+        """
+        async with self._lock_for(source):
+            if not products:
+                self._sources.pop(source, None)
+                return 0
+            hashes = [self.content_hash(product) for product in products]
+            vectors, computed = await self._ensure_vectors(hashes, products)
+
+            matrix = np.vstack([vectors[h] for h in hashes])
+            entry = {"products": products, "hashes": hashes}
+            if self.quantize:
+                # int8 simétrico por fila: ~4x menos memoria, error de score despreciable
+                scales = np.abs(matrix).max(axis=1, keepdims=True) / 127.0
+                scales[scales == 0] = 1.0
+                entry["matrix"] = np.round(matrix / scales).astype(np.int8)
+                entry["scales"] = scales.ravel().astype(np.float32)
+            else:
+                entry["matrix"] = matrix
+            self._sources[source] = entry
+            self._prune()
+
+        metrics.incr("catalog_vectors.embedded", computed)
+        metrics.incr("catalog_vectors.reused", len(hashes) - computed)
+        metrics.gauge("catalog_vectors.products", sum(len(e["products"]) for e in self._sources.values()))
+        return computed
+
+    async def search(self, source: str, query: str, limit: int = 20) -> Optional[list[dict]]:
+        """
+        Retorna los `limit` productos de `source` más similares a `query`, o None si
+        la URL no está indexada (el llamador usa entonces el orden léxico).
+        """
+        if not query or not query.strip():
+            return None
+        if not await self.ensure_source(source):
+            return None
+
+        query_vector = await self._embed_query(query)
+        entry = self._sources.get(source)
+        if entry is None:
+            return None
+
+        start = time.perf_counter()
+        scores = entry["matrix"] @ query_vector
+        if "scales" in entry:
+            scores = scores * entry["scales"]
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        metrics.observe("catalog_vectors.search_ms", (time.perf_counter() - start) * 1000)
+        return [entry["products"][i] for i in top]
+
+    async def ensure_source(self, source: str) -> bool:
+        """
+        Carga la matriz de `source` desde el índice local si aún no está en memoria
+        (primer uso tras un reinicio). Retorna False si la URL no tiene productos.
+        """
+        if source in self._sources:
+            return True
+        products = await asyncio.to_thread(self.store.get_products, source)
+        if not products:
+            return False
+        await self.update_source(source, products)
+        return True
+
+    async def _ensure_vectors(self, hashes: list[str], products: list[dict]) -> tuple[dict[str, np.ndarray], int]:
+        """
+        Retorna los vectores de `hashes` (memoria -> caché en disco -> API de
+        embeddings) y cuántos hubo que calcular.
+        """
+        vectors = {h: self._vectors[h] for h in hashes if h in self._vectors}
+        missing = {h: p for h, p in zip(hashes, products) if h not in vectors}
+        if not missing:
+            return vectors, 0
+
+        stored = await asyncio.to_thread(self.cache.get_many, list(missing)) if self.cache is not None else {}
+        for h, vector in stored.items():
+            vectors[h] = self._normalize(vector)
+
+        pending = {h: p for h, p in missing.items() if h not in stored}
+        if not pending:
+            self._vectors.update(vectors)
+            return vectors, 0
+
+        start = time.perf_counter()
+        embedded = await self.embeddings.aembed_documents([product_text(p) for p in pending.values()])
+        metrics.observe("catalog_vectors.embed_ms", (time.perf_counter() - start) * 1000)
+        vectors.update({h: self._normalize(v) for h, v in zip(pending, embedded)})
+        self._vectors.update(vectors)
+        if self.cache is not None:
+            # Se guardan tal como los entrega la API, igual que los de documentos
+            await asyncio.to_thread(self.cache.put_many, dict(zip(pending, embedded)))
+        logging.info("Embeddings del catálogo: %s nuevos, %s reutilizados", len(pending), len(hashes) - len(pending))
+        return vectors, len(pending)
+
+    async def _embed_query(self, query: str) -> np.ndarray:
+        key = query.strip().lower()
+        vector = self._query_cache.get(key)
+        if vector is None:
+            vector = self._normalize(await self.embeddings.aembed_query(key))
+            self._query_cache.set(key, vector)
+        return vector
+
+    def _prune(self):
+        # Solo se conservan en memoria los vectores de productos presentes en alguna URL
+        in_use = {h for entry in self._sources.values() for h in entry["hashes"]}
+        for h in [h for h in self._vectors if h not in in_use]:
+            del self._vectors[h]
+
+    def _lock_for(self, source: str) -> asyncio.Lock:
+        if source not in self._locks:
+            self._locks[source] = asyncio.Lock()
+        return self._locks[source]
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+product_vector_index = ProductVectorIndex(
+    store=product_index,
+    cache=embedding_cache if settings.agent_services.embedding_cache_enabled else None
+)
@@ -0,0 +1,121 @@
+from typing import Optional
+import json
+import logging
+
+import tiktoken
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage, ToolMessage
+
+from core.config import settings
+from core.metrics import metrics
+
+
+SUMMARY_PROMPT = """
+Eres el encargado de mantener la memoria de una conversación entre un cliente y BataBot
+(asistente de compras de Bata). Actualiza el resumen existente incorporando los nuevos
+mensajes. Conserva solo lo útil para continuar la atención: para quién compra (mujer,
+hombre, niño, niña), categoría, tallas, colores, presupuesto, productos o links ya
+entregados, documentos mencionados y compromisos pendientes. Escribe en el idioma del
+cliente, en prosa breve, sin inventar información y con un máximo de {max_tokens} tokens.
+"""
+
+
+class ConversationContextManager:
+    """
+    Empaqueta el historial de una conversación dentro de un presupuesto de tokens.
+
+    El historial se agrupa en turnos (un HumanMessage y todo lo que le sigue). Se
+    incluyen turnos del más reciente al más antiguo mientras quepan en el presupuesto;
+    el turno actual se incluye siempre. Los turnos que no caben se compactan en un
+    resumen acumulado (rolling summary) que se persiste por conversation_id.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        summary_max_tokens: Optional[int] = None,
+        model_reference: str = "cl100k_base"
+    ):
+        self.max_tokens = max_tokens or settings.agent_services.context_max_tokens
+        self.summary_max_tokens = summary_max_tokens or settings.agent_services.summary_max_tokens
+        self._encoder = tiktoken.get_encoding(model_reference)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._encoder.encode(text)) if text else 0
+
+    def count_message_tokens(self, message: BaseMessage) -> int:
+        # ~4 tokens de overhead por mensaje en el formato de chat de OpenAI
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+        tokens = 4 + self.count_tokens(content)
+        for call in getattr(message, "tool_calls", None) or []:
+            tokens += self.count_tokens(call.get("name", "")) + self.count_tokens(json.dumps(call.get("args", {}), ensure_ascii=False))
+        return tokens
+
+    @staticmethod
+    def split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+        """
+        Agrupa los mensajes en turnos. Cada turno inicia con un HumanMessage, de modo
+        que las tool calls y sus ToolMessage nunca quedan separados.
+        """
+        turns: list[list[BaseMessage]] = []
+        for message in messages:
+            if isinstance(message, SystemMessage):
+                continue
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def pack(self, messages: list[BaseMessage], reserved_tokens: int = 0) -> tuple[list[BaseMessage], list[BaseMessage]]:
+        """
+        Retorna (ventana, desbordados): la ventana son los turnos más recientes que
+        caben en `max_tokens - reserved_tokens`; los desbordados son los más antiguos.
+        """
+        turns = self.split_turns(messages)
+        budget = self.max_tokens - reserved_tokens
+
+        window_turns: list[list[BaseMessage]] = []
+        used = 0
+        for index, turn in enumerate(reversed(turns)):
+            turn_tokens = sum(self.count_message_tokens(m) for m in turn)
+            # El turno actual (el último) se incluye siempre
+            if index > 0 and used + turn_tokens > budget:
+                break
+            window_turns.insert(0, turn)
+            used += turn_tokens
+
+        overflow_turns = turns[:len(turns) - len(window_turns)]
+        window = [m for turn in window_turns for m in turn]
+        overflow = [m for turn in overflow_turns for m in turn]
+
+        metrics.observe("context.window_tokens", used)
+        return window, overflow
+
+    def fit(self, messages: list[BaseMessage], reserved_tokens: int = 0) -> list[BaseMessage]:
+        return self.pack(messages, reserved_tokens)[0]
+
+    async def summarize(self, llm, previous_summary: Optional[str], messages: list[BaseMessage]) -> str:
+        """
+        Incorpora `messages` al resumen previo usando el LLM.
+        """
+        lines = []
+        for message in messages:
+            if isinstance(message, HumanMessage):
+                lines.append(f"Cliente: {message.content}")
+            elif isinstance(message, AIMessage) and message.content:
+                lines.append(f"BataBot: {message.content}")
+            elif isinstance(message, ToolMessage):
+                # Los resultados de tools se resumen en la respuesta del bot que los usó
+                continue
+
+        prompt = [
+            SystemMessage(content=SUMMARY_PROMPT.format(max_tokens=self.summary_max_tokens)),
+            HumanMessage(content=(
+                f"Resumen actual:\n{previous_summary or '(vacío)'}\n\n"
+                f"Nuevos mensajes:\n" + "\n".join(lines)
+            ))
+        ]
+        response = await llm.ainvoke(prompt, max_tokens=self.summary_max_tokens)
+        logging.info("Resumen de conversación actualizado (%s mensajes compactados)", len(messages))
+        metrics.incr("context.summaries")
+        return response.content
@@ -1,22 +1,94 @@
-from typing import Optional, Literal
+from typing import Optional, Literal, AsyncIterator
+import asyncio
+import logging
+import time
 
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage, ToolMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, AIMessageChunk, BaseMessage, ToolMessage
 from langgraph.graph import StateGraph, START, MessagesState, END
 from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 
 from core.config import settings
 from core.schema_services import AzureServices
+from core.container import services
+from core.metrics import metrics
+from core.cache import LRUTTLCache
+from core.deadline import Deadline, DeadlineExceeded
 # from inference.cosmosDB import AsyncCosmosDBSaver
 from core import utils
 import pdb
-from IPython.display import Image, display
-from langchain_core.runnables.graph import CurveStyle, MermaidDrawMethod, NodeStyles
 from datetime import datetime
 from inference.tools.bata_tools import search_tool, retrieval_tool, scrape_tool
-
-
-ai_services = AzureServices()
-cosmos_db = ai_services.CosmosDBClient()
+from inference.tools.executor import ToolExecutor
+from inference.context_manager import ConversationContextManager
+from inference.catalog.prefetch import catalog_prefetcher
+from inference.catalog.sources import resolve_source
+from inference.intent import intent_classifier, conversation_slots
+from inference.response_cache import SemanticResponseCache, prompt_fingerprint
+from inference.prompt_builder import PromptBuilder, record_prompt_usage
+
+
+# Cliente de Cosmos compartido por el proceso (core.container)
+cosmos_db = services.cosmos
+
+# Limita las llamadas concurrentes al LLM en este proceso. Las llamadas son
+# asíncronas (no bloquean el event loop); el semáforo solo evita saturar el
+# deployment de Azure OpenAI cuando llegan muchas conversaciones a la vez.
+llm_semaphore = asyncio.Semaphore(settings.agent_services.llm_max_concurrency)
+
+# Ventana de historial acotada por tokens + resumen acumulado por conversación
+context_manager = ConversationContextManager()
+
+
+def _query_arg(tool_args) -> str:
+    if isinstance(tool_args, dict) and "query" in tool_args:
+        return tool_args["query"]   # extraemos string
+    return tool_args                # asumimos que es str
+
+# Tools disponibles para el agente: todas las tool calls de un turno se ejecutan
+# en paralelo, cada una con su timeout y su límite de concurrencia.
+tool_executor = ToolExecutor({
+    "search_tool": {
+        "func": search_tool,
+        "build_kwargs": lambda args, state: {"query": _query_arg(args)},
+        "timeout": settings.agent_services.search_tool_timeout_seconds,
+        "max_concurrency": settings.agent_services.tool_max_concurrency
+    },
+    "retrieval_tool": {
+        "func": retrieval_tool,
+        "build_kwargs": lambda args, state: {"query": _query_arg(args), "conversation_id": state["thread_id"]},
+        "timeout": settings.agent_services.retrieval_tool_timeout_seconds,
+        "max_concurrency": settings.agent_services.tool_max_concurrency
+    },
+    "scrape_tool": {
+        "func": scrape_tool,
+        "build_kwargs": lambda args, state: {
+            "query": args["query"],
+            "gender": args["gender"],
+            "category": args["category"]
+        },
+        "timeout": settings.agent_services.scrape_tool_timeout_seconds,
+        "max_concurrency": settings.agent_services.scrape_tool_max_concurrency
+    },
+}, answer_reserve_seconds=settings.agent_services.turn_answer_reserve_seconds)
+
+# Margen sobre el deadline del turno antes de cortar el grafo completo (los nodos
+# ya respetan el deadline; esto solo cubre etapas que no lo consultan)
+DEADLINE_GRACE_SECONDS = 2.0
+# Respuesta cuando se agota el tiempo del turno
+FALLBACK_ANSWER = (
+    "Lo siento, estoy tardando más de lo normal en responder 🙏. "
+    "¿Me escribes de nuevo en un momento para intentarlo otra vez?"
+)
+
+
+async def _within_deadline(state: dict, stage: str, awaitable, cap: Optional[float] = None):
+    """
+    Ejecuta `awaitable` con el tiempo restante del turno (si el estado trae deadline).
+    """
+    deadline = state.get("deadline")
+    if deadline is None:
+        return await awaitable
+    return await deadline.run(stage, awaitable, cap=cap)
 
 
 
@@ -26,10 +98,12 @@ cosmos_db = ai_services.CosmosDBClient()
 class PDFChatState(MessagesState):
     pdf_text: Optional[str] = None
     thread_id: Optional[str] = None
+    summary: Optional[str] = None
+    intent: Optional[dict] = None
+    deadline: Optional[Deadline] = None
 
 SYSTEM_PROMPT =     """
 
-        Fecha y Hora Actual: {{fecha-hora}}
         Eres un asistente de IA de Bata llamado BataBot, encargado de asesorar a los clientes a través de WhatsApp y guiarlos en su proceso de compra en nuestro ecommerce. Tu objetivo es ayudar a los clientes a encontrar el producto ideal y dirigirlos al enlace de compra. Para ello, debes:
 
         Indagar los intereses y necesidades del cliente: Pregunta de manera amable y respetuosa sobre qué tipo de producto busca, asegurándote de identificar si se trata de artículos para hombre, mujer, 'niño' o 'niña' y a qué categoría pertenece el producto deseado: 'zapatos', 'accesorios', 'ofertas' o 'tendencia'.
@@ -56,225 +130,205 @@ SYSTEM_PROMPT =     """
             Para resaltar el texto en negrilla solo utiliza un asterisco al final y otro al principio del texto (*ejemplo*)
 
         """
-        
-
-######################################################
-# 2) main_agent_node (asíncrono) + tools usage
-######################################################
-async def main_agent_node(state: PDFChatState) -> PDFChatState:
-    """
-    1) Inyecta system prompt y PDF
-    2) Llama repetidamente al LLM (con .bind_tools([...]))
-       Si el LLM produce tool_calls (ej: name="search_tool"), se ejecutan
-       y se añade un AIMessage con los resultados. 
-       Se repite hasta que no haya más tool_calls.
-    3) Devuelve el estado final
-    """
-    # Preparar la conversacion
-    max_messages = 10 
 
-    system_msg = SystemMessage(content=SYSTEM_PROMPT.replace("{{fecha-hora}}",datetime.now().isoformat()) + f" {state['pdf_text']}" )#\n Documentos consultables a través de la tool 'retrieval_tool':
-    new_messages = [system_msg] + state["messages"][-max_messages:]
+# Prefijo estático del prompt (prompt caching); fecha, documentos y resumen van después
+prompt_builder = PromptBuilder(SYSTEM_PROMPT)
 
-    # 1) Preparamos el LLM que tenga "search_tool" enlazado
-    llm_raw = AzureServices().service_azure_open_ai.model_ai
-    # bind_tools => el LLM sabe formatear la tool call como 
-    # {"tool_calls": [{"name": "search_tool", "args": "..."}]}
-    llm_with_tools = llm_raw.bind_tools([search_tool,retrieval_tool, scrape_tool])
+# Versión de las respuestas cacheadas: subirla invalida la caché de respuestas
+RESPONSE_CACHE_VERSION = "1"
+response_cache = SemanticResponseCache(
+    fingerprint=prompt_fingerprint(SYSTEM_PROMPT, settings.ai_services.model_gpt4o_name, RESPONSE_CACHE_VERSION)
+)
 
-    # 2) Bucle: Llamamos al LLM -> revisamos tool_calls -> ejecutamos -> loop
-    # while True:
-    #     # Llamado sincrónico al LLM
+# Avisos que se envían por streaming mientras se ejecuta cada tool
+TOOL_PROGRESS_MESSAGES = {
+    "scrape_tool": "Buscando en el catálogo de Bata…",
+    "search_tool": "Buscando en la web…",
+    "retrieval_tool": "Consultando tus documentos…",
+}
 
-    response_msg = llm_with_tools.invoke(new_messages)
-    print("\033[92mresponse_msg:", response_msg.content, "\033[0m")
-    response_msg.content=response_msg.content.replace("**","*")
-    #     # Añadimos su output al historial
-    new_messages.append(response_msg)
+# Respuestas del fast path (turnos que no necesitan al modelo grande)
+GENDER_OPTIONS = "*mujer*, *hombre*, *niño* o *niña*"
+CATEGORY_OPTIONS = "*zapatos*, *accesorios*, *ofertas* o *tendencia*"
+FAST_PATH_PROMPT = """
+Eres BataBot, asistente de compras de Bata por WhatsApp. Reescribe el mensaje sugerido
+de forma natural y amigable, con emojis, en el idioma del cliente y en máximo dos frases.
+No agregues productos, precios ni links. Para resaltar usa un asterisco a cada lado (*así*).
 
-    # 3) Retornar el estado final
-    return {
-        "messages": new_messages,
-        "pdf_text": state["pdf_text"],
-        "thread_id": state["thread_id"]
-    }
-async def web_search_node(state: PDFChatState) -> PDFChatState:
-    """
-    1) Nodo con Tool de Busqueda Web
-    """
+Mensaje sugerido: {reply}
+"""
 
-    # while True:
 
-    new_messages=[]
-    # Llamado sincrónico al LLM
-    response_msg = state["messages"][-1]#llm_with_tools.invoke(new_messages)
-    # Añadimos su output al historial
-    # new_messages.append(response_msg)
+def fallback_message() -> AIMessage:
+    return AIMessage(content=FALLBACK_ANSWER, response_metadata={"fallback": "deadline"})
 
-    # Ver tool_calls en el AIMessage
-    tool_calls = getattr(response_msg, "tool_calls", None) or []
-    # if not tool_calls:
-    #     # No hay tools que invocar => rompemos el bucle
-    #     break
 
-    # De lo contrario, para cada tool_call => ejecutar
-    for call in tool_calls:
-        tool_name = call["name"]
-        tool_id = call["id"]      # ID con que el LLM etiquetó la llamada
-        tool_args = call["args"]
-
-        # # Tool Search
-        if tool_name == "search_tool":
-
-            if isinstance(tool_args, dict) and "query" in tool_args:
-                actual_query = tool_args["query"]   # extraemos string
-            else:
-                actual_query = tool_args            # asumimos que es str
-
-            results = await search_tool(actual_query)
-            tool_content = f"Tool '{tool_name}' result:\n{results}"
-
-            # Mensaje "tool" (o "assistant") con el ID correspondiente
-            tool_msg = ToolMessage(
-                content=tool_content,
-                name=tool_name,
-                tool_call_id=tool_id
-            )
-            new_messages.append(tool_msg)
+def fast_path_reply(intent: dict) -> str:
+    """
+    Respuesta de plantilla según la intención y los slots de la conversación.
+    """
+    gender, category = intent.get("gender"), intent.get("category")
+    if intent["intent"] == "thanks":
+        return "¡Con mucho gusto! 😊 Si necesitas algo más de Bata, aquí estaré para ayudarte. 👟"
+    if intent["intent"] == "greeting" and not (gender or category):
+        return (
+            f"¡Hola! 👋 Soy *BataBot*, tu asesor de compras de Bata. ¿Buscas algo para {GENDER_OPTIONS}? "
+            f"¿Y qué te interesa: {CATEGORY_OPTIONS}? 😊"
+        )
+    if gender and category:
+        return (
+            f"¡Excelente! 🙌 Puedo buscar *{category}* para *{gender}* en nuestro catálogo; la búsqueda "
+            "tarda unos segundos. ¿Quieres que la realice? Si tienes alguna preferencia (estilo, color, talla), cuéntame. 🔎"
+        )
+    if gender:
+        return f"¡Perfecto! 😊 Para *{gender}*, ¿qué te interesa: {CATEGORY_OPTIONS}? 👟"
+    return f"¡Genial! 😊 ¿Buscas *{category}* para {GENDER_OPTIONS}?"
         
-        else:
-            no_tool_msg = AIMessage(
-                content=f"No tool found named {tool_name}",
-                additional_kwargs={"tool_call_id": tool_id}
-            )
-            new_messages.append(no_tool_msg)
-            
-        # state["messages"] = state["messages"] + new_messages
-    # Se repite el while => el LLM ve esos ToolMessage y puede decidir 
-    # si volver a llamar la tool o responder.
 
-    # 3) Retornar el estado final
+######################################################
+# 2) Router de intención + fast path
+######################################################
+async def intent_router_node(state: PDFChatState) -> PDFChatState:
+    """
+    Clasifica localmente (reglas + similitud, sin LLM) el último mensaje del cliente.
+    Saludos, agradecimientos y turnos que solo definen género/categoría van al
+    fast path; todo lo demás sigue al modelo grande (MainAgentNode).
+    """
+    last_message = state["messages"][-1]
+    if not settings.agent_services.fast_path_enabled or not isinstance(last_message.content, str):
+        return {"intent": {"intent": "other", "fast_path": False}}
+
+    intent = intent_classifier.classify(last_message.content)
+    if intent["fast_path"]:
+        # Los slots se completan con lo que el cliente ya dijo en turnos anteriores.
+        # Solo mensajes del cliente: las respuestas del bot listan todas las opciones
+        recent = [m.content for m in state["messages"] if isinstance(m, HumanMessage) and isinstance(m.content, str)]
+        intent.update(conversation_slots(recent[-3:]))
+
+    metrics.incr("router.turns")
+    metrics.incr(f"router.intent.{intent['intent']}")
+    if intent["fast_path"]:
+        metrics.incr("router.fast_path")
+    metrics.gauge("router.fast_path_share", round(metrics.counter("router.fast_path") / metrics.counter("router.turns"), 4))
+    return {"intent": intent}
+
+def route_after_intent(state: PDFChatState) -> Literal["FastPathNode", "MainAgentNode"]:
+    return "FastPathNode" if (state.get("intent") or {}).get("fast_path") else "MainAgentNode"
+
+async def fast_path_node(state: PDFChatState) -> PDFChatState:
+    """
+    Responde el turno con una plantilla o, si hay deployment pequeño configurado
+    (MODEL_FAST_NAME), con ese modelo reescribiendo la plantilla.
+    """
+    start = time.perf_counter()
+    reply = fast_path_reply(state["intent"])
+    fast_model = AzureServices.LLMRegistry.get_openai_service().model_fast
+    response_msg = None
+    if fast_model is not None:
+        async def call_fast_model():
+            async with llm_semaphore:
+                return await fast_model.ainvoke(
+                    [SystemMessage(content=FAST_PATH_PROMPT.format(reply=reply))] + state["messages"][-4:]
+                )
+        try:
+            response_msg = await _within_deadline(state, "llm.fast", call_fast_model())
+            response_msg.content = response_msg.content.replace("**", "*")
+            response_msg.response_metadata["fast_path"] = "model"
+        except DeadlineExceeded:
+            # Sin tiempo para el modelo pequeño: la plantilla sirve igual
+            response_msg = None
+    if response_msg is None:
+        response_msg = AIMessage(content=reply, response_metadata={"fast_path": "template"})
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    metrics.observe("fast_path.turn_ms", elapsed_ms)
+    metrics.gauge(
+        "router.p50_saved_ms",
+        round(metrics.percentile("llm.turn_ms", 50) - metrics.percentile("fast_path.turn_ms", 50), 1)
+    )
+    print(f"\033[92mfast_path ({state['intent']['intent']}, {elapsed_ms:.0f} ms):", response_msg.content, "\033[0m")
+
+    # Si ya se conocen género y categoría, el bot pide confirmación: se precarga el catálogo
+    if settings.agent_services.catalog_prefetch_enabled:
+        catalog_prefetcher.schedule(state["thread_id"], state["messages"] + [response_msg])
+
     return {
-        "messages": new_messages,
+        "messages": [response_msg],
         "pdf_text": state["pdf_text"],
         "thread_id": state["thread_id"]
     }
-async def document_retrieval_node(state: PDFChatState) -> PDFChatState:
-    """
-    1) Nodo con Tool de Busqueda en Base de Datos vectorial. 
-    """
-    
-    # while True:
-    new_messages=[]
-    # Llamado sincrónico al LLM
-    response_msg = state["messages"][-1]#llm_with_tools.invoke(new_messages)
-    # Añadimos su output al historial
-    # new_messages.append(response_msg)
-
-    # Ver tool_calls en el AIMessage
-    tool_calls = getattr(response_msg, "tool_calls", None) or []
-    # if not tool_calls:
-    #     # No hay tools que invocar => rompemos el bucle
-    #     break
 
-    # De lo contrario, para cada tool_call => ejecutar
-    for call in tool_calls:
-        tool_name = call["name"]
-        tool_id = call["id"]      # ID con que el LLM etiquetó la llamada
-        tool_args = call["args"]
 
-        
-        # Mensaje "tool" (o "assistant") con el ID correspondiente
-        #Tool Retrieval
-        if tool_name == "retrieval_tool":
-            # pdb.set_trace()
-            if isinstance(tool_args, dict) and "query" in tool_args:
-                actual_query = tool_args["query"]   # extraemos string
-            else:
-                actual_query = tool_args            # asumimos que es str
-
-            results = await retrieval_tool(actual_query, state["thread_id"])
-            tool_content = f"Tool '{tool_name}' result:\n{results}"
-
-            # Mensaje "tool" (o "assistant") con el ID correspondiente
-            tool_msg = ToolMessage(
-                content=tool_content,
-                name=tool_name,
-                tool_call_id=tool_id
-            )
-            new_messages.append(tool_msg)
-            
-        else:
-            no_tool_msg = AIMessage(
-                content=f"No tool found named {tool_name}",
-                additional_kwargs={"tool_call_id": tool_id}
-            )
-            new_messages.append(no_tool_msg)
+######################################################
+# 3) main_agent_node (asíncrono) + tools usage
+######################################################
+async def main_agent_node(state: PDFChatState) -> PDFChatState:
+    """
+    1) Arma el prompt (prefijo estático + documentos, resumen, historial y fecha)
+    2) Llama repetidamente al LLM (con .bind_tools([...]))
+       Si el LLM produce tool_calls (ej: name="search_tool"), se ejecutan
+       y se añade un AIMessage con los resultados. 
+       Se repite hasta que no haya más tool_calls.
+    3) Devuelve el estado final
+    """
+    # Preparar la conversacion: el historial se recorta por presupuesto de tokens
+    # (no por cantidad de mensajes) y lo más antiguo llega como resumen. El prompt
+    # empieza con un prefijo estable (cacheable por Azure OpenAI) y lo volátil va al final.
+    new_messages = prompt_builder.build(
+        context_manager.fit(state["messages"]),
+        pdf_text=state.get("pdf_text"),
+        summary=state.get("summary")
+    )
+
+    # 1) LLM con tools enlazadas, construido una sola vez por proceso.
+    # bind_tools => el LLM sabe formatear la tool call como 
+    # {"tool_calls": [{"name": "search_tool", "args": "..."}]}
+    llm_with_tools = AzureServices.LLMRegistry.get_tool_model(tool_executor.tools)
+
+    # 2) Llamado asíncrono al LLM: mientras esperamos la respuesta de Azure OpenAI
+    #    el event loop sigue atendiendo otras conversaciones. La espera por el
+    #    semáforo y la llamada comparten el tiempo restante del turno.
+    async def call_llm():
+        async with llm_semaphore:
+            start = time.perf_counter()
+            response = await llm_with_tools.ainvoke(new_messages)
+            metrics.observe("llm.turn_ms", (time.perf_counter() - start) * 1000)
+            return response
+    try:
+        response_msg = await _within_deadline(state, "llm", call_llm())
+    except DeadlineExceeded:
+        logging.warning("Sin tiempo para la respuesta del LLM en %s; se envía la respuesta de respaldo", state["thread_id"])
+        response_msg = fallback_message()
+    record_prompt_usage(response_msg)
+    print("\033[92mresponse_msg:", response_msg.content, "\033[0m")
+    response_msg.content=response_msg.content.replace("**","*")
 
-        # Se repite el while => el LLM ve esos ToolMessage y puede decidir 
-        # si volver a llamar la tool o responder.
+    # 3) Si el bot pide confirmación antes de buscar, el catálogo ya se empieza a
+    #    cargar en segundo plano para que el turno del "sí" lo encuentre listo.
+    if not response_msg.tool_calls and settings.agent_services.catalog_prefetch_enabled:
+        catalog_prefetcher.schedule(state["thread_id"], state["messages"] + [response_msg])
 
-    # 3) Retornar el estado final
+    # 4) Retornar el estado final: solo se añade la respuesta al historial
+    #    (el system prompt no se acumula en el estado)
     return {
-        "messages": new_messages,
+        "messages": [response_msg],
         "pdf_text": state["pdf_text"],
         "thread_id": state["thread_id"]
     }
-
-async def web_scraper_node(state: PDFChatState) -> PDFChatState:
+async def tool_executor_node(state: PDFChatState) -> PDFChatState:
     """
-    1) Nodo con Tool de Web Scraping
-    
+    1) Nodo genérico de tools: ejecuta en paralelo todas las tool calls del
+       último AIMessage (con timeout y límite de concurrencia por tool) y
+       retorna los ToolMessage en el mismo orden de las llamadas.
     """
-    
-    # while True:
-    new_messages=[]
-    # Llamado sincrónico al LLM
-    response_msg = state["messages"][-1]#llm_with_tools.invoke(new_messages)
-    # Añadimos su output al historial
-    # new_messages.append(response_msg)
-
-    # Ver tool_calls en el AIMessage
+    response_msg = state["messages"][-1]
     tool_calls = getattr(response_msg, "tool_calls", None) or []
-    # if not tool_calls:
-    #     # No hay tools que invocar => rompemos el bucle
-    #     break
-
-    # De lo contrario, para cada tool_call => ejecutar
+    # 2) Las búsquedas en el catálogo reclaman la precarga especulativa (si la hay)
     for call in tool_calls:
-        tool_name = call["name"]
-        tool_id = call["id"]      # ID con que el LLM etiquetó la llamada
-        tool_args = call["args"]
-
-        
-        # Mensaje "tool" (o "assistant") con el ID correspondiente
-        #Tool Retrieval
-        if tool_name == "scrape_tool":
-
-            results = scrape_tool(
-                query=tool_args["query"],
-                gender=tool_args["gender"],
-                category=tool_args["category"]
-                )
-            tool_content = f"Tool '{tool_name}' result:\n{results}"
-
-            # Mensaje "tool" (o "assistant") con el ID correspondiente
-            tool_msg = ToolMessage(
-                content=tool_content,
-                name=tool_name,
-                tool_call_id=tool_id
-            )
-            new_messages.append(tool_msg)
-            
-        else:
-            no_tool_msg = AIMessage(
-                content=f"No tool found named {tool_name}",
-                additional_kwargs={"tool_call_id": tool_id}
-            )
-            new_messages.append(no_tool_msg)
-
-        # Se repite el while => el LLM ve esos ToolMessage y puede decidir 
-        # si volver a llamar la tool o responder.
+        if call["name"] == "scrape_tool" and isinstance(call["args"], dict):
+            source = resolve_source(call["args"].get("gender"), call["args"].get("category"))
+            catalog_prefetcher.claim(state["thread_id"], source)
+    new_messages = await tool_executor.execute(tool_calls, state)
 
     # 3) Retornar el estado final
     return {
@@ -282,21 +336,20 @@ async def web_scraper_node(state: PDFChatState) -> PDFChatState:
         "pdf_text": state["pdf_text"],
         "thread_id": state["thread_id"]
     }
+
 def route_after_agent(
         state: PDFChatState,
     ) -> Literal[
         "MainAgentNode",
-        # "SearchNode",
-        # "RetrievalNode",
-        "WebScraperNode",
+        "ToolExecutorNode",
         "__end__"]: #, "call_agent_model",
     """Direcciona el siguiente nodo tras la acción del agente.
 
     Esta función determina el siguiente paso en el proceso de investigación basándose en el
-    último mensaje en el estado. Maneja tres escenarios principales:
+    último mensaje en el estado:
 
-    
-    1. Scraper en Ecommerce de Bata
+    1. Si el agente pidió tools (una o varias), todas se ejecutan en ToolExecutorNode.
+    2. Si no, termina el flujo.
     """
     last_message = state["messages"][-1]
 
@@ -308,49 +361,54 @@ def route_after_agent(
     
 
     if last_message.tool_calls:
-        # if last_message.tool_calls and last_message.tool_calls[0]["name"] == "search_tool":
-        #     return "SearchNode"
-        # if last_message.tool_calls and last_message.tool_calls[0]["name"] == "retrieval_tool":
-        #     return "RetrievalNode"
-        if last_message.tool_calls and last_message.tool_calls[0]["name"] == "scrape_tool":
-            return "WebScraperNode"
-        # The last message is a tool call that is not "Info" (extraction output)
+        return "ToolExecutorNode"
     else:
         return "__end__"
 
 ######################################################
-# 3) Construir el Graph + checkpoint
+# 4) Construir el Graph + checkpoint
 ######################################################
 class PDFChatAgent:
     def __init__(self):
         # 1) Creamos un StateGraph con PDFChatState
         workflow = StateGraph(state_schema=PDFChatState)
         
-        # 2) Añadimos un solo nodo (main_agent_node)
+        # 2) Nodos: router de intención, fast path, agente principal y tools
+        workflow.add_node("IntentRouterNode", intent_router_node)
+        workflow.add_node("FastPathNode", fast_path_node)
         workflow.add_node("MainAgentNode", main_agent_node)
-        # workflow.add_node("SearchNode", web_search_node)
-        # workflow.add_node("RetrievalNode", document_retrieval_node)
-        workflow.add_node("WebScraperNode", web_scraper_node)
+        workflow.add_node("ToolExecutorNode", tool_executor_node)
         
-        # 3) Edge: START -> MainAgentNode
-        workflow.add_edge(START, "MainAgentNode")
+        # 3) Edges: START -> IntentRouterNode -> (FastPathNode | MainAgentNode)
+        workflow.add_edge(START, "IntentRouterNode")
+        workflow.add_conditional_edges("IntentRouterNode", route_after_intent)
+        workflow.add_edge("FastPathNode", END)
         workflow.add_conditional_edges("MainAgentNode", route_after_agent)
-        # workflow.add_edge("SearchNode", "MainAgentNode")
-        # workflow.add_edge("RetrievalNode", "MainAgentNode")
-        workflow.add_edge("WebScraperNode", "MainAgentNode")
+        workflow.add_edge("ToolExecutorNode", "MainAgentNode")
         # workflow.add_edge("MainAgentNode", END)
         
         # 4) Saver con Cosmos
         self.cosmos_saver = ManualCosmosSaver(cosmos_db)
+        self._summaries_in_progress: dict[str, asyncio.Task] = {}
 
-        # 5) Compilar
+        # 5) Compilar (la imagen del grafo se genera aparte con render_graph)
         self.app = workflow.compile() 
 
-        # (Opcional) Generar imagen del grafo
-        image_data = self.app.get_graph().draw_mermaid_png(draw_method=MermaidDrawMethod.API)
-        image = Image(image_data)
-        with open("graph_image.png", "wb") as f:
-            f.write(image.data)
+    def render_graph(self, path: str = "graph_image.png") -> str:
+        """
+        Genera el diagrama del grafo bajo demanda (no al iniciar el servicio).
+        Con extensión .png usa la API de mermaid.ink (llamada HTTP); con cualquier
+        otra extensión escribe el texto Mermaid sin salir a la red.
+        """
+        graph = self.app.get_graph()
+        if path.endswith(".png"):
+            from langchain_core.runnables.graph import MermaidDrawMethod
+            with open(path, "wb") as f:
+                f.write(graph.draw_mermaid_png(draw_method=MermaidDrawMethod.API))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(graph.draw_mermaid())
+        return path
     
     async def invoke_flow(
     self,
@@ -361,50 +419,369 @@ class PDFChatAgent:
     user_id: str
     ) -> PDFChatState:
         print(f"\033[92mConversation_id: {conversation_id}\033[0m")
-        # 1. Recuperar historial previo
-        history_messages , last_pdf = await self.cosmos_saver.get_conversation_history(
-            conversation_id, user_id
+        # Presupuesto de tiempo del turno: viaja en el estado hasta el LLM, las tools y Cosmos
+        deadline = Deadline(settings.agent_services.turn_timeout_seconds)
+
+        # 1. Recuperar historial y, en paralelo, buscar una respuesta cacheada
+        turn, cached = await self._prepare_turn_and_lookup(user_input, pdf_text, conversation_id, user_id, deadline)
+        
+        # 2. Ejecutar el flujo (o responder desde la caché de respuestas)
+        if cached is not None and not turn["pdf_text"]:
+            new_state = self._cached_state(turn, cached, conversation_id)
+        else:
+            try:
+                new_state = await asyncio.wait_for(
+                    self.app.ainvoke(
+                        self._graph_input(turn, conversation_id, deadline),
+                        config=self._graph_config(conversation_id, user_id)
+                    ),
+                    timeout=deadline.remaining() + DEADLINE_GRACE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                deadline.exceeded_stages.append("graph")
+                new_state = self._fallback_state(turn, conversation_id)
+            self._store_cached_answer(user_input, turn, new_state)
+        
+        # 3. Extraer y guardar solo el último intercambio
+        doc_id = await self._persist_turn(new_state, turn, conversation_id, conversation_name, user_id, deadline)
+        deadline.log(conversation_id)
+        
+        return new_state, doc_id
+
+    async def stream_flow(
+    self,
+    user_input: str,
+    pdf_text: Optional[str],
+    conversation_id: str,
+    conversation_name: str,
+    user_id: str
+    ) -> AsyncIterator[dict]:
+        """
+        Variante en streaming de invoke_flow. Produce eventos a medida que el grafo avanza:
+            {"event": "start", "data": {...}}       -> inmediato, antes de leer el historial
+            {"event": "token", "data": "texto"}     -> tokens del LLM
+            {"event": "progress", "data": "texto"}  -> avisos mientras corren las tools
+            {"event": "end", "data": {"id", "text"}} -> respuesta final, tras guardar en Cosmos
+        """
+        start = time.perf_counter()
+        deadline = Deadline(settings.agent_services.turn_timeout_seconds)
+        yield {"event": "start", "data": {"conversation_id": conversation_id}}
+
+        turn, cached = await self._prepare_turn_and_lookup(user_input, pdf_text, conversation_id, user_id, deadline)
+        if cached is not None and not turn["pdf_text"]:
+            new_state = self._cached_state(turn, cached, conversation_id)
+            metrics.observe("chat.stream.first_token_ms", (time.perf_counter() - start) * 1000)
+            yield {"event": "token", "data": cached["text"]}
+            doc_id = await self._persist_turn(new_state, turn, conversation_id, conversation_name, user_id, deadline)
+            deadline.log(conversation_id)
+            yield {"event": "end", "data": {"id": doc_id, "text": cached["text"]}}
+            return
+
+        new_state = None
+        first_token = True
+        stream = self.app.astream(
+            self._graph_input(turn, conversation_id, deadline),
+            config=self._graph_config(conversation_id, user_id),
+            stream_mode=["messages", "updates", "values"]
+        )
+        while True:
+            try:
+                mode, chunk = await asyncio.wait_for(
+                    stream.__anext__(), timeout=deadline.remaining() + DEADLINE_GRACE_SECONDS
+                )
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                await stream.aclose()
+                deadline.exceeded_stages.append("graph")
+                new_state = self._fallback_state(turn, conversation_id)
+                yield {"event": "token", "data": FALLBACK_ANSWER}
+                break
+            if mode == "messages":
+                message_chunk, metadata = chunk
+                if (
+                    metadata.get("langgraph_node") in ("MainAgentNode", "FastPathNode")
+                    and isinstance(message_chunk, AIMessageChunk)
+                    and isinstance(message_chunk.content, str)
+                    and message_chunk.content
+                ):
+                    if first_token:
+                        first_token = False
+                        metrics.observe("chat.stream.first_token_ms", (time.perf_counter() - start) * 1000)
+                    yield {"event": "token", "data": message_chunk.content.replace("**", "*")}
+            elif mode == "updates":
+                # Cuando el agente decide usar tools avisamos al usuario antes de ejecutarlas
+                # Las respuestas de plantilla (fast path) y de respaldo (deadline agotado)
+                # no pasan por el LLM: se envían completas
+                for node in ("FastPathNode", "MainAgentNode"):
+                    for message in (chunk.get(node) or {}).get("messages") or []:
+                        metadata = message.response_metadata
+                        if metadata.get("fast_path") == "template" or metadata.get("fallback"):
+                            yield {"event": "token", "data": message.content}
+                agent_update = chunk.get("MainAgentNode") or {}
+                if agent_update.get("messages"):
+                    for call in getattr(agent_update["messages"][-1], "tool_calls", None) or []:
+                        yield {"event": "progress", "data": TOOL_PROGRESS_MESSAGES.get(call["name"], "Procesando…")}
+            elif mode == "values":
+                new_state = chunk
+
+        self._store_cached_answer(user_input, turn, new_state)
+        # El guardado en Cosmos ocurre una vez completado el stream
+        doc_id = await self._persist_turn(new_state, turn, conversation_id, conversation_name, user_id, deadline)
+        deadline.log(conversation_id)
+        yield {"event": "end", "data": {"id": doc_id, "text": new_state["messages"][-1].content}}
+
+    async def _prepare_turn_and_lookup(
+        self,
+        user_input: str,
+        pdf_text: Optional[str],
+        conversation_id: str,
+        user_id: str,
+        deadline: Deadline
+    ) -> tuple[dict, Optional[dict]]:
+        """
+        Prepara el turno y, en paralelo, busca una respuesta cacheada. La respuesta
+        cacheada solo sirve si el turno no trae historial ni resumen: la caché guarda
+        respuestas genéricas y una pregunta a mitad de conversación puede depender
+        del contexto ("¿y cuánto se demora?").
+        """
+        lookup = asyncio.create_task(self._lookup_cached_answer(user_input, pdf_text, deadline))
+        try:
+            turn = await self._prepare_turn(user_input, pdf_text, conversation_id, user_id, deadline)
+        except BaseException:
+            lookup.cancel()
+            raise
+        if self._has_conversation_context(turn):
+            if not lookup.done():
+                lookup.cancel()
+            elif lookup.result() is not None:
+                metrics.incr("response_cache.discarded_with_context")
+            return turn, None
+        return turn, await lookup
+
+    @staticmethod
+    def _has_conversation_context(turn: dict) -> bool:
+        # Historial previo, resumen o turnos compactados además del mensaje nuevo
+        return len(turn["messages"]) > 1 or bool(turn["summary"]) or bool(turn["overflow"])
+
+    async def _lookup_cached_answer(self, user_input: str, pdf_text: Optional[str], deadline: Deadline) -> Optional[dict]:
+        if not settings.agent_services.response_cache_enabled or not response_cache.is_eligible(user_input, pdf_text):
+            return None
+        try:
+            cached = await deadline.run(
+                "response_cache", response_cache.lookup(user_input),
+                reserve=settings.agent_services.turn_answer_reserve_seconds
+            )
+        except Exception as e:
+            logging.warning("No se pudo consultar la caché de respuestas: %s", str(e))
+            return None
+        if cached is not None:
+            print(f"\033[92mRespuesta desde la caché (similitud {cached['similarity']})\033[0m")
+        return cached
+
+    def _cached_state(self, turn: dict, cached: dict, conversation_id: str) -> dict:
+        ai_message = AIMessage(
+            content=cached["text"],
+            response_metadata={"cached": True, "similarity": cached["similarity"]}
+        )
+        return {
+            "messages": turn["messages"] + [ai_message],
+            "pdf_text": turn["pdf_text"],
+            "thread_id": conversation_id
+        }
+
+    def _fallback_state(self, turn: dict, conversation_id: str) -> dict:
+        return {
+            "messages": turn["messages"] + [fallback_message()],
+            "pdf_text": turn["pdf_text"],
+            "thread_id": conversation_id
+        }
+
+    def _store_cached_answer(self, user_input: str, turn: dict, new_state: PDFChatState):
+        """
+        Guarda la respuesta en la caché (en segundo plano) si el turno es cacheable:
+        pregunta general, sin documentos y sin tools involucradas.
+
+        La caché se comparte entre usuarios y la clave es solo el mensaje, así que
+        solo se guardan respuestas escritas sin historial ni resumen en el prompt:
+        con ellos la respuesta puede incluir datos de este cliente (su pedido, su talla).
+        """
+        if not settings.agent_services.response_cache_enabled or not response_cache.is_eligible(user_input, turn["pdf_text"]):
+            return
+        if self._has_conversation_context(turn):
+            metrics.incr("response_cache.skipped_personal")
+            return
+        new_messages = new_state["messages"][len(turn["messages"]):]
+        used_tools = any(
+            isinstance(msg, ToolMessage) or getattr(msg, "tool_calls", None) for msg in new_messages
         )
-        current_pdf = pdf_text if pdf_text is not None else last_pdf
-        # 2. Construir lista de mensajes completa
+        if (
+            used_tools
+            or not new_messages
+            or not isinstance(new_messages[-1], AIMessage)
+            or new_messages[-1].response_metadata.get("fallback")
+        ):
+            metrics.incr("response_cache.skipped")
+            return
+        task = asyncio.create_task(response_cache.store(user_input, new_messages[-1].content))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _graph_config(self, conversation_id: str, user_id: str) -> dict:
+        return {
+            "configurable": {
+                "thread_id": conversation_id,
+                "user_id": user_id
+                }}
+
+    def _graph_input(self, turn: dict, conversation_id: str, deadline: Deadline) -> dict:
+        return {
+            "messages": turn["messages"],
+            "pdf_text": turn["pdf_text"],
+            "thread_id": conversation_id,
+            "summary": turn["summary"],
+            "deadline": deadline
+        }
+
+    async def _prepare_turn(
+        self,
+        user_input: str,
+        pdf_text: Optional[str],
+        conversation_id: str,
+        user_id: str,
+        deadline: Deadline
+    ) -> dict:
+        """
+        Recupera el resumen y el historial posterior a él, empaqueta el historial en
+        el presupuesto de tokens y construye el mensaje humano del turno. Si Cosmos
+        no responde dentro del tiempo del turno se continúa sin historial.
+
+        Retorna un dict con: messages (ventana + mensaje nuevo), human_message,
+        pdf_text, summary, summary_doc y overflow (turnos que no cupieron y deben
+        incorporarse al resumen).
+        """
+        try:
+            summary_doc, (history_messages, last_pdf) = await deadline.run(
+                "cosmos.history", self._load_history(conversation_id, user_id),
+                reserve=settings.agent_services.turn_answer_reserve_seconds
+            )
+        except DeadlineExceeded:
+            logging.warning("Cosmos no respondió a tiempo para %s; el turno sigue sin historial", conversation_id)
+            summary_doc, history_messages, last_pdf = {}, [], None
+        current_pdf = pdf_text if pdf_text is not None else (last_pdf or summary_doc.get("pdf_text"))
         new_human_message = HumanMessage(
             content=user_input,
             id=utils.genereta_id(),
             response_metadata={"timestamp": datetime.now().isoformat()}
         )
-        all_messages = history_messages + [new_human_message]
-        
-        # 3. Ejecutar el flujo
-        new_state = await self.app.ainvoke(
-            {"messages": all_messages, "pdf_text": current_pdf,"thread_id": conversation_id},
-            config={
-                "configurable": {
-                    "thread_id": conversation_id,
-                    "user_id": user_id
-                    }}
+        window, overflow = context_manager.pack(
+            history_messages,
+            reserved_tokens=context_manager.count_message_tokens(new_human_message)
         )
-        
-        # 4. Extraer y guardar solo el último intercambio
-        new_messages = new_state["messages"][len(all_messages):]
+        return {
+            "messages": window + [new_human_message],
+            "human_message": new_human_message,
+            "pdf_text": current_pdf,
+            "summary": summary_doc.get("summary"),
+            "summary_doc": summary_doc,
+            "overflow": overflow
+        }
+
+    async def _load_history(self, conversation_id: str, user_id: str) -> tuple[dict, tuple[list[BaseMessage], Optional[str]]]:
+        summary_doc = await self.cosmos_saver.get_summary(conversation_id) or {}
+        history = await self.cosmos_saver.get_conversation_history(
+            conversation_id, user_id, since=summary_doc.get("summarized_until")
+        )
+        return summary_doc, history
+
+    async def _persist_turn(
+        self,
+        new_state: PDFChatState,
+        turn: dict,
+        conversation_id: str,
+        conversation_name: str,
+        user_id: str,
+        deadline: Deadline
+    ) -> str:
+        """
+        Guarda en Cosmos solo el último intercambio (mensaje humano + última respuesta de AI)
+        y, si hubo turnos fuera de la ventana, actualiza el resumen en segundo plano.
+        Si el guardado no termina dentro del tiempo del turno, sigue en segundo plano
+        (el id del documento se genera antes, así que igual se puede retornar).
+        """
+        new_messages = new_state["messages"][len(turn["messages"]):]
         new_ai_messages = [msg for msg in new_messages if isinstance(msg, AIMessage)]
         if not new_ai_messages:
             raise ValueError("No se generó respuesta de AI")
         ai_response = new_ai_messages[-1]
         
-        doc_id = await self.cosmos_saver.save_conversation(
-            user_message=new_human_message,
+        doc_id = utils.genereta_id()
+        save = asyncio.ensure_future(self.cosmos_saver.save_conversation(
+            user_message=turn["human_message"],
             ai_message=ai_response,
             conversation_id=conversation_id,
             conversation_name=conversation_name,
-            pdf_text=current_pdf,
-            user_id=user_id
-        )
-        
-        return new_state, doc_id
+            pdf_text=turn["pdf_text"],
+            user_id=user_id,
+            doc_id=doc_id
+        ))
+        try:
+            await deadline.run("cosmos.save", asyncio.shield(save))
+        except DeadlineExceeded:
+            logging.warning("El guardado en Cosmos de %s sigue en segundo plano", conversation_id)
+            save.add_done_callback(
+                lambda t: t.cancelled() or t.exception() is None
+                or logging.error("Error guardando el turno de %s: %s", conversation_id, str(t.exception()))
+            )
+        self._schedule_summary(conversation_id, turn)
+        return doc_id
+
+    def _schedule_summary(self, conversation_id: str, turn: dict):
+        """
+        Lanza la actualización del resumen sin bloquear la respuesta. Solo se permite
+        una actualización en curso por conversación para no resumir dos veces lo mismo.
+        """
+        if not turn["overflow"] or conversation_id in self._summaries_in_progress:
+            return
+        task = asyncio.create_task(self._refresh_summary(conversation_id, turn))
+        self._summaries_in_progress[conversation_id] = task
+        task.add_done_callback(lambda _: self._summaries_in_progress.pop(conversation_id, None))
+
+    async def _refresh_summary(self, conversation_id: str, turn: dict):
+        try:
+            llm = AzureServices.LLMRegistry.get_router()
+            summary = await context_manager.summarize(llm, turn["summary"], turn["overflow"])
+            await self.cosmos_saver.save_summary(
+                conversation_id=conversation_id,
+                summary=summary,
+                summarized_until=turn["overflow"][-1].response_metadata.get("created_at"),
+                pdf_text=turn["pdf_text"]
+            )
+        except Exception as e:
+            logging.exception("Error actualizando el resumen de %s: %s", conversation_id, str(e))
 
 class ManualCosmosSaver:
+    """
+    Persiste los intercambios en Cosmos y mantiene una caché write-through en el
+    proceso con los intercambios recientes (y el resumen) de cada conversación,
+    de modo que Cosmos solo se consulta cuando la conversación no está en caché.
+    La caché es por proceso: el TTL acota cuánto puede desfasarse si otra
+    instancia escribe en la misma conversación.
+    """
     def __init__(self, cosmos_client):
         self.cosmos_client = cosmos_client
+        agent_settings = settings.agent_services
+        # (conversation_id, user_id) -> documentos en orden cronológico
+        self._history_cache = LRUTTLCache(
+            name="history_cache",
+            max_entries=agent_settings.history_cache_max_conversations,
+            ttl_seconds=agent_settings.history_cache_ttl_seconds
+        )
+        # conversation_id -> documento de resumen ({} si aún no existe)
+        self._summary_cache = LRUTTLCache(
+            name="summary_cache",
+            max_entries=agent_settings.history_cache_max_conversations,
+            ttl_seconds=agent_settings.history_cache_ttl_seconds
+        )
 
     def _message_to_dict(self, message: BaseMessage) -> dict:
         return {
@@ -415,9 +792,9 @@ class ManualCosmosSaver:
             "created_at": datetime.now().isoformat()
         }
         
-    async def save_conversation(self, user_message: BaseMessage, ai_message: BaseMessage, pdf_text: Optional[str], conversation_id: str, conversation_name: str, user_id: str) -> str:
+    async def save_conversation(self, user_message: BaseMessage, ai_message: BaseMessage, pdf_text: Optional[str], conversation_id: str, conversation_name: str, user_id: str, doc_id: Optional[str] = None) -> str:
         document = {
-            "id": utils.genereta_id(),
+            "id": doc_id or utils.genereta_id(),
             "user_id": user_id,
             "conversation_id": conversation_id,
             "conversation_name": conversation_name,
@@ -429,28 +806,70 @@ class ManualCosmosSaver:
             "rate": False
         }
         created_doc = await self.cosmos_client.create_document(document)
+
+        # Write-through: si la conversación está en caché se añade el nuevo intercambio.
+        # Si no está, no se crea la entrada (no conocemos los intercambios anteriores).
+        cache_key = (conversation_id, user_id)
+        cached_docs = self._history_cache.peek(cache_key)
+        if cached_docs is not None and created_doc:
+            cached_docs = (cached_docs + [created_doc])[-settings.agent_services.history_max_turns:]
+            self._history_cache.set(cache_key, cached_docs)
         return created_doc["id"]
         
-    async def get_conversation_history(self, conversation_id: str, user_id: str, max_messages: int = 20) -> tuple[list[BaseMessage], Optional[str]]:
-        query = f"SELECT * FROM c WHERE c.conversation_id = '{conversation_id}' AND c.user_id = '{user_id}' ORDER BY c.created_at DESC OFFSET 0 LIMIT {max_messages}"
-        docs = await self.cosmos_client.query_documents(query)
+    async def get_summary(self, conversation_id: str) -> Optional[dict]:
+        summary_doc = self._summary_cache.get(conversation_id)
+        if summary_doc is None:
+            summary_doc = await self.cosmos_client.get_conversation_summary(conversation_id) or {}
+            self._summary_cache.set(conversation_id, summary_doc)
+        return summary_doc or None
+
+    async def save_summary(self, conversation_id: str, summary: str, summarized_until: Optional[str], pdf_text: Optional[str]) -> None:
+        document = {
+            "id": conversation_id,
+            "conversation_id": conversation_id,
+            "summary": summary,
+            "summarized_until": summarized_until,
+            "pdf_text": pdf_text,
+            "updated_at": datetime.now().isoformat()
+        }
+        await self.cosmos_client.upsert_conversation_summary(document)
+        self._summary_cache.set(conversation_id, document)
+
+    async def get_conversation_history(self, conversation_id: str, user_id: str, max_messages: Optional[int] = None, since: Optional[str] = None) -> tuple[list[BaseMessage], Optional[str]]:
+        """
+        Recupera los últimos intercambios de la conversación. Si se indica `since`
+        (created_at del último intercambio ya resumido) solo se leen los posteriores.
+        """
+        max_messages = max_messages or settings.agent_services.history_max_turns
+        cache_key = (conversation_id, user_id)
+        cached_docs = self._history_cache.get(cache_key)
+
+        if cached_docs is None:
+            since_filter = f" AND c.created_at > '{since}'" if since else ""
+            query = f"SELECT * FROM c WHERE c.conversation_id = '{conversation_id}' AND c.user_id = '{user_id}'{since_filter} ORDER BY c.created_at DESC OFFSET 0 LIMIT {max_messages}"
+            docs = await self.cosmos_client.query_documents(query)
+            cached_docs = list(reversed(docs))  # Orden cronológico
+            self._history_cache.set(cache_key, cached_docs)
+
+        docs = [doc for doc in cached_docs if not since or doc["created_at"] > since][-max_messages:]
         
         history = []
-        for doc in reversed(docs):  # Orden cronológico
+        for doc in docs:  # Orden cronológico
+            # created_at del documento permite saber hasta dónde llega el resumen
             history.append(HumanMessage(
                 content=doc["user_message"]["content"],
                 additional_kwargs=doc["user_message"]["additional_kwargs"],
-                response_metadata=doc["user_message"].get("response_metadata", {}),
+                response_metadata={**doc["user_message"].get("response_metadata", {}), "created_at": doc["created_at"]},
                 id=doc["user_message"]["id"]
             ))
             history.append(AIMessage(
                 content=doc["ai_message"]["content"],
                 additional_kwargs=doc["ai_message"]["additional_kwargs"],
-                response_metadata=doc["ai_message"].get("response_metadata", {}),
+                response_metadata={**doc["ai_message"].get("response_metadata", {}), "created_at": doc["created_at"]},
                 id=doc["ai_message"]["id"]
             ))
             
         latest_pdf = next(
-            (doc["pdf_text"] for doc in docs if doc.get("pdf_text")), None)
+            (doc["pdf_text"] for doc in reversed(docs) if doc.get("pdf_text")), None)
         
         return history, latest_pdf
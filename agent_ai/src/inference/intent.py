@@ -0,0 +1,194 @@
+from typing import Optional
+import re
+import zlib
+
+import numpy as np
+
+from inference.catalog.products import fold_text, tokenize
+
+
+# Palabras (tokenizadas: minúsculas y sin tildes) que indican género y categoría
+GENDER_KEYWORDS = {
+    "mujer": {"mujer", "mujeres", "dama", "damas", "femenino", "ella", "esposa", "mama"},
+    "hombre": {"hombre", "hombres", "caballero", "caballeros", "masculino", "esposo", "papa"},
+    "niño": {"nino", "ninos", "hijo"},
+    "niña": {"nina", "ninas", "hija"},
+}
+# Nombres de las categorías del catálogo y sus sinónimos
+CATEGORY_NAMES = {
+    "ofertas": {"oferta", "ofertas", "descuento", "descuentos", "promocion", "promociones", "rebajas"},
+    "tendencia": {"tendencia", "tendencias", "nuevo", "nuevos", "nueva", "nuevas", "novedades"},
+    "zapatos": {"zapato", "zapatos", "calzado"},
+    "accesorios": {"accesorio", "accesorios"},
+}
+# Tipos de producto: indican la categoría pero también el contenido de la búsqueda
+PRODUCT_TERMS = {
+    "zapatos": {
+        "tenis", "sandalia", "sandalias", "bota", "botas", "botines", "mocasin", "mocasines",
+        "tacon", "tacones", "zapatillas", "baletas", "pantuflas", "chanclas"
+    },
+    "accesorios": {
+        "bolso", "bolsos", "cartera", "carteras", "cinturon", "cinturones", "billetera",
+        "billeteras", "medias", "morral", "morrales"
+    },
+}
+CATEGORY_KEYWORDS = {
+    category: CATEGORY_NAMES[category] | PRODUCT_TERMS.get(category, set())
+    for category in CATEGORY_NAMES
+}
+
+# Negaciones: el turno descarta opciones y no se puede resolver con plantillas.
+# Se buscan sobre el texto completo porque tokenize() descarta palabras cortas
+NEGATION_WORDS = {"no", "ni", "nada", "tampoco", "nunca"}
+
+# Ejemplos etiquetados para la similitud por n-gramas de caracteres
+LABELED_EXAMPLES = {
+    "greeting": [
+        "hola", "holi", "hola buenas", "buenas", "buenos dias", "buenas tardes", "buenas noches",
+        "buen dia", "hola que tal", "hola como estas", "saludos", "hey hola", "hola batabot",
+    ],
+    "slot_filling": [
+        "para mujer", "para hombre", "para nino", "para nina", "mujer", "hombre", "zapatos",
+        "accesorios", "ofertas", "tendencia", "zapatos para mujer", "accesorios para hombre",
+        "ofertas para nina", "lo nuevo para hombre", "es para mi hijo", "es para mi hija",
+        "para dama", "para caballero", "quiero ver zapatos", "me interesan las ofertas",
+        "busco accesorios", "para mi esposa", "lo que este en tendencia",
+    ],
+    "thanks": [
+        "gracias", "muchas gracias", "mil gracias", "listo gracias", "ok gracias", "chao",
+        "hasta luego", "adios", "perfecto gracias", "muy amable",
+    ],
+    "confirm": [
+        "si", "si por favor", "si dale", "dale", "claro", "ok", "de una", "si busca", "hazlo",
+        "confirmo", "si claro", "bueno",
+    ],
+    "product_search": [
+        "busco tenis blancos talla 38", "tienen sandalias comodas", "quiero unas botas negras",
+        "tenis para correr", "zapatos de cuero cafe", "bolso negro para mujer", "mocasines talla 42",
+        "sandalias para la playa", "cual es el precio de los tenis", "zapatos formales para hombre",
+    ],
+    "question": [
+        "cual es el horario de la tienda", "hacen envios a medellin", "cuanto cuesta el envio",
+        "como hago una devolucion", "que dice el documento", "donde queda la tienda",
+        "puedo pagar contra entrega", "cuanto se demora el pedido", "resume el archivo",
+    ],
+}
+# Intenciones que se pueden responder sin el modelo grande
+FAST_INTENTS = {"greeting", "slot_filling", "thanks"}
+# Palabras de relleno que no cambian la intención de un turno rápido
+FILLER_WORDS = {
+    "para", "por", "favor", "quiero", "busco", "buscando", "ver", "mis", "los", "las", "una", "unos",
+    "unas", "que", "algo", "estoy", "interesa", "interesan", "gustaria", "seria", "esta", "este",
+    "hola", "buenas", "buenos", "buen", "dia", "dias", "tardes", "noches", "tal", "como", "estas",
+    "gracias", "muchas", "mil", "listo", "perfecto", "chao", "hasta", "luego", "adios", "muy",
+    "amable", "saludos", "holi", "hey", "batabot", "seccion", "categoria", "mira", "pues", "tienen",
+}
+
+
+def extract_slots(text: str) -> dict:
+    """
+    Retorna {"gender", "category"} mencionados en `text` (None si no aparecen).
+    Si se menciona más de un valor para un slot, gana el último.
+    """
+    mentions = slot_mentions(text)
+    return {key: values[-1] if values else None for key, values in mentions.items()}
+
+
+def slot_mentions(text: str) -> dict:
+    """
+    Valores de cada slot en el orden en que aparecen en `text` (con repetidos).
+    """
+    tokens = tokenize(text)
+    return {"gender": _mentions(tokens, GENDER_KEYWORDS), "category": _mentions(tokens, CATEGORY_KEYWORDS)}
+
+
+def has_negation(text: str) -> bool:
+    return bool(set(re.findall(r"[a-z]+", fold_text(text))) & NEGATION_WORDS)
+
+
+def conversation_slots(texts: list[str]) -> dict:
+    """
+    Slots vigentes en una conversación (textos del cliente en orden cronológico):
+    para cada slot se toma la mención más reciente.
+    """
+    slots = {"gender": None, "category": None}
+    for text in reversed(texts):
+        found = extract_slots(text)
+        slots = {key: slots[key] or found[key] for key in slots}
+        if all(slots.values()):
+            break
+    return slots
+
+
+def _mentions(tokens: list[str], keywords: dict[str, set[str]]) -> list[str]:
+    return [value for token in tokens for value, words in keywords.items() if token in words]
+
+
+class IntentClassifier:
+    """
+    Clasificador local de intención para decidir si un turno necesita el modelo grande.
+
+    Combina reglas (slots de género/categoría, términos de producto y palabras fuera
+    de vocabulario) con similitud coseno sobre n-gramas de caracteres (hashing a un
+    vector NumPy) contra un pequeño conjunto etiquetado. Corre en microsegundos y no
+    llama a ningún servicio.
+    """
+
+    def __init__(self, examples: Optional[dict[str, list[str]]] = None, dims: int = 2048, ngram: int = 3, min_score: float = 0.6):
+        self.dims = dims
+        self.ngram = ngram
+        self.min_score = min_score
+        examples = examples or LABELED_EXAMPLES
+        self._labels = [label for label, texts in examples.items() for _ in texts]
+        self._matrix = np.vstack([self._vectorize(text) for texts in examples.values() for text in texts])
+        self._vocabulary = (
+            FILLER_WORDS
+            | set().union(*GENDER_KEYWORDS.values())
+            | set().union(*CATEGORY_NAMES.values())
+        )
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        padded = f" {' '.join(fold_text(text).split())} "
+        for i in range(max(1, len(padded) - self.ngram + 1)):
+            vector[zlib.crc32(padded[i:i + self.ngram].encode("utf-8")) % self.dims] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def classify(self, text: str) -> dict:
+        """
+        Retorna {"intent", "score", "gender", "category", "fast_path"}.
+
+        fast_path es True solo si la intención es de las rápidas con suficiente
+        similitud y el mensaje no trae nada más (negaciones, varios valores para un
+        mismo slot, términos de producto, tallas, preguntas u otras palabras) que
+        requiera al modelo grande.
+        """
+        scores = self._matrix @ self._vectorize(text)
+        best = int(np.argmax(scores))
+        intent, score = self._labels[best], float(scores[best])
+        mentions = slot_mentions(text)
+        slots = {key: values[-1] if values else None for key, values in mentions.items()}
+
+        tokens = set(tokenize(text))
+        has_details = (
+            # "no es para mujer, es para hombre", "ni zapatos ni bolsos"
+            has_negation(text)
+            or any(len(set(values)) > 1 for values in mentions.values())
+            or bool(tokens & set().union(*PRODUCT_TERMS.values()))
+            or any(char.isdigit() for char in text)
+            or ("?" in text and intent != "greeting")
+            or bool(tokens - self._vocabulary)
+        )
+        if has_details:
+            fast_path = False
+        elif slots["gender"] or slots["category"]:
+            # Solo slots y relleno: es slot filling aunque el ejemplo más cercano sea
+            # otro ("hola, para mujer", "para mujeres por favor")
+            intent, fast_path = "slot_filling", True
+        else:
+            fast_path = intent in FAST_INTENTS and score >= self.min_score
+        return {"intent": intent, "score": round(score, 3), "fast_path": fast_path, **slots}
+
+
+intent_classifier = IntentClassifier()
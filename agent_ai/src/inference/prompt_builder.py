@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
+
+from core.metrics import metrics
+
+
+class PromptBuilder:
+    """
+    Arma los mensajes del agente con un prefijo estable para aprovechar el prompt
+    caching de Azure OpenAI (se cachea el prefijo común más largo entre llamadas).
+
+    Orden, de lo más estable a lo más volátil:
+        1. System prompt estático (idéntico byte a byte en todas las llamadas; las
+           tools enlazadas van antes, también estáticas).
+        2. Contexto de la conversación: documentos adjuntos y resumen (cambian poco).
+        3. Historial (solo crece al final).
+        4. Contexto volátil: fecha y hora (a minuto, para que las llamadas de un
+           mismo turno compartan el prefijo).
+        5. Turno actual: mensaje del cliente y sus tool calls/resultados.
+    """
+
+    def __init__(self, static_prompt: str):
+        self.static_message = SystemMessage(content=static_prompt)
+
+    def build(
+        self,
+        messages: list[BaseMessage],
+        pdf_text: Optional[str] = None,
+        summary: Optional[str] = None,
+        now: Optional[datetime] = None
+    ) -> list[BaseMessage]:
+        # El turno actual empieza en el último mensaje del cliente
+        split = next(
+            (i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)),
+            len(messages)
+        )
+        history, current = messages[:split], messages[split:]
+
+        prompt = [self.static_message]
+        conversation_context = []
+        if pdf_text:
+            conversation_context.append(f"Documentos compartidos por el cliente:\n{pdf_text}")
+        if summary:
+            conversation_context.append(f"Resumen de la conversación anterior con el cliente:\n{summary}")
+        if conversation_context:
+            prompt.append(SystemMessage(content="\n\n".join(conversation_context)))
+
+        volatile = SystemMessage(content=f"Fecha y hora actual: {(now or datetime.now()).strftime('%Y-%m-%d %H:%M')}")
+        return prompt + history + [volatile] + current
+
+
+def record_prompt_usage(response: Any) -> Optional[int]:
+    """
+    Registra los tokens de entrada y los servidos desde la caché del proveedor
+    (usage_metadata.input_token_details.cache_read). Retorna los tokens cacheados.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    input_tokens = usage.get("input_tokens")
+    if not input_tokens:
+        return None
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    metrics.observe("llm.input_tokens", input_tokens)
+    metrics.observe("llm.cached_tokens", cached_tokens)
+    metrics.incr("llm.input_tokens_total", input_tokens)
+    metrics.incr("llm.cached_tokens_total", cached_tokens)
+    total = metrics.counter("llm.input_tokens_total")
+    metrics.gauge("llm.prompt_cache_ratio", round(metrics.counter("llm.cached_tokens_total") / total, 4) if total else 0.0)
+    return cached_tokens
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import re
+import time
+
+import numpy as np
+
+from core.config import settings
+from core.metrics import metrics
+from core.schema_services import AzureServices
+from inference.catalog.products import fold_text
+from inference.intent import intent_classifier
+
+
+# Intenciones cuya respuesta no depende de la conversación (políticas de la tienda,
+# envíos, cambios...). Búsquedas de productos y saludos no se cachean.
+CACHEABLE_INTENTS = {"question"}
+
+
+def normalize_message(text: str) -> str:
+    """
+    Minúsculas, sin tildes, sin signos y con espacios simples.
+    """
+    return " ".join(re.findall(r"[a-z0-9]+", fold_text(text or "")))
+
+
+def prompt_fingerprint(*parts: str) -> str:
+    """
+    Huella del system prompt, modelo y versión: al cambiar cualquiera de ellos las
+    respuestas cacheadas dejan de ser válidas.
+    """
+    return hashlib.sha256("\n".join(part or "" for part in parts).encode("utf-8")).hexdigest()[:16]
+
+
+class SemanticResponseCache:
+    """
+    Caché de respuestas para preguntas repetidas de los clientes.
+
+    Clave: embedding del mensaje normalizado + huella del prompt. Una consulta es
+    un hit si coincide exactamente con un mensaje guardado (sin llamar al servicio
+    de embeddings) o si su similitud coseno con alguno supera `similarity_threshold`.
+    Entradas acotadas por `max_entries` (LRU) y `ttl_seconds`.
+
+    Solo se usa para mensajes de al menos `min_chars` caracteres, con intención de
+    pregunta general, sin documentos adjuntos, y solo se guardan respuestas que no
+    usaron tools (su contenido depende de datos en vivo) ni tenían historial de la
+    conversación en el prompt (la caché se comparte entre usuarios).
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        similarity_threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        min_chars: Optional[int] = None
+    ):
+        agent_settings = settings.agent_services
+        self.fingerprint = fingerprint
+        self.similarity_threshold = similarity_threshold or agent_settings.response_cache_similarity
+        self.ttl_seconds = ttl_seconds or agent_settings.response_cache_ttl_seconds
+        self.max_entries = max_entries or agent_settings.response_cache_max_entries
+        self.min_chars = min_chars or agent_settings.response_cache_min_chars
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # Matriz de embeddings (una fila por entrada), reconstruida solo si cambió
+        self._keys: list[str] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    @property
+    def embeddings(self):
+        return AzureServices.LLMRegistry.get_openai_service().model_embeddings
+
+    def is_eligible(self, message: str, pdf_text: Optional[str] = None) -> bool:
+        normalized = normalize_message(message)
+        if len(normalized) < self.min_chars or pdf_text:
+            return False
+        return intent_classifier.classify(message)["intent"] in CACHEABLE_INTENTS
+
+    async def lookup(self, message: str) -> Optional[dict]:
+        """
+        Retorna {"text", "similarity"} de la respuesta cacheada, o None.
+        """
+        start = time.perf_counter()
+        key = normalize_message(message)
+        self._expire()
+
+        entry = self._entries.get(key)
+        similarity = 1.0
+        if entry is None:
+            best_key, similarity = await self._most_similar(key)
+            entry = self._entries.get(best_key) if best_key else None
+
+        if entry is None:
+            self._record("misses")
+            return None
+        self._entries.move_to_end(entry["key"])
+        self._record("hits")
+        metrics.observe("response_cache.similarity", similarity)
+        metrics.observe("response_cache.lookup_ms", (time.perf_counter() - start) * 1000)
+        return {"text": entry["answer"], "similarity": round(similarity, 4)}
+
+    async def store(self, message: str, answer: str):
+        key = normalize_message(message)
+        if not answer or key in self._entries:
+            return
+        vector = await self._embed(key)
+        self._entries[key] = {
+            "key": key,
+            "vector": vector,
+            "answer": answer,
+            "fingerprint": self.fingerprint,
+            "created_at": time.time()
+        }
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            metrics.incr("response_cache.evictions")
+        self._matrix = None
+        metrics.incr("response_cache.stores")
+        metrics.gauge("response_cache.entries", len(self._entries))
+
+    async def _most_similar(self, key: str) -> tuple[Optional[str], float]:
+        if not self._entries:
+            return None, 0.0
+        vector = await self._embed(key)
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.vstack([self._entries[k]["vector"] for k in self._keys])
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None, float(scores[best])
+        return self._keys[best], float(scores[best])
+
+    async def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self):
+        now = time.time()
+        expired = [
+            key for key, entry in self._entries.items()
+            if now - entry["created_at"] > self.ttl_seconds or entry["fingerprint"] != self.fingerprint
+        ]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def _record(self, outcome: str):
+        metrics.incr(f"response_cache.{outcome}")
+        hits = metrics.counter("response_cache.hits")
+        total = hits + metrics.counter("response_cache.misses")
+        metrics.gauge("response_cache.hit_rate", round(hits / total, 4) if total else 0.0)
@@ -0,0 +1,97 @@
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+import time
+
+from core.metrics import metrics
+
+
+class ConversationScheduler:
+    """
+    Serializa los turnos de cada conversation_id y combina (coalesce) los mensajes
+    que llegan mientras la conversación tiene un turno en curso.
+
+    - serialize(conversation_id): garantiza que solo un turno por conversación
+      se ejecute a la vez (sin carreras sobre el historial).
+    - submit(conversation_id, message, run): si la conversación está libre el
+      turno empieza de inmediato. Si hay un turno en curso, los mensajes que
+      llegan mientras tanto esperan juntos en un lote, se unen con saltos de línea
+      y se ejecuta run(texto) una sola vez al liberarse la conversación; todos los
+      llamadores del lote reciben el mismo resultado.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}
+        self._pending: dict[str, dict] = {}
+        # Referencias a las tareas de los lotes: el event loop solo guarda referencias débiles
+        self._tasks: set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def serialize(self, conversation_id: str):
+        lock = self._locks.setdefault(conversation_id, asyncio.Lock())
+        self._lock_users[conversation_id] = self._lock_users.get(conversation_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            # Liberar el lock cuando nadie más lo espera, para no acumular conversaciones
+            self._lock_users[conversation_id] -= 1
+            if self._lock_users[conversation_id] == 0:
+                del self._lock_users[conversation_id]
+                del self._locks[conversation_id]
+
+    async def submit(
+        self,
+        conversation_id: str,
+        message: str,
+        run: Callable[[str], Awaitable[Any]]
+    ) -> tuple[Any, bool]:
+        """
+        Encola `message` en el lote abierto de la conversación (o abre uno nuevo).
+
+        :return: (resultado de run, es_principal). Solo el llamador que abrió el
+                 lote recibe es_principal=True; los demás fueron combinados en él.
+        """
+        batch = self._pending.get(conversation_id)
+        is_primary = batch is None
+        if is_primary:
+            batch = {
+                "messages": [],
+                "opened_at": time.monotonic(),
+                "future": asyncio.get_running_loop().create_future()
+            }
+            self._pending[conversation_id] = batch
+            task = asyncio.create_task(self._run_batch(conversation_id, batch, run))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            metrics.incr("scheduler.coalesced_messages")
+
+        batch["messages"].append(message)
+        result = await asyncio.shield(batch["future"])
+        return result, is_primary
+
+    async def _run_batch(self, conversation_id: str, batch: dict, run: Callable[[str], Awaitable[Any]]):
+        try:
+            # Sin espera fija: si la conversación está libre el lock se toma de
+            # inmediato; si no, el lote sigue abierto hasta que termine el turno en curso
+            async with self.serialize(conversation_id):
+                # Cerrar el lote: los mensajes que lleguen desde aquí abren uno nuevo
+                if self._pending.get(conversation_id) is batch:
+                    del self._pending[conversation_id]
+                metrics.incr("scheduler.runs")
+                metrics.observe("scheduler.queued_ms", (time.monotonic() - batch["opened_at"]) * 1000)
+                if len(batch["messages"]) > 1:
+                    logging.info("Conversación %s: %s mensajes combinados en un turno", conversation_id, len(batch["messages"]))
+                result = await run("\n".join(batch["messages"]))
+            batch["future"].set_result(result)
+        except Exception as e:
+            batch["future"].set_exception(e)
+        finally:
+            if self._pending.get(conversation_id) is batch:
+                del self._pending[conversation_id]
+            # Lote cancelado (apagado, deadline): los llamadores no pueden quedar esperando
+            if not batch["future"].done():
+                batch["future"].cancel()
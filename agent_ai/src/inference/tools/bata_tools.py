@@ -1,32 +1,35 @@
 import json
+import asyncio
 from typing import Any, Optional, cast
 import pdb
 import aiohttp
 from typing import Optional, Literal
 
-from langchain_community.tools.tavily_search import TavilySearchResults
-from scrapegraphai.graphs import SmartScraperGraph, SmartScraperMultiGraph,SearchGraph
 from langchain_core.tools import tool
-from core.schema_services import AzureServices
+from core.container import services
 from dotenv import load_dotenv
 # Importa tu settings con la clave ya cargada
 from core.config import settings
 import os
+from inference.catalog.sources import resolve_source
+from inference.catalog.cache import catalog_cache
+from inference.catalog.products import rank_products
+from inference.catalog.index import product_index
+from inference.catalog.vector_index import product_vector_index
+from core.metrics import metrics
+from core.singleflight import singleflight
 
-import nest_asyncio
-nest_asyncio.apply()
 
-# Resto de tu código
-
-
-openai_key = os.getenv("OPENAI_APIKEY")
-ai_search_service = AzureServices().AzureAiSearch()
+ai_search_service = services.search
 
+@singleflight()
 async def search_tool(query: str) -> Optional[list[dict[str, Any]]]:
     """
     Query a search engine (TavilySearchResults) usando la key de config.
     """
     print(f"\033[92msearch_tool activada | query: {query}\033[0m")
+    # Import diferido: langchain_community es pesado y solo se necesita al buscar en la web
+    from langchain_community.tools.tavily_search import TavilySearchResults
     wrapped = TavilySearchResults(
         max_results=5,
         tavily_api_key=settings.ai_services.tavily_api_key  
@@ -35,6 +38,7 @@ async def search_tool(query: str) -> Optional[list[dict[str, Any]]]:
     return cast(list[dict[str, Any]], result)
 
 
+@singleflight()
 async def retrieval_tool(query: str, conversation_id:str ) -> Optional[list[dict[str, Any]]]:
     """
     Hace
@@ -42,7 +46,7 @@ async def retrieval_tool(query: str, conversation_id:str ) -> Optional[list[dict
     print(f"\033[92mretrieval_tool activada | query: {query}\033[0m")
 
     documents = await ai_search_service.search_documents_in_index(
-        index_name="geo-gpk",
+        index_name=settings.ai_services.azure_search_index_name,
         search_text=query,
         conversation_id=conversation_id
     )
@@ -58,7 +62,23 @@ async def retrieval_tool(query: str, conversation_id:str ) -> Optional[list[dict
 
     return cast(list[dict[str, Any]], docs)
 
-def scrape_tool(
+async def _semantic_search(source: str, query: str, limit: int) -> Optional[list[dict[str, Any]]]:
+    """
+    Ordena los productos de `source` por similitud con `query` (None si no aplica).
+    """
+    if not settings.agent_services.catalog_vector_search_enabled:
+        return None
+    try:
+        result = await product_vector_index.search(source, query, limit=limit)
+    except Exception as e:
+        print(f"\033[91mscrape_tool: búsqueda semántica no disponible: {str(e)}\033[0m")
+        return None
+    if result:
+        metrics.incr("scrape_tool.vector_hits")
+    return result
+
+@singleflight()
+async def scrape_tool(
                 query: str,
                 gender:Literal["mujer","hombre","niño","niña"],
                 category:Literal["ofertas","tendencia","zapatos","accesorios"]
@@ -68,62 +88,30 @@ def scrape_tool(
     """
     print(f"\033[92mscrape_tool activada | query: {query} | gender: {gender} | category: {category}\033[0m")
 
+    source = resolve_source(gender, category)
+    if source is None:
+        return []
 
-    graph_config = {
-                    "llm": {
-                        "api_key":openai_key,
-                        "model": "openai/gpt-4o-mini",
-                        "max_tokens":10000
-                    },
-                    "verbose": True,
-                    "headless": False
-                    }
-
-    url_data =    {
-                        "main_url": "https://www.bata.com/co/",
-                        "url": {
-                            "mujer":{
-                                # "mujer":"https://www.bata.com/co/mujer/",
-                                "ofertas":"https://www.bata.com/co/ofertas/mujer/",
-                                "tendencia":"https://www.bata.com/co/nuevo/mujer/",
-                                "zapatos":"https://www.bata.com/co/mujer/zapatos/",
-                                "accesorios":"https://www.bata.com/co/mujer/accesorios/"
-                            },
-                            "hombre":{
-                                "ofertas":"https://www.bata.com/co/ofertas/hombre/",
-                                "tendencia":"https://www.bata.com/co/nuevo/hombre/",
-                                "zapatos":"https://www.bata.com/co/hombre/zapatos/",
-                                "accesorios":"https://www.bata.com/co/hombre/accesorios/"
-                            },
-                            "niño":{
-                                "ofertas":"https://www.bata.com/co/ofertas/ni%C3%B1os/",
-                                "tendencia":"https://www.bata.com/co/nuevo/infantil/",
-                                "zapatos":"https://www.bata.com/co/infantil/ni%C3%B1o/zapatos/",
-                                "accesorios":"https://www.bata.com/co/infantil/ni%C3%B1o/"     
-                            },
-                            "niña":{
-                                "ofertas":"https://www.bata.com/co/ofertas/ni%C3%B1os/",
-                                "tendencia":"https://www.bata.com/co/nuevo/infantil/",
-                                "zapatos":"https://www.bata.com/co/infantil/ni%C3%B1a/zapatos/",
-                                "accesorios":"https://www.bata.com/co/infantil/ni%C3%B1a/accesorios/"     
-                            }
-                        }
-                    }
-    
-
-    source = url_data.get('url').get(gender).get(category)
-
-    smart_scraper_graph = SmartScraperGraph(
-        prompt=f"Extrae información de los productos como nombre, talla, color, precio, link y más caracteristicas en relación a la query: {query} ",
-        source=source,
-        config=graph_config
-    )
-
-    # Run the pipeline
-    result = smart_scraper_graph.run()
-
-    
-    print(json.dumps(result, indent=4))
+    limit = settings.agent_services.scrape_tool_max_products
+
+    # 1) Índice local del catálogo (lo mantiene el indexador en segundo plano):
+    #    primero por similitud semántica y, si no está disponible, por bm25
+    index_age = await asyncio.to_thread(product_index.source_age, source)
+    if index_age is not None and index_age < settings.agent_services.catalog_index_max_age_seconds:
+        result = await _semantic_search(source, query, limit)
+        if not result:
+            result = await asyncio.to_thread(product_index.search, source, query, limit=limit)
+        if result:
+            metrics.incr("scrape_tool.index_hits")
+            print(f"\033[92mscrape_tool: {len(result)} productos desde el índice local\033[0m")
+            return cast(list[dict[str, Any]], result)
+
+    # 2) Respaldo: catálogo cacheado por URL (TTL + stale-while-revalidate); solo se
+    #    hace scraping en vivo cuando la página no está en caché o está muy vieja.
+    metrics.incr("scrape_tool.live_fallbacks")
+    products = await catalog_cache.get(source)
+    result = await _semantic_search(source, query, limit) or rank_products(products, query, limit=limit)
+
+    print(f"\033[92mscrape_tool: {len(result)} de {len(products)} productos\033[0m")
         
     return cast(list[dict[str, Any]], result)
-
@@ -0,0 +1,108 @@
+from typing import Any, Optional
+
+import tiktoken
+
+from core.config import settings
+from core.metrics import metrics
+
+
+# Columnas de la tabla de productos que se entrega al LLM
+PRODUCT_COLUMNS = ["nombre", "precio", "colores", "tallas", "link", "descripción"]
+# Largo máximo de los textos libres (descripciones, contenido de páginas y documentos)
+MAX_DESCRIPTION_CHARS = 80
+MAX_SNIPPET_CHARS = 600
+
+
+def _clip(text: Any, max_chars: int) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        value = "/".join(str(v) for v in value)
+    # '|' separa columnas: se reemplaza dentro de los valores
+    return str(value).replace("|", "/").strip() if value else "-"
+
+
+class ToolResultCompactor:
+    """
+    Convierte el resultado de una tool en texto compacto antes de que entre al prompt.
+
+    - scrape_tool: productos en una tabla separada por '|' (una fila por
+      producto), en el orden en que los entrega la tool (ya vienen ordenados por
+      relevancia: semántica, bm25 o por palabras).
+    - search_tool / retrieval_tool: una línea por resultado con el texto recortado.
+    - Otras tools: el resultado como texto.
+
+    La salida se corta en `max_tokens`, indicando cuántos elementos se omitieron.
+    Métricas: tools.<name>.result_tokens y tools.<name>.tokens_saved (frente al
+    repr completo que se enviaba antes).
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, model_reference: str = "cl100k_base"):
+        self.max_tokens = max_tokens or settings.agent_services.tool_result_max_tokens
+        self._encoder = tiktoken.get_encoding(model_reference)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._encoder.encode(text)) if text else 0
+
+    def compact(self, tool_name: str, results: Any) -> str:
+        if not results:
+            content = "Sin resultados."
+        elif tool_name == "scrape_tool" and isinstance(results, list):
+            content = self._render_products(results)
+        elif tool_name == "search_tool" and isinstance(results, list):
+            content = self._render_lines([
+                f"- {_clip(r.get('url'), 200)}: {_clip(r.get('content'), MAX_SNIPPET_CHARS)}"
+                for r in results if isinstance(r, dict)
+            ])
+        elif tool_name == "retrieval_tool" and isinstance(results, list):
+            content = self._render_lines([
+                f"- [{_cell(r.get('file_name'))}] {_clip(r.get('page_content'), MAX_SNIPPET_CHARS)}"
+                for r in results if isinstance(r, dict)
+            ])
+        else:
+            content = self._truncate(str(results))
+
+        tokens = self.count_tokens(content)
+        saved = max(0, self.count_tokens(str(results)) - tokens)
+        metrics.observe(f"tools.{tool_name}.result_tokens", tokens)
+        metrics.observe(f"tools.{tool_name}.tokens_saved", saved)
+        metrics.incr("tools.compactor.tokens_saved", saved)
+        return content
+
+    def _render_products(self, products: list[dict]) -> str:
+        rows = [
+            " | ".join([
+                _cell(product.get("name")),
+                _cell(product.get("price")),
+                _cell(product.get("colors")),
+                _cell(product.get("sizes")),
+                _cell(product.get("link")),
+                _cell(_clip(product.get("description"), MAX_DESCRIPTION_CHARS)),
+            ])
+            for product in products if isinstance(product, dict)
+        ]
+        return self._render_lines(rows, header=" | ".join(PRODUCT_COLUMNS))
+
+    def _render_lines(self, lines: list[str], header: Optional[str] = None) -> str:
+        """
+        Agrega líneas mientras quepan en el presupuesto de tokens.
+        """
+        output = [header] if header else []
+        used = self.count_tokens(header or "")
+        for i, line in enumerate(lines):
+            line_tokens = self.count_tokens(line) + 1
+            if used + line_tokens > self.max_tokens and i > 0:
+                output.append(f"(+{len(lines) - i} resultados omitidos)")
+                break
+            output.append(line)
+            used += line_tokens
+        return "\n".join(output)
+
+    def _truncate(self, text: str) -> str:
+        tokens = self._encoder.encode(text)
+        if len(tokens) <= self.max_tokens:
+            return text
+        return self._encoder.decode(tokens[:self.max_tokens]) + "…"
@@ -0,0 +1,94 @@
+from typing import Any, Callable, Optional
+import asyncio
+import inspect
+import logging
+import time
+
+from langchain_core.messages import ToolMessage
+
+from core.deadline import DeadlineExceeded
+from core.metrics import metrics
+from inference.tools.compactor import ToolResultCompactor
+
+
+class ToolExecutor:
+    """
+    Ejecuta todas las tool calls de un AIMessage de forma concurrente.
+
+    Cada tool se registra con un spec:
+        {
+            "func": callable (async o sync; las sync corren en un hilo),
+            "build_kwargs": callable(args, state) -> kwargs para func,
+            "timeout": segundos máximos por llamada,
+            "max_concurrency": llamadas simultáneas permitidas en el proceso
+        }
+    Los ToolMessage se retornan en el mismo orden de las tool calls y su contenido
+    pasa por el compactor (texto denso y acotado en tokens).
+
+    Si el estado trae un `deadline` (core.deadline.Deadline), cada tool corre con el
+    menor entre su timeout y lo que queda del turno menos `answer_reserve_seconds`
+    (tiempo guardado para que el LLM alcance a responder con los resultados).
+    """
+
+    def __init__(
+        self,
+        specs: dict[str, dict],
+        compactor: Optional[ToolResultCompactor] = None,
+        answer_reserve_seconds: float = 0.0
+    ):
+        self.specs = specs
+        self.compactor = compactor or ToolResultCompactor()
+        self.answer_reserve_seconds = answer_reserve_seconds
+        self._semaphores = {
+            name: asyncio.Semaphore(spec["max_concurrency"]) for name, spec in specs.items()
+        }
+
+    @property
+    def tools(self) -> list[Callable]:
+        return [spec["func"] for spec in self.specs.values()]
+
+    async def execute(self, tool_calls: list[dict], state: dict) -> list[ToolMessage]:
+        return list(await asyncio.gather(*[self._execute_one(call, state) for call in tool_calls]))
+
+    async def _execute_one(self, call: dict, state: dict) -> ToolMessage:
+        tool_name = call["name"]
+        tool_id = call["id"]      # ID con que el LLM etiquetó la llamada
+        spec = self.specs.get(tool_name)
+        if spec is None:
+            return ToolMessage(content=f"No tool found named {tool_name}", name=tool_name, tool_call_id=tool_id)
+
+        timeout = spec["timeout"]
+        start = time.perf_counter()
+        try:
+            kwargs = spec["build_kwargs"](call["args"], state)
+            # El tiempo de espera por el semáforo cuenta dentro del timeout
+            run = self._run(tool_name, spec["func"], kwargs)
+            deadline = state.get("deadline")
+            if deadline is not None:
+                results = await deadline.run(tool_name, run, cap=timeout, reserve=self.answer_reserve_seconds)
+            else:
+                results = await asyncio.wait_for(run, timeout=timeout)
+            compacted = self.compactor.compact(tool_name, results)
+            tool_content = f"Tool '{tool_name}' result:\n{compacted}"
+        except DeadlineExceeded:
+            logging.warning("Tool '%s' cortada: se agotó el tiempo del turno", tool_name)
+            metrics.incr(f"tools.{tool_name}.deadline_exceeded")
+            tool_content = f"Tool '{tool_name}' no alcanzó a responder en el tiempo del turno. No hay resultados disponibles."
+        except asyncio.TimeoutError:
+            logging.warning("Tool '%s' excedió el tiempo límite de %ss", tool_name, timeout)
+            metrics.incr(f"tools.{tool_name}.timeouts")
+            tool_content = f"Tool '{tool_name}' no respondió a tiempo ({timeout}s). No hay resultados disponibles."
+        except Exception as e:
+            logging.exception("Error ejecutando la tool '%s': %s", tool_name, str(e))
+            metrics.incr(f"tools.{tool_name}.errors")
+            tool_content = f"Tool '{tool_name}' falló: {e}"
+        finally:
+            metrics.observe(f"tools.{tool_name}.ms", (time.perf_counter() - start) * 1000)
+
+        return ToolMessage(content=tool_content, name=tool_name, tool_call_id=tool_id)
+
+    async def _run(self, tool_name: str, func: Callable, kwargs: dict) -> Any:
+        async with self._semaphores[tool_name]:
+            if inspect.iscoroutinefunction(func):
+                return await func(**kwargs)
+            return await asyncio.to_thread(func, **kwargs)
@@ -4,9 +4,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from api.chat import chat_router, pdf_chat_agent 
 from api.chat_agent import chat_agent_router
 from api.inventory_router import inventory_router
+from api.metrics import metrics_router
+from core.container import services
 # from api import auth
 from fastapi.staticfiles import StaticFiles
-app = FastAPI(title="TARS Agents Graphs")
+# Clientes compartidos, warmup y cierre ordenado: core.container.ServiceContainer.lifespan
+app = FastAPI(title="TARS Agents Graphs", lifespan=services.lifespan)
 
 # Configura CORS para permitir peticiones del frontend
 app.add_middleware(
@@ -21,20 +24,8 @@ app.add_middleware(
 app.include_router(chat_router, prefix="/api/chat", tags=["chat"])
 app.include_router(chat_agent_router, prefix="/api/agent/chat", tags=["RestaurantsAgents"])
 app.include_router(inventory_router, prefix="/api/inventory/stock", tags=["StockRestaurants"])
+app.include_router(metrics_router, prefix="/api/metrics", tags=["metrics"])
 # app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 
 # app.mount("/", StaticFiles(directory="./dist", html=True), name="static")
 # app.mount("/", StaticFiles(directory="frontend/dist", html=True), name="static")
-
-# Evento de inicio
-@app.on_event("startup")
-async def startup_event():
-    """
-    Se llama una sola vez al iniciar la app.
-    Puedes inicializar variables globales aquí si fuera necesario
-    o delegar a un módulo de dependencias.
-    """
-    print("Aplicación iniciada")
-    #return await pdf_chat_agent.checkpointer_async.setup()  
-    # O directamente:
-    # await pdf_chat_agent.app.checkpointer.setup()
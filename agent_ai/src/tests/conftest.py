@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos se importan como en el servicio (desde agent_ai/src)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class WordEncoding:
+    """
+    Codificación de una palabra por token: conteos predecibles en las pruebas y sin
+    descargar los archivos BPE de tiktoken.
+    """
+
+    def encode(self, text: str) -> list[str]:
+        return text.split()
+
+    def decode(self, tokens: list[str]) -> str:
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    import tiktoken
+
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: WordEncoding())
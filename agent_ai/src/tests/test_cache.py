@@ -0,0 +1,59 @@
+from core import cache as cache_module
+from core.cache import LRUTTLCache
+from core.metrics import metrics
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_and_miss_count_metrics():
+    cache = LRUTTLCache("test.cache.metrics", max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b", "default") == "default"
+    assert metrics.counter("test.cache.metrics.hits") == 1
+    assert metrics.counter("test.cache.metrics.misses") == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = LRUTTLCache("test.cache.ttl", max_entries=10, ttl_seconds=30)
+    cache.set("a", 1)
+
+    clock.now += 29
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUTTLCache("test.cache.lru", max_entries=2, ttl_seconds=60)
+    evictions = metrics.counter("test.cache.lru.evictions")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" pasa a ser el menos usado
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.peek("a") == 1
+    assert cache.peek("c") == 3
+    assert metrics.counter("test.cache.lru.evictions") == evictions + 1
+
+
+def test_peek_does_not_count_hits():
+    cache = LRUTTLCache("test.cache.peek", max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+
+    assert cache.peek("a") == 1
+    assert cache.peek("b", "default") == "default"
+    assert metrics.counter("test.cache.peek.hits") == 0
+    assert metrics.counter("test.cache.peek.misses") == 0
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+# El módulo arrastra los clientes de Azure/OpenAI (scraper e índice semántico)
+catalog = pytest.importorskip("inference.catalog.cache")
+
+SOURCE = "https://www.bata.com/co/mujer"
+
+
+class FakeLoader:
+    """
+    Scrapeo falso: tarda `delay` segundos y retorna un producto con el número de carga.
+    """
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, source: str) -> list[dict]:
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        return [{"name": f"carga {call}"}]
+
+
+def make_cache(loader: FakeLoader):
+    return catalog.CatalogCache(loader=loader, ttl_seconds=60, stale_seconds=60)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fresh_entry_is_served_without_loading():
+    loader = FakeLoader()
+    cache = make_cache(loader)
+    cache.set(SOURCE, [{"name": "guardado"}])
+
+    assert run(cache.get(SOURCE)) == [{"name": "guardado"}]
+    assert loader.calls == 0
+
+
+def test_stale_entry_is_served_and_refreshed_in_background():
+    loader = FakeLoader(delay=0.05)
+    cache = make_cache(loader)
+    cache.set(SOURCE, [{"name": "viejo"}], fetched_at=time.time() - 90)
+
+    async def scenario():
+        started = time.perf_counter()
+        first = await cache.get(SOURCE)
+        second = await cache.get(SOURCE)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.1)  # deja terminar el refresco
+        return first, second, elapsed
+
+    first, second, elapsed = run(scenario())
+
+    # Ambas lecturas respondieron con lo guardado, sin esperar el scrapeo
+    assert first == second == [{"name": "viejo"}]
+    assert elapsed < 0.05
+    # Un solo refresco para las dos lecturas vencidas
+    assert loader.calls == 1
+    assert cache.is_fresh(SOURCE)
+    assert cache._entries[SOURCE]["products"] == [{"name": "carga 1"}]
+
+
+def test_expired_entry_waits_for_the_loader():
+    loader = FakeLoader()
+    cache = make_cache(loader)
+    cache.set(SOURCE, [{"name": "viejo"}], fetched_at=time.time() - 200)
+
+    assert run(cache.get(SOURCE)) == [{"name": "carga 1"}]
+    assert loader.calls == 1
+
+
+def test_concurrent_misses_share_one_load():
+    loader = FakeLoader(delay=0.05)
+    cache = make_cache(loader)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get(SOURCE) for _ in range(5)))
+
+    results = run(scenario())
+
+    assert loader.calls == 1
+    assert all(result == [{"name": "carga 1"}] for result in results)
+
+
+def test_failed_background_refresh_keeps_the_stale_entry():
+    async def failing(source):
+        raise ConnectionError("sin red")
+
+    cache = catalog.CatalogCache(loader=failing, ttl_seconds=60, stale_seconds=60)
+    cache.set(SOURCE, [{"name": "viejo"}], fetched_at=time.time() - 90)
+
+    async def scenario():
+        products = await cache.get(SOURCE)
+        await asyncio.sleep(0.01)
+        return products
+
+    assert run(scenario()) == [{"name": "viejo"}]
+    assert not cache.is_fresh(SOURCE)
+    assert cache._loading == {}
@@ -0,0 +1,74 @@
+import json
+
+from inference.catalog.parser import parse_listing
+
+
+def json_ld(*products: dict) -> str:
+    graph = {"@context": "https://schema.org", "@type": "ItemList", "itemListElement": [
+        {"@type": "ListItem", "position": i, "item": p} for i, p in enumerate(products, 1)
+    ]}
+    return f'<script type="application/ld+json">{json.dumps(graph)}</script>'
+
+
+def tile(name: str, href: str, price: str = None, colors: tuple = (), sizes: tuple = ()) -> str:
+    swatches = "".join(f'<span data-attr-value="{c}"></span>' for c in colors)
+    size_values = "".join(f'<span class="size-value">{s}</span>' for s in sizes)
+    price_html = f'<div class="price"><span class="sales"><span class="value" content="{price}">$ {price}</span></span></div>' if price else ""
+    return (
+        f'<div class="product-tile"><div class="pdp-link"><a href="{href}">{name}</a></div>'
+        f'{price_html}<div class="color-swatches">{swatches}</div>{size_values}</div>'
+    )
+
+
+def test_structured_data_is_preferred():
+    html = json_ld(
+        {"@type": "Product", "name": "Tenis urbanos", "url": "https://www.bata.com/co/tenis-1.html",
+         "offers": {"@type": "Offer", "price": "189900"}, "color": "Blanco"},
+        {"@type": "Product", "name": "Botas de cuero", "url": "/co/botas-2.html",
+         "offers": [{"@type": "Offer", "price": "259900"}]},
+    ) + tile("Otro nombre", "/co/otro.html", "1")
+
+    products, confidence = parse_listing(html)
+
+    assert confidence == 1.0
+    assert [p["name"] for p in products] == ["Tenis urbanos", "Botas de cuero"]
+    assert products[0]["colors"] == ["Blanco"]
+    assert products[1]["link"] == "https://www.bata.com/co/botas-2.html"
+    assert products[1]["price"] == "259900"
+
+
+def test_product_tiles_are_parsed_without_structured_data():
+    html = tile("Sandalias cómodas", "/co/sandalias.html", "99900", colors=("Café", "Negro"), sizes=("37", "39"))
+
+    [product], confidence = parse_listing(html)
+
+    assert confidence == 1.0
+    assert product == {
+        "name": "Sandalias cómodas",
+        "sizes": ["37", "39"],
+        "colors": ["Café", "Negro"],
+        "price": "99900",
+        "link": "https://www.bata.com/co/sandalias.html",
+        "description": None,
+    }
+
+
+def test_duplicate_tiles_are_removed():
+    html = tile("Botas", "/co/botas.html", "1") + tile("BOTAS", "/co/botas.html", "1")
+
+    products, _ = parse_listing(html)
+
+    assert len(products) == 1
+
+
+def test_incomplete_products_lower_the_confidence():
+    html = tile("Tenis", "/co/tenis.html", "189900") + tile("Botas", "/co/botas.html")
+
+    products, confidence = parse_listing(html)
+
+    assert len(products) == 2
+    assert confidence == 0.5
+
+
+def test_page_without_products():
+    assert parse_listing("<html><body><p>Página no disponible</p></body></html>") == ([], 0.0)
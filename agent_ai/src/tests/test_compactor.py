@@ -0,0 +1,62 @@
+import pytest
+
+from inference.tools.compactor import ToolResultCompactor
+
+
+@pytest.fixture
+def compactor(word_tokens):
+    return ToolResultCompactor(max_tokens=40)
+
+
+def product(name: str) -> dict:
+    # Una fila de 11 palabras: "<name> | 100 | Negro | 38 | <link> | -"
+    return {"name": name, "price": "100", "colors": ["Negro"], "sizes": ["38"], "link": f"/{name}"}
+
+
+def test_products_are_cut_at_the_token_budget_keeping_their_order(compactor):
+    # Encabezado: 11 tokens; cada fila: 11 + 1 (salto de línea)
+    products = [product(f"p{i}") for i in range(5)]
+
+    lines = compactor.compact("scrape_tool", products).splitlines()
+
+    assert lines[0].startswith("nombre | precio")
+    assert [line.split(" | ")[0] for line in lines[1:-1]] == ["p0", "p1"]
+    assert lines[-1] == "(+3 resultados omitidos)"
+
+
+def test_first_result_is_kept_even_over_budget(word_tokens):
+    compactor = ToolResultCompactor(max_tokens=5)
+
+    lines = compactor.compact("search_tool", [
+        {"url": "https://bata.com/a", "content": "envíos gratis por compras superiores"},
+        {"url": "https://bata.com/b", "content": "cambios hasta 30 días"},
+    ]).splitlines()
+
+    assert lines == ["- https://bata.com/a: envíos gratis por compras superiores", "(+1 resultados omitidos)"]
+
+
+def test_fitting_results_are_not_cut(compactor):
+    content = compactor.compact("scrape_tool", [product("p0")])
+
+    assert "omitidos" not in content
+    assert content.splitlines()[1] == "p0 | 100 | Negro | 38 | /p0 | -"
+
+
+def test_other_tools_are_truncated_to_the_budget(compactor):
+    content = compactor.compact("otra_tool", " ".join(str(i) for i in range(100)))
+
+    assert content.endswith("…")
+    assert compactor.count_tokens(content) == 40
+
+
+def test_cells_do_not_break_the_table(compactor):
+    content = compactor.compact("scrape_tool", [{"name": "Bota | alta", "description": "x" * 200}])
+
+    row = content.splitlines()[1].split(" | ")
+    assert row[0] == "Bota / alta"
+    assert len(row) == 6
+    assert len(row[-1]) == 80
+
+
+def test_empty_results(compactor):
+    assert compactor.compact("scrape_tool", []) == "Sin resultados."
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from inference.context_manager import ConversationContextManager
+
+
+@pytest.fixture
+def manager(word_tokens):
+    # Cada mensaje cuesta 4 tokens de overhead + una palabra por token
+    return ConversationContextManager(max_tokens=30, summary_max_tokens=50)
+
+
+def turn(question: str, answer: str) -> list:
+    return [HumanMessage(content=question), AIMessage(content=answer)]
+
+
+def test_pack_keeps_the_most_recent_turns_within_budget(manager):
+    # Cada turno: (4 + 2) + (4 + 2) = 12 tokens
+    old = turn("hola bot", "hola cliente")
+    middle = turn("busco tenis", "qué talla")
+    recent = turn("talla 38", "aquí están")
+
+    window, overflow = manager.pack(old + middle + recent)
+
+    assert window == middle + recent
+    assert overflow == old
+
+
+def test_pack_reserves_tokens_for_the_new_message(manager):
+    old = turn("hola bot", "hola cliente")
+    recent = turn("talla 38", "aquí están")
+
+    window, overflow = manager.pack(old + recent, reserved_tokens=10)
+
+    assert window == recent
+    assert overflow == old
+
+
+def test_current_turn_is_always_included(manager):
+    huge = turn(" ".join(["palabra"] * 100), "ok")
+
+    window, overflow = manager.pack(turn("hola bot", "hola") + huge)
+
+    assert window == huge
+    assert len(overflow) == 2
+
+
+def test_tool_calls_stay_with_their_results(manager):
+    call = AIMessage(content="", tool_calls=[{"name": "scrape_tool", "args": {"query": "tenis"}, "id": "1"}])
+    tool_turn = [HumanMessage(content="busca tenis"), call, ToolMessage(content="resultado", tool_call_id="1")]
+
+    turns = manager.split_turns([SystemMessage(content="sistema")] + turn("hola", "hola") + tool_turn)
+
+    assert turns[-1] == tool_turn
+    assert all(not isinstance(m, SystemMessage) for t in turns for m in t)
+
+
+def test_summarize_merges_previous_summary_and_skips_tool_results(manager):
+    class FakeLLM:
+        async def ainvoke(self, prompt, **kwargs):
+            self.prompt, self.kwargs = prompt, kwargs
+            return AIMessage(content="resumen nuevo")
+
+    llm = FakeLLM()
+    messages = [
+        HumanMessage(content="busco tenis"),
+        ToolMessage(content="tabla de productos", tool_call_id="1"),
+        AIMessage(content="te muestro tres"),
+    ]
+
+    summary = asyncio.run(manager.summarize(llm, "compra para mujer", messages))
+
+    assert summary == "resumen nuevo"
+    request = llm.prompt[-1].content
+    assert "compra para mujer" in request
+    assert "Cliente: busco tenis" in request
+    assert "BataBot: te muestro tres" in request
+    assert "tabla de productos" not in request
+    assert llm.kwargs == {"max_tokens": 50}
+
+
+def test_summary_is_inserted_before_the_packed_window(manager):
+    from inference.prompt_builder import PromptBuilder
+
+    old = turn("hola bot", "hola cliente")
+    middle = turn("busco tenis", "qué talla")
+    current = [HumanMessage(content="talla 38 color negro por favor")]
+    window, overflow = manager.pack(old + middle + current)
+
+    prompt = PromptBuilder("sistema").build(window, summary="compra para mujer")
+
+    assert overflow == old
+    assert prompt[0].content == "sistema"
+    assert isinstance(prompt[1], SystemMessage) and "compra para mujer" in prompt[1].content
+    assert prompt[2:4] == middle
+    assert prompt[-1] == current[0]
@@ -0,0 +1,61 @@
+import asyncio
+import warnings
+
+import pytest
+
+from core.deadline import Deadline, DeadlineExceeded
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def sleep_and_return(seconds: float, value: str = "ok") -> str:
+    await asyncio.sleep(seconds)
+    return value
+
+
+def test_run_returns_and_records_the_stage():
+    deadline = Deadline(1.0)
+
+    assert run(deadline.run("cosmos", sleep_and_return(0.01))) == "ok"
+    report = deadline.report()
+    assert "cosmos" in report["stages"]
+    assert deadline.exceeded_stages == []
+
+
+def test_budget_exhaustion_raises_deadline_exceeded():
+    deadline = Deadline(0.05)
+
+    with pytest.raises(DeadlineExceeded):
+        run(deadline.run("llm", sleep_and_return(1.0)))
+    assert deadline.exceeded_stages == ["llm"]
+
+
+def test_stage_cap_raises_plain_timeout():
+    deadline = Deadline(5.0)
+
+    with pytest.raises(asyncio.TimeoutError) as error:
+        run(deadline.run("tool", sleep_and_return(1.0), cap=0.05))
+    assert not isinstance(error.value, DeadlineExceeded)
+    assert deadline.exceeded_stages == []
+
+
+def test_reserve_leaves_no_time_and_closes_the_coroutine():
+    deadline = Deadline(1.0)
+    coroutine = sleep_and_return(0.0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with pytest.raises(DeadlineExceeded):
+            run(deadline.run("tool", coroutine, reserve=5.0))
+    assert coroutine.cr_frame is None
+    assert deadline.exceeded_stages == ["tool"]
+
+
+def test_timeout_is_bounded_by_cap_and_reserve():
+    deadline = Deadline(10.0)
+
+    assert deadline.timeout(cap=2.0) == 2.0
+    assert 7.5 < deadline.timeout(reserve=2.0) <= 8.0
+    assert deadline.timeout(cap=2.0, reserve=9.5) <= 0.5
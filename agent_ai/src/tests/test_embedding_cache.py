@@ -0,0 +1,73 @@
+import pytest
+
+import core.embedding_cache as embedding_cache_module
+from core.embedding_cache import EmbeddingCache
+
+# Cada vector de 4 float32 ocupa 16 bytes
+VECTOR_BYTES = 16
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(embedding_cache_module, "time", clock)
+    return clock
+
+
+def vector(value: float) -> list[float]:
+    return [value] * 4
+
+
+def test_vectors_round_trip_by_content_key(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"))
+    key = EmbeddingCache.key("small", "tenis blancos")
+
+    cache.put_many({key: [0.5, 0.25, 0.0, 1.0]})
+
+    assert cache.get_many([key, EmbeddingCache.key("large", "tenis blancos")]) == {key: [0.5, 0.25, 0.0, 1.0]}
+    # Persiste entre instancias
+    assert EmbeddingCache(str(tmp_path / "cache.db")).get_many([key]) == {key: [0.5, 0.25, 0.0, 1.0]}
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = EmbeddingCache(":memory:", max_bytes=4 * VECTOR_BYTES)
+    for i, key in enumerate("abcd"):
+        cache.put_many({key: vector(i)})
+    # Leer "a" la vuelve la más reciente
+    cache.get_many(["a"])
+
+    cache.put_many({"e": vector(4)})
+
+    # Se elimina hasta bajar al 90 % del límite: las dos usadas hace más tiempo
+    assert set(cache.get_many(list("abcde"))) == {"a", "d", "e"}
+    assert cache._total_bytes == 3 * VECTOR_BYTES
+
+
+def test_existing_keys_are_not_counted_twice(clock):
+    cache = EmbeddingCache(":memory:", max_bytes=4 * VECTOR_BYTES)
+    cache.put_many({"a": vector(0)})
+    cache.put_many({"a": vector(1)})
+
+    assert cache._total_bytes == VECTOR_BYTES
+    assert cache.get_many(["a"]) == {"a": vector(0)}
+
+
+def test_size_is_restored_when_reopened(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    previous = EmbeddingCache(path, max_bytes=4 * VECTOR_BYTES)
+    for key in "abc":
+        previous.put_many({key: vector(1)})
+
+    cache = EmbeddingCache(path, max_bytes=4 * VECTOR_BYTES)
+    cache.put_many({"d": vector(1), "e": vector(1)})
+
+    assert set(cache.get_many(list("abcde"))) == {"c", "d", "e"}
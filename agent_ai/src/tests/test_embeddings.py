@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+from core.embeddings import EmbeddingBatcher
+from core.metrics import metrics
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+class FakeEmbeddings:
+    """
+    API de embeddings falsa: el vector de cada texto es [len(texto)]. Lanza los
+    errores de `errors` (en orden) antes de responder.
+    """
+
+    def __init__(self, errors: list = None):
+        self.errors = list(errors or [])
+        self.calls = []
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append((time.monotonic(), list(texts)))
+        await asyncio.sleep(0.01)
+        if self.errors:
+            raise self.errors.pop(0)
+        return [[float(len(text))] for text in texts]
+
+
+def make_batcher(embeddings: FakeEmbeddings, **kwargs) -> EmbeddingBatcher:
+    options = {"batch_size": 2, "max_batch_tokens": 100, "max_concurrency": 1, "max_retries": 2,
+               "retry_base_seconds": 0.01}
+    options.update(kwargs)
+    return EmbeddingBatcher(embeddings, **options)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_batches_respect_size_and_token_limits():
+    batcher = make_batcher(FakeEmbeddings(), batch_size=3, max_batch_tokens=10)
+
+    assert batcher.batches(["a"] * 7, [1] * 7) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert batcher.batches(["a"] * 4, [6, 3, 5, 20]) == [[0, 1], [2], [3]]
+    assert batcher.batches([]) == []
+
+
+def test_embeddings_keep_the_order_of_the_texts():
+    embeddings = FakeEmbeddings()
+    batcher = make_batcher(embeddings, max_concurrency=3)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    vectors = run(batcher.embed(texts))
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert sorted(len(texts) for _, texts in embeddings.calls) == [1, 2, 2]
+
+
+def test_throttled_batch_pauses_the_next_ones_and_retries():
+    embeddings = FakeEmbeddings(errors=[FakeHTTPError(429, {"retry-after": "0.2"})])
+    batcher = make_batcher(embeddings)
+    throttled = metrics.counter("embeddings.throttled")
+
+    vectors = run(batcher.embed(["a", "bb", "ccc"]))
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert metrics.counter("embeddings.throttled") == throttled + 1
+    # Ningún lote sale antes del retry-after y el lote limitado se reintenta
+    (throttled_at, _), *later = embeddings.calls
+    assert all(called_at - throttled_at >= 0.2 for called_at, _ in later)
+    assert sorted(texts for _, texts in later) == [["a", "bb"], ["ccc"]]
+
+
+def test_throttling_gives_up_after_max_retries():
+    embeddings = FakeEmbeddings(errors=[FakeHTTPError(429)] * 3)
+    batcher = make_batcher(embeddings, max_retries=2)
+
+    with pytest.raises(FakeHTTPError):
+        run(batcher.embed(["a"]))
+
+    assert len(embeddings.calls) == 3
+
+
+def test_other_errors_are_not_retried():
+    embeddings = FakeEmbeddings(errors=[FakeHTTPError(400)])
+    batcher = make_batcher(embeddings)
+
+    with pytest.raises(FakeHTTPError):
+        run(batcher.embed(["a"]))
+
+    assert len(embeddings.calls) == 1
+
+
+def test_cached_and_repeated_texts_are_embedded_once():
+    from core.embedding_cache import EmbeddingCache
+
+    embeddings = FakeEmbeddings()
+    batcher = make_batcher(embeddings, cache=EmbeddingCache(":memory:"), model_name="small")
+
+    assert run(batcher.embed(["a", "bb", "a"])) == [[1.0], [2.0], [1.0]]
+    assert run(batcher.embed(["bb", "ccc"])) == [[2.0], [3.0]]
+    assert [texts for _, texts in embeddings.calls] == [["a", "bb"], ["ccc"]]
@@ -0,0 +1,35 @@
+import pytest
+
+from inference.intent import conversation_slots, extract_slots, intent_classifier
+
+
+@pytest.mark.parametrize("text", [
+    "no es para mujer, es para hombre",
+    "ni mujer ni hombre",
+    "no quiero zapatos",
+    "nada de ofertas",
+    "mujer... mejor hombre",
+])
+def test_negations_and_several_values_go_to_the_main_model(text):
+    assert intent_classifier.classify(text)["fast_path"] is False
+
+
+@pytest.mark.parametrize("text, gender, category", [
+    ("para hombre", "hombre", None),
+    ("zapatos para mujer", "mujer", "zapatos"),
+    ("hola, para mujer", "mujer", None),
+])
+def test_slot_only_turns_take_the_fast_path(text, gender, category):
+    intent = intent_classifier.classify(text)
+    assert intent["fast_path"] is True
+    assert (intent["gender"], intent["category"]) == (gender, category)
+
+
+def test_last_mentioned_value_wins():
+    assert extract_slots("no es para mujer, es para hombre")["gender"] == "hombre"
+    assert extract_slots("accesorios o mejor zapatos")["category"] == "zapatos"
+
+
+def test_conversation_slots_prefer_the_most_recent_message():
+    assert conversation_slots(["zapatos para mujer", "mejor para hombre"]) == {"gender": "hombre", "category": "zapatos"}
+    assert conversation_slots(["hola", "para hombre"]) == {"gender": "hombre", "category": None}
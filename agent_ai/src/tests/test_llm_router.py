@@ -0,0 +1,279 @@
+import asyncio
+import time
+
+import pytest
+
+from core.llm_router import Deployment, LLMRouter
+from core.metrics import metrics
+
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {}
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+class FakeModel:
+    """
+    Endpoint falso: responde `name` tras `delay` segundos, o lanza el siguiente
+    error de `errors` mientras queden.
+    """
+
+    def __init__(self, name: str, delay: float = 0.0, errors: list = None):
+        self.name = name
+        self.delay = delay
+        self.errors = list(errors or [])
+        self.calls = 0
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.errors:
+            raise self.errors.pop(0)
+        return FakeResponse(self.name)
+
+
+def make_router(*models: FakeModel, **kwargs) -> LLMRouter:
+    breaker = {key: kwargs.pop(key) for key in ("breaker_failures", "breaker_cooldown_seconds") if key in kwargs}
+    deployments = [Deployment(model.name, model, **breaker) for model in models]
+    return LLMRouter(deployments, **kwargs)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_failover_on_server_error():
+    primary = FakeModel("a", errors=[FakeHTTPError(500)])
+    backup = FakeModel("b")
+    router = make_router(primary, backup)
+    failovers = metrics.counter("llm.router.failovers")
+
+    response = run(router.ainvoke("hola"))
+
+    assert response.content == "b"
+    assert primary.calls == 1
+    assert router.deployments[0].consecutive_failures == 1
+    assert metrics.counter("llm.router.failovers") == failovers + 1
+
+
+def test_client_error_is_raised_without_failover():
+    primary = FakeModel("a", errors=[FakeHTTPError(400)])
+    backup = FakeModel("b")
+    router = make_router(primary, backup)
+
+    with pytest.raises(FakeHTTPError):
+        run(router.ainvoke("hola"))
+
+    assert backup.calls == 0
+    assert router.deployments[0].consecutive_failures == 0
+
+
+def test_timeout_and_connection_errors_fail_over():
+    primary = FakeModel("a", errors=[asyncio.TimeoutError(), ConnectionError()])
+    backup = FakeModel("b")
+    router = make_router(primary, backup)
+
+    assert run(router.ainvoke("hola")).content == "b"
+    router.deployments[1].ewma_ms = 1000.0  # "a" vuelve a ser el preferido
+    assert run(router.ainvoke("hola")).content == "b"
+    assert router.deployments[0].consecutive_failures == 2
+
+
+def test_throttled_deployment_leaves_rotation():
+    primary = FakeModel("a", errors=[FakeHTTPError(429, {"retry-after": "30"})])
+    backup = FakeModel("b")
+    router = make_router(primary, backup)
+
+    assert run(router.ainvoke("hola")).content == "b"
+    throttled = router.deployments[0]
+    assert throttled.throttled_until > time.monotonic() + 25
+    assert throttled.consecutive_failures == 0
+
+    assert [d.name for d in router.rank(100)] == ["b"]
+    assert run(router.ainvoke("hola")).content == "b"
+    assert primary.calls == 1
+
+
+def test_breaker_opens_and_half_open_probe_closes_it():
+    failing = FakeModel("a", errors=[FakeHTTPError(503), FakeHTTPError(503)])
+    healthy = FakeModel("b")
+    router = make_router(failing, healthy, breaker_failures=2, breaker_cooldown_seconds=0.05)
+    broken = router.deployments[0]
+
+    for _ in range(2):
+        router.deployments[1].ewma_ms = 1000.0
+        assert run(router.ainvoke("hola")).content == "b"
+    assert broken.is_open
+    assert [d.name for d in router.rank(100)] == ["b"]
+
+    time.sleep(0.06)
+    assert not broken.is_open
+
+    async def probe():
+        task = router._start(broken, "hola", 100, None, {})
+        # Mientras corre la llamada de prueba no entran otras
+        assert broken.is_open
+        return await task
+
+    assert run(probe()).content == "a"
+    assert not broken.is_open
+    assert broken.consecutive_failures == 0
+
+
+def test_hedge_wins_when_primary_is_slow():
+    slow = FakeModel("a", delay=1.0)
+    fast = FakeModel("b", delay=0.01)
+    router = make_router(slow, fast, hedge_min_samples=1, hedge_min_delay_seconds=0.05)
+    router.deployments[0].record_success(10.0, 0, None)
+    router.deployments[1].ewma_ms = 1000.0
+    wins = metrics.counter("llm.router.hedge_wins")
+
+    async def call():
+        response = await router.ainvoke("hola")
+        await asyncio.sleep(0)  # deja correr la cancelación de la llamada lenta
+        return response
+
+    started = time.perf_counter()
+    response = run(call())
+
+    assert response.content == "b"
+    assert time.perf_counter() - started < 0.5
+    assert metrics.counter("llm.router.hedge_wins") == wins + 1
+    assert [d.inflight for d in router.deployments] == [0, 0]
+
+
+def test_inflight_released_when_cancelled_before_start():
+    router = make_router(FakeModel("a"))
+    deployment = router.deployments[0]
+
+    async def cancel_early():
+        task = router._start(deployment, "hola", 100, None, {})
+        assert deployment.inflight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(cancel_early())
+    assert deployment.inflight == 0
+
+
+class FakeStreamHandler:
+    """
+    Handler del stream de mensajes: lo que recibe es lo que el cliente ya vio.
+    """
+
+    def __init__(self):
+        self.tokens = []
+
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+    async def on_llm_new_token(self, token, **kwargs):
+        self.tokens.append(token)
+
+
+class FakeStreamingModel(FakeModel):
+    """
+    Endpoint falso con streaming: envía su nombre como primer token a los callbacks
+    tras `first_token_delay` y responde completo tras `delay`.
+    """
+
+    def __init__(self, name: str, first_token_delay: float, delay: float):
+        super().__init__(name, delay=delay)
+        self.first_token_delay = first_token_delay
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        self.calls += 1
+        callbacks = (config or {}).get("callbacks") or []
+        await asyncio.sleep(self.first_token_delay)
+        for handler in getattr(callbacks, "handlers", callbacks):
+            await handler.on_llm_new_token(self.name)
+        await asyncio.sleep(self.delay - self.first_token_delay)
+        return FakeResponse(self.name)
+
+
+def make_streaming_router(primary: FakeModel, backup: FakeModel) -> LLMRouter:
+    router = make_router(primary, backup, hedge_min_samples=1, hedge_min_delay_seconds=0.05)
+    router.deployments[0].record_first_token(10.0)
+    router.deployments[1].ewma_ms = 1000.0
+    return router
+
+
+def test_streaming_primary_is_not_hedged_after_its_first_token():
+    primary = FakeStreamingModel("a", first_token_delay=0.01, delay=0.2)
+    backup = FakeModel("b")
+    router = make_streaming_router(primary, backup)
+    handler = FakeStreamHandler()
+    skipped = metrics.counter("llm.router.hedges_skipped")
+
+    response = run(router.ainvoke("hola", config={"callbacks": [handler]}))
+
+    assert response.content == "a"
+    assert handler.tokens == ["a"]
+    assert backup.calls == 0
+    assert metrics.counter("llm.router.hedges_skipped") == skipped + 1
+
+
+def test_hedge_is_cancelled_when_the_primary_starts_streaming():
+    primary = FakeStreamingModel("a", first_token_delay=0.1, delay=0.2)
+    backup = FakeModel("b", delay=0.5)
+    router = make_streaming_router(primary, backup)
+    handler = FakeStreamHandler()
+    cancelled = metrics.counter("llm.router.hedges_cancelled")
+
+    async def call():
+        response = await router.ainvoke("hola", config={"callbacks": [handler]})
+        await asyncio.sleep(0)
+        return response
+
+    response = run(call())
+
+    # El texto final es el mismo que el cliente empezó a ver
+    assert response.content == "a"
+    assert handler.tokens == ["a"]
+    assert backup.calls == 1
+    assert metrics.counter("llm.router.hedges_cancelled") == cancelled + 1
+    assert [d.inflight for d in router.deployments] == [0, 0]
+
+
+def test_hedge_wins_only_before_any_token_was_streamed():
+    primary = FakeStreamingModel("a", first_token_delay=1.0, delay=1.5)
+    backup = FakeModel("b", delay=0.01)
+    router = make_streaming_router(primary, backup)
+    handler = FakeStreamHandler()
+
+    async def call():
+        response = await router.ainvoke("hola", config={"callbacks": [handler]})
+        await asyncio.sleep(0)
+        return response
+
+    response = run(call())
+
+    assert response.content == "b"
+    # La principal se canceló antes de enviar texto: el cliente no vio otra respuesta
+    assert handler.tokens == []
+
+
+def test_streaming_is_detected_inside_a_callback_manager():
+    from langchain_core.callbacks import AsyncCallbackManager
+
+    primary = FakeStreamingModel("a", first_token_delay=0.01, delay=0.05)
+    router = make_router(primary)
+    handler = FakeStreamHandler()
+    manager = AsyncCallbackManager(handlers=[handler])
+
+    response = run(router.ainvoke("hola", config={"callbacks": manager}))
+
+    assert response.content == "a"
+    assert handler.tokens == ["a"]
+    # El manager del grafo no se modifica y se mide el tiempo al primer token
+    assert manager.handlers == [handler]
+    assert router.deployments[0].first_token_samples == 1
@@ -0,0 +1,68 @@
+import pytest
+
+from inference.catalog.index import ProductIndex, parse_price
+
+SOURCE = "https://www.bata.com/co/mujer"
+
+PRODUCTS = [
+    {"name": "Tenis urbanos blancos", "sizes": ["36", "37", "38"], "colors": ["Blanco"], "price": "$ 189.900",
+     "description": "Tenis livianos para el día a día"},
+    {"name": "Sandalias cómodas", "sizes": ["37", "39"], "colors": ["Café", "Negro"], "price": "$ 99.900",
+     "description": "Sandalias de cuero"},
+    {"name": "Botas de cuero", "sizes": ["38"], "colors": ["Negro"], "price": "$ 259.900",
+     "description": "Botas altas, combinan con tenis y sandalias"},
+]
+
+
+@pytest.fixture
+def index():
+    index = ProductIndex(":memory:")
+    index.replace_source(SOURCE, PRODUCTS)
+    return index
+
+
+def names(products: list[dict]) -> list[str]:
+    return [p["name"] for p in products]
+
+
+def test_query_orders_by_relevance(index):
+    results = index.search(SOURCE, query="tenis")
+
+    # El nombre pesa más que la mención en la descripción de las botas
+    assert names(results) == ["Tenis urbanos blancos", "Botas de cuero"]
+
+
+def test_query_ignores_accents_and_matches_prefixes(index):
+    assert names(index.search(SOURCE, query="comoda"))[0] == "Sandalias cómodas"
+
+
+def test_no_match_returns_the_listing_in_order(index):
+    assert names(index.search(SOURCE, query="paraguas")) == names(PRODUCTS)
+
+
+def test_filters_by_size_color_and_price(index):
+    assert names(index.search(SOURCE, sizes=["38"])) == ["Tenis urbanos blancos", "Botas de cuero"]
+    assert names(index.search(SOURCE, colors=["negro"])) == ["Sandalias cómodas", "Botas de cuero"]
+    assert names(index.search(SOURCE, max_price=200000)) == ["Tenis urbanos blancos", "Sandalias cómodas"]
+    assert names(index.search(SOURCE, query="tenis", colors=["negro"], max_price=300000)) == ["Botas de cuero"]
+
+
+def test_search_is_scoped_to_the_source_and_replaced_atomically(index):
+    other = "https://www.bata.com/co/hombre"
+    index.replace_source(other, [{"name": "Tenis deportivos", "sizes": ["42"], "colors": ["Azul"]}])
+    index.replace_source(SOURCE, PRODUCTS[:1])
+
+    assert names(index.search(SOURCE, query="tenis")) == ["Tenis urbanos blancos"]
+    assert names(index.search(other, query="tenis")) == ["Tenis deportivos"]
+    assert index.search(SOURCE, limit=0) == []
+
+
+@pytest.mark.parametrize("price, value", [
+    ("$ 129.900", 129900.0),
+    ("129,900.00", 129900.0),
+    ("$129.900,00", 129900.0),
+    ("", None),
+    (None, None),
+])
+def test_parse_price(price, value):
+    assert parse_price(price) == value
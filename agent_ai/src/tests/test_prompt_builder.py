@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from core.metrics import metrics
+from inference.prompt_builder import PromptBuilder, record_prompt_usage
+
+
+def serialized(messages) -> list[tuple[str, str]]:
+    return [(m.type, m.content) for m in messages]
+
+
+def is_prefix(prefix: list, messages: list) -> bool:
+    return serialized(messages[:len(prefix)]) == serialized(prefix)
+
+
+def test_prefix_is_stable_across_turns():
+    builder = PromptBuilder("sistema")
+    first_turn = [HumanMessage(content="hola"), AIMessage(content="hola, ¿qué buscas?")]
+    second_turn = [HumanMessage(content="tenis blancos")]
+
+    first = builder.build(first_turn[:1], summary="compra para mujer", now=datetime(2026, 1, 1, 10, 0))
+    second = builder.build(first_turn + second_turn, summary="compra para mujer", now=datetime(2026, 1, 1, 10, 5))
+
+    # Todo lo anterior a la fecha del primer llamado se repite al inicio del segundo
+    assert is_prefix(first[:-2], second)
+    assert second[-2].content == "Fecha y hora actual: 2026-01-01 10:05"
+    assert serialized(second[2:4]) == serialized(first_turn)
+
+
+def test_calls_within_a_turn_share_everything_but_the_tool_results():
+    builder = PromptBuilder("sistema")
+    call = AIMessage(content="", tool_calls=[{"name": "scrape_tool", "args": {}, "id": "1"}])
+    turn = [HumanMessage(content="hola"), AIMessage(content="hola"), HumanMessage(content="tenis")]
+    now = datetime(2026, 1, 1, 10, 0, 15)
+
+    first = builder.build(turn, pdf_text="contrato", now=now)
+    second = builder.build(turn + [call, ToolMessage(content="productos", tool_call_id="1")], pdf_text="contrato",
+                           now=now.replace(second=50))
+
+    assert is_prefix(first, second)
+    assert len(second) == len(first) + 2
+
+
+def test_static_prompt_is_the_same_object_and_comes_first():
+    builder = PromptBuilder("sistema")
+
+    prompt = builder.build([HumanMessage(content="hola")], pdf_text="contrato", summary="resumen")
+
+    assert prompt[0] is builder.static_message
+    assert isinstance(prompt[1], SystemMessage)
+    assert prompt[1].content.index("contrato") < prompt[1].content.index("resumen")
+    assert prompt[-1].content == "hola"
+
+
+def test_no_context_message_without_documents_or_summary():
+    prompt = PromptBuilder("sistema").build([HumanMessage(content="hola")], now=datetime(2026, 1, 1))
+
+    assert [m.content for m in prompt] == ["sistema", "Fecha y hora actual: 2026-01-01 00:00", "hola"]
+
+
+def test_record_prompt_usage_reads_cached_tokens():
+    response = AIMessage(content="ok", usage_metadata={
+        "input_tokens": 1000, "output_tokens": 10, "total_tokens": 1010,
+        "input_token_details": {"cache_read": 768},
+    })
+    cached_total = metrics.counter("llm.cached_tokens_total")
+
+    assert record_prompt_usage(response) == 768
+    assert metrics.counter("llm.cached_tokens_total") == cached_total + 768
+    assert record_prompt_usage(AIMessage(content="ok")) is None
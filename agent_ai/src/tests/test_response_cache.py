@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+# El módulo importa los clientes de Azure/OpenAI para los embeddings
+response_cache = pytest.importorskip("inference.response_cache")
+
+ENVIOS = "cuanto cuesta el envio a medellin"
+ENVIOS_SIMILAR = "cuanto vale el envio a medellin"
+DEVOLUCION = "como hago una devolucion de mi pedido"
+
+
+class FakeEmbeddings:
+    """
+    Embeddings falsos: un vector fijo por texto normalizado.
+    """
+
+    def __init__(self, vectors: dict):
+        self.vectors = vectors
+        self.calls = []
+
+    async def aembed_query(self, text: str) -> list[float]:
+        self.calls.append(text)
+        return self.vectors[text]
+
+
+class FakeResponseCache(response_cache.SemanticResponseCache):
+    def __init__(self, embeddings: FakeEmbeddings, max_entries: int = 10):
+        super().__init__("v1", similarity_threshold=0.9, ttl_seconds=60, max_entries=max_entries, min_chars=10)
+        self.fake_embeddings = embeddings
+
+    @property
+    def embeddings(self):
+        return self.fake_embeddings
+
+
+@pytest.fixture
+def embeddings():
+    return FakeEmbeddings({
+        ENVIOS: [1.0, 0.0, 0.0],
+        ENVIOS_SIMILAR: [0.95, 0.05, 0.0],
+        DEVOLUCION: [0.0, 1.0, 0.0],
+    })
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_exact_hit_skips_the_embeddings_service(embeddings):
+    cache = FakeResponseCache(embeddings)
+    run(cache.store("¿Cuánto cuesta el envío a Medellín?", "El envío cuesta $10.000"))
+    embeddings.calls.clear()
+
+    hit = run(cache.lookup("cuanto cuesta el ENVIO a medellin"))
+
+    assert hit == {"text": "El envío cuesta $10.000", "similarity": 1.0}
+    assert embeddings.calls == []
+
+
+def test_similar_question_hits_above_the_threshold(embeddings):
+    cache = FakeResponseCache(embeddings)
+    run(cache.store(ENVIOS, "El envío cuesta $10.000"))
+
+    hit = run(cache.lookup(ENVIOS_SIMILAR))
+
+    assert hit["text"] == "El envío cuesta $10.000"
+    assert 0.9 < hit["similarity"] < 1.0
+    assert run(cache.lookup(DEVOLUCION)) is None
+
+
+def test_entries_expire_after_the_ttl(embeddings):
+    cache = FakeResponseCache(embeddings)
+    run(cache.store(ENVIOS, "El envío cuesta $10.000"))
+    cache._entries[ENVIOS]["created_at"] = time.time() - 61
+
+    assert run(cache.lookup(ENVIOS)) is None
+    assert cache._entries == {}
+
+
+def test_prompt_change_invalidates_the_entries(embeddings):
+    cache = FakeResponseCache(embeddings)
+    run(cache.store(ENVIOS, "El envío cuesta $10.000"))
+    cache.fingerprint = "v2"
+
+    assert run(cache.lookup(ENVIOS)) is None
+
+
+def test_least_recently_used_entry_is_evicted(embeddings):
+    cache = FakeResponseCache(embeddings, max_entries=2)
+    run(cache.store(ENVIOS, "envío"))
+    run(cache.store(DEVOLUCION, "devolución"))
+    run(cache.lookup(ENVIOS))
+    run(cache.store(ENVIOS_SIMILAR, "envío similar"))
+
+    assert list(cache._entries) == [ENVIOS, ENVIOS_SIMILAR]
+
+
+def test_only_general_questions_are_eligible(embeddings):
+    cache = FakeResponseCache(embeddings)
+
+    assert cache.is_eligible(ENVIOS)
+    assert not cache.is_eligible(ENVIOS, pdf_text="contrato")
+    assert not cache.is_eligible("hola")
+    assert not cache.is_eligible("busco tenis blancos talla 38")
@@ -0,0 +1,140 @@
+import asyncio
+
+from inference.scheduler import ConversationScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_serialize_runs_one_turn_at_a_time_per_conversation():
+    scheduler = ConversationScheduler()
+    active = {"c1": 0, "c2": 0}
+    peak = {"c1": 0, "c2": 0}
+
+    async def turn(conversation_id: str):
+        async with scheduler.serialize(conversation_id):
+            active[conversation_id] += 1
+            peak[conversation_id] = max(peak[conversation_id], active[conversation_id])
+            await asyncio.sleep(0.01)
+            active[conversation_id] -= 1
+
+    async def main():
+        await asyncio.gather(*[turn(conversation_id) for conversation_id in ["c1", "c2"] * 3])
+
+    run(main())
+    assert peak == {"c1": 1, "c2": 1}
+    # Los locks se liberan cuando nadie los espera
+    assert scheduler._locks == {}
+    assert scheduler._lock_users == {}
+
+
+def test_idle_conversation_starts_immediately():
+    scheduler = ConversationScheduler()
+    received = []
+
+    async def run_turn(text: str):
+        received.append(text)
+        return text.upper()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await scheduler.submit("c1", "hola", run_turn)
+        return result, loop.time() - started
+
+    (result, is_primary), elapsed = run(main())
+    assert (result, is_primary) == ("HOLA", True)
+    assert received == ["hola"]
+    assert elapsed < 0.05
+
+
+def test_messages_during_a_turn_are_coalesced_into_the_next_one():
+    scheduler = ConversationScheduler()
+    received = []
+
+    async def run_turn(text: str):
+        received.append(text)
+        await asyncio.sleep(0.05)
+        return text
+
+    async def main():
+        first = asyncio.create_task(scheduler.submit("c1", "hola", run_turn))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(scheduler.submit("c1", "busco tenis", run_turn))
+        third = asyncio.create_task(scheduler.submit("c1", "talla 38", run_turn))
+        return await asyncio.gather(first, second, third)
+
+    results = run(main())
+    assert received == ["hola", "busco tenis\ntalla 38"]
+    assert results == [("hola", True), ("busco tenis\ntalla 38", True), ("busco tenis\ntalla 38", False)]
+
+
+def test_batch_error_reaches_every_caller():
+    scheduler = ConversationScheduler()
+
+    async def run_turn(text: str):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("falló el turno")
+
+    async def main():
+        return await asyncio.gather(
+            scheduler.submit("c1", "uno", run_turn),
+            scheduler.submit("c1", "dos", run_turn),
+            return_exceptions=True
+        )
+
+    results = run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert scheduler._pending == {}
+
+
+def test_conversations_are_independent():
+    scheduler = ConversationScheduler()
+
+    async def run_turn(text: str):
+        await asyncio.sleep(0.01)
+        return text
+
+    async def main():
+        return await asyncio.gather(
+            scheduler.submit("c1", "uno", run_turn),
+            scheduler.submit("c2", "dos", run_turn)
+        )
+
+    assert run(main()) == [("uno", True), ("dos", True)]
+
+
+def test_new_batch_opens_after_the_previous_one_closes():
+    scheduler = ConversationScheduler()
+    received = []
+
+    async def run_turn(text: str):
+        received.append(text)
+        return text
+
+    async def main():
+        await scheduler.submit("c1", "uno", run_turn)
+        await scheduler.submit("c1", "dos", run_turn)
+
+    run(main())
+    assert received == ["uno", "dos"]
+
+
+def test_cancelled_batch_releases_every_caller():
+    scheduler = ConversationScheduler()
+
+    async def run_turn(text: str):
+        await asyncio.sleep(10)
+
+    async def main():
+        callers = [asyncio.create_task(scheduler.submit("c1", text, run_turn)) for text in ["uno", "dos"]]
+        await asyncio.sleep(0.01)
+        [batch_task] = scheduler._tasks
+        batch_task.cancel()
+        return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), timeout=1.0)
+
+    results = run(main())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert scheduler._pending == {}
+    assert scheduler._tasks == set()
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight, singleflight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight("test.singleflight.share")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "resultado"
+
+    async def main():
+        return await asyncio.gather(*[group.do("k", fetch) for _ in range(5)])
+
+    assert run(main()) == ["resultado"] * 5
+    assert len(calls) == 1
+
+
+def test_key_is_released_after_completion():
+    group = SingleFlight("test.singleflight.release")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        first = await group.do("k", fetch)
+        second = await group.do("k", fetch)
+        return first, second
+
+    assert run(main()) == (1, 2)
+    assert group._inflight == {}
+
+
+def test_exception_reaches_every_caller():
+    group = SingleFlight("test.singleflight.error")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("falló")
+
+    async def main():
+        return await asyncio.gather(*[group.do("k", fail) for _ in range(3)], return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    group = SingleFlight("test.singleflight.cancel")
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        impatient = asyncio.create_task(group.do("k", fetch))
+        patient = asyncio.create_task(group.do("k", fetch))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert run(main()) == "ok"
+
+
+def test_decorator_groups_equivalent_arguments():
+    calls = []
+
+    @singleflight("test.decorated")
+    async def search(query: str, limit: int = 10):
+        """Busca."""
+        calls.append(query)
+        await asyncio.sleep(0.02)
+        return f"{query}:{limit}"
+
+    async def main():
+        return await asyncio.gather(search("Tenis  Blancos"), search("tenis blancos"), search("botas", limit=5))
+
+    assert run(main()) == ["Tenis  Blancos:10", "Tenis  Blancos:10", "botas:5"]
+    assert len(calls) == 2
+    assert search.__doc__ == "Busca."
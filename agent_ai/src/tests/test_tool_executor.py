@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from core.deadline import Deadline
+from inference.tools.executor import ToolExecutor
+
+
+class FakeCompactor:
+    def compact(self, tool_name, results):
+        return str(results)
+
+
+def make_executor(**specs) -> ToolExecutor:
+    return ToolExecutor(
+        {
+            name: {
+                "func": func,
+                "build_kwargs": lambda args, state: args,
+                "timeout": timeout,
+                "max_concurrency": 2,
+            }
+            for name, (func, timeout) in specs.items()
+        },
+        compactor=FakeCompactor()
+    )
+
+
+def tool_call(name: str, call_id: str, **args) -> dict:
+    return {"name": name, "id": call_id, "args": args}
+
+
+async def echo(value: str):
+    await asyncio.sleep(0.01)
+    return value
+
+
+async def slow(value: str):
+    await asyncio.sleep(1.0)
+    return value
+
+
+def sync_upper(value: str):
+    return value.upper()
+
+
+def broken(value: str):
+    raise ValueError("sin conexión")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_unknown_tool_returns_a_tool_message():
+    executor = make_executor(echo=(echo, 1.0))
+
+    [message] = run(executor.execute([tool_call("missing_tool", "1")], {}))
+
+    assert message.content == "No tool found named missing_tool"
+    assert message.tool_call_id == "1"
+
+
+def test_results_keep_the_order_of_the_tool_calls():
+    executor = make_executor(echo=(echo, 1.0), upper=(sync_upper, 1.0))
+
+    messages = run(executor.execute(
+        [tool_call("echo", "1", value="a"), tool_call("upper", "2", value="b"), tool_call("echo", "3", value="c")],
+        {}
+    ))
+
+    assert [m.tool_call_id for m in messages] == ["1", "2", "3"]
+    assert [m.content for m in messages] == [
+        "Tool 'echo' result:\na", "Tool 'upper' result:\nB", "Tool 'echo' result:\nc"
+    ]
+
+
+def test_tool_timeout_returns_a_message_instead_of_failing():
+    executor = make_executor(slow=(slow, 0.05), echo=(echo, 1.0))
+
+    started = time.perf_counter()
+    messages = run(executor.execute([tool_call("slow", "1", value="a"), tool_call("echo", "2", value="b")], {}))
+
+    assert time.perf_counter() - started < 0.5
+    assert "no respondió a tiempo" in messages[0].content
+    assert messages[1].content == "Tool 'echo' result:\nb"
+
+
+def test_turn_deadline_cuts_the_tool_before_its_own_timeout():
+    executor = make_executor(slow=(slow, 5.0))
+
+    [message] = run(executor.execute([tool_call("slow", "1", value="a")], {"deadline": Deadline(0.05)}))
+
+    assert "no alcanzó a responder en el tiempo del turno" in message.content
+
+
+def test_tool_errors_are_reported_to_the_model():
+    executor = make_executor(broken=(broken, 1.0))
+
+    [message] = run(executor.execute([tool_call("broken", "1", value="a")], {}))
+
+    assert message.content == "Tool 'broken' falló: sin conexión"